@@ -1,41 +1,65 @@
 """
 A 2.5-inch drive tray for the HP Proliant DL180 G6.
+
+The vendor mesh is shortened via `lib.triangles`, as the same boolean
+operations take several minutes in OpenSCAD due to the STL import.
 """
+from pathlib import Path
 from solid import OpenSCADObject, cube, translate
-from lib.utils import build, stl, combine
-
-print()
-print("Rendering to STL via OpenSCAD CLI may take several")
-print("minutes due to STL import! Please be patient!")
-print()
-
-original = stl("vendor/proliant_tray_2in.stl")
+from lib import triangles
+from lib.utils import build, stl, combine, part
 
-front = original
-front -= combine(
-    cube([130, 150, 100]),
-    translate([70, 0, 0]),
-)
+# Mesh of the original tray provided by the vendor.
+VENDOR = Path("vendor/proliant_tray_2in.stl")
 
+# Mesh of the tray after splitting and shortening it.
+MESH = Path("build/mesh/dl180_g6_tray_2in.stl")
 
-back = original
-back -= combine(
-    cube([81.5, 150, 100]),
-    translate([-10, -10, 0]),
-)
-
-# Shorten tray by 1.5mm to make it compatible with G6.
-solid = front
-solid += combine(
-    back,
-    translate([-1.5, 0, 0]),
-)
+# Corners of the boxes that cut off the back and the front of the tray.
+FRONT_CUT = ([70, 0, 0], [200, 150, 100])
+BACK_CUT = ([-10, -10, 0], [71.5, 140, 100])
 
 
+@part
 def obj() -> OpenSCADObject:
     """
     Retrieve part object when importing it into assemblies or similar.
     """
+    # Shorten tray by 1.5mm to make it compatible with G6.
+    try:
+        original = triangles.load(VENDOR)
+        # The halves touch after moving the back, hence the slab between the
+        # cuts is removed from the mesh instead of merging two capped halves.
+        shortened = triangles.shorten(original, 0, FRONT_CUT[0][0], BACK_CUT[1][0])
+        return stl(triangles.save(shortened, MESH))
+    except (OSError, ValueError) as error:
+        print(f"Splitting the vendor mesh failed, falling back to OpenSCAD: {error}")
+
+    print()
+    print("Rendering to STL via OpenSCAD CLI may take several")
+    print("minutes due to STL import! Please be patient!")
+    print()
+
+    original = stl(str(VENDOR))
+
+    front = original
+    front -= combine(
+        cube([130, 150, 100]),
+        translate(FRONT_CUT[0]),
+    )
+
+    back = original
+    back -= combine(
+        cube([81.5, 150, 100]),
+        translate(BACK_CUT[0]),
+    )
+
+    solid = front
+    solid += combine(
+        back,
+        translate([-1.5, 0, 0]),
+    )
+
     return solid
 
 
@@ -1,9 +1,21 @@
 """
 A library containing utilities for additive manufacturing.
 """
+from math import acos, ceil, degrees, pi
+from os import getenv
+from typing import Optional
 
+# Extrusion width of the printer, which is the smallest printable detail.
+EXTRUSION_WIDTH = 0.4
 
-def dimension(dim: float, tol: int = 0, step: float = 0.4) -> float:
+# Minimum number of segments of a full circle, as used by OpenSCAD.
+MIN_SEGMENTS = 5
+
+# Radius for which the fallback angle `$fa` matches the tessellation policy.
+REFERENCE_RADIUS = 10
+
+
+def dimension(dim: float, tol: int = 0, step: float = EXTRUSION_WIDTH) -> float:
     """
     Given a dimension, this function will round down to the
     next multiple of the dimension. An additional parameter
@@ -13,3 +25,38 @@ def dimension(dim: float, tol: int = 0, step: float = 0.4) -> float:
     # Add small value to reduce risk of the remainder being zero.
     dim += 1e-10
     return (dim // step) * step + tol * step
+
+
+def chordal_error(step: float = EXTRUSION_WIDTH) -> float:
+    """
+    The maximum deviation of a tessellated arc from the true arc.
+    Deviations below a quarter of the extrusion width are not
+    visible on a printed part.
+    """
+    return step / 4
+
+
+def segments(radius: float, error: Optional[float] = None) -> int:
+    """
+    The number of segments of a full circle of the given radius, such
+    that the chordal error stays within the tolerance. A fixed number
+    of segments can be forced via the `RESOLUTION` environment variable.
+    """
+    resolution = getenv("RESOLUTION")
+    if resolution is not None:
+        return int(resolution)
+
+    error = chordal_error() if error is None else error
+    if radius <= error:
+        return MIN_SEGMENTS
+    return max(MIN_SEGMENTS, ceil(pi / acos(1 - error / radius)))
+
+
+def fragments(step: float = EXTRUSION_WIDTH) -> tuple:
+    """
+    The values of `$fa` and `$fs` that OpenSCAD uses for primitives
+    without an explicit number of segments. Edges are never shorter
+    than the extrusion width and the angle matches the tessellation
+    policy at the reference radius.
+    """
+    return degrees(2 * pi / segments(REFERENCE_RADIUS, chordal_error(step))), step
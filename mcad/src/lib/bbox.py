@@ -0,0 +1,296 @@
+"""
+Axis-aligned bounding boxes of SolidPython objects, which are used to
+cull boolean operations that cannot have an effect.
+
+A bounding box is a tuple of the minimum and maximum corner. Empty
+geometry has the bounding box `None`, while geometry whose extent is
+unknown, e.g. text, has an infinite bounding box.
+"""
+from math import cos, inf, radians, sin, sqrt
+from typing import Optional
+from solid import OpenSCADObject
+
+# Bounding box of geometry with an unknown extent.
+UNBOUNDED = ((-inf, -inf, -inf), (inf, inf, inf))
+
+# Tolerance to treat touching bounding boxes as disjoint.
+EPSILON = 1e-9
+
+# Nodes that combine their children without changing their extent.
+GROUPS = ("union", "color", "render", "hull", "group")
+
+
+def box(points: list) -> Optional[tuple]:
+    """
+    Compute the bounding box of a list of 3D points.
+    """
+    if not points:
+        return None
+    return (
+        tuple(min(p[i] for p in points) for i in range(3)),
+        tuple(max(p[i] for p in points) for i in range(3)),
+    )
+
+
+def corners(bounds: tuple) -> list:
+    """
+    Retrieve the eight corners of a bounding box.
+    """
+    (x0, y0, z0), (x1, y1, z1) = bounds
+    return [(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)]
+
+
+def merge(*boxes: Optional[tuple]) -> Optional[tuple]:
+    """
+    Compute the bounding box of the union of bounding boxes.
+    """
+    boxes = [b for b in boxes if b is not None]
+    if not boxes:
+        return None
+    return (
+        tuple(min(b[0][i] for b in boxes) for i in range(3)),
+        tuple(max(b[1][i] for b in boxes) for i in range(3)),
+    )
+
+
+def intersect(*boxes: Optional[tuple]) -> Optional[tuple]:
+    """
+    Compute the bounding box of the intersection of bounding boxes.
+    """
+    if not boxes or any(b is None for b in boxes):
+        return None
+    lo = tuple(max(b[0][i] for b in boxes) for i in range(3))
+    hi = tuple(min(b[1][i] for b in boxes) for i in range(3))
+    if any(lo[i] > hi[i] for i in range(3)):
+        return None
+    return lo, hi
+
+
+def overlaps(a: Optional[tuple], b: Optional[tuple]) -> bool:
+    """
+    Check whether two bounding boxes share a volume. Boxes that merely
+    touch do not overlap, as their intersection has no volume.
+    """
+    if a is None or b is None:
+        return False
+    return all(a[0][i] < b[1][i] - EPSILON and b[0][i] < a[1][i] - EPSILON for i in range(3))
+
+
+def transform(bounds: Optional[tuple], matrix: list) -> Optional[tuple]:
+    """
+    Apply a 3x4 affine matrix to a bounding box.
+    """
+    if bounds is None:
+        return None
+    if bounds == UNBOUNDED:
+        return UNBOUNDED
+    return box(
+        [
+            tuple(sum(row[j] * p[j] for j in range(3)) + row[3] for row in matrix)
+            for p in corners(bounds)
+        ]
+    )
+
+
+def rotation(axis: tuple, angle: float) -> list:
+    """
+    Create the 3x4 matrix of a rotation around an axis by an angle in degrees.
+    """
+    norm = sqrt(sum(v * v for v in axis))
+    if norm == 0:
+        return [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]]
+    x, y, z = (v / norm for v in axis)
+    c, s = cos(radians(angle)), sin(radians(angle))
+    t = 1 - c
+    return [
+        [t * x * x + c, t * x * y - s * z, t * x * z + s * y, 0],
+        [t * x * y + s * z, t * y * y + c, t * y * z - s * x, 0],
+        [t * x * z - s * y, t * y * z + s * x, t * z * z + c, 0],
+    ]
+
+
+def affine(node: OpenSCADObject) -> Optional[list]:
+    """
+    Retrieve the 3x4 matrix of a transform node or `None` for other nodes.
+    """
+    name, params = node.name, node.params
+    if name == "translate":
+        offset = vector(params.get("v"))
+        return [[1, 0, 0, offset[0]], [0, 1, 0, offset[1]], [0, 0, 1, offset[2]]]
+    if name == "rotate":
+        angle, axis = params.get("a") or 0, params.get("v")
+        if isinstance(angle, (int, float)):
+            return rotation(axis or (0, 0, 1), angle)
+        # Rotations around the axes are applied in the order x, y and z.
+        matrix = [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]]
+        for a, v in zip(vector(angle), ((1, 0, 0), (0, 1, 0), (0, 0, 1))):
+            r = rotation(v, a)
+            matrix = [[sum(r[i][k] * matrix[k][j] for k in range(3)) for j in range(4)] for i in range(3)]
+        return matrix
+    if name == "mirror":
+        n = vector(params.get("v"))
+        norm = sum(v * v for v in n) or 1
+        return [[(1 if i == j else 0) - 2 * n[i] * n[j] / norm for j in range(3)] + [0] for i in range(3)]
+    if name == "scale":
+        factor = vector(params.get("v"), default=1)
+        return [[factor[0], 0, 0, 0], [0, factor[1], 0, 0], [0, 0, factor[2], 0]]
+    if name == "multmatrix":
+        return [list(vector(row, 4)) for row in params.get("m")[:3]]
+    return None
+
+
+def vector(value, length: int = 3, default: float = 0) -> tuple:
+    """
+    Expand a scalar or a short sequence into a vector.
+    """
+    if value is None:
+        return (default,) * length
+    if isinstance(value, (int, float)):
+        return (value,) * length
+    value = tuple(value)
+    return value + (default,) * (length - len(value))
+
+
+def radius(params: dict, key: str, default: float = 1) -> float:
+    """
+    Retrieve a radius from either the radius or the diameter parameter.
+    """
+    if params.get(key) is not None:
+        return params[key]
+    diameter = params.get(key.replace("r", "d"))
+    if diameter is not None:
+        return diameter / 2
+    return default
+
+
+def bounds(node: OpenSCADObject, memo: Optional[dict] = None) -> Optional[tuple]:
+    """
+    Compute the bounding box of a SolidPython object.
+    """
+    # The memo holds a reference to the node, so that its identity stays valid.
+    memo = {} if memo is None else memo
+    if id(node) in memo:
+        return memo[id(node)][1]
+
+    # Holes are subtracted at the root and disabled or background objects
+    # are not part of the geometry.
+    if node.is_hole or node.modifier in ("*", "%"):
+        memo[id(node)] = (node, None)
+        return None
+
+    # Bounds may be known in advance, e.g. for the imported mesh of a feature.
+    known = node.get_trait("bounds")
+    if known is not None:
+        memo[id(node)] = (node, (tuple(known["min"]), tuple(known["max"])))
+        return memo[id(node)][1]
+
+    params = node.params
+    children = [bounds(child, memo) for child in node.children]
+    name = node.name
+    result = UNBOUNDED
+
+    if name == "cube":
+        size = vector(params.get("size"), default=1)
+        offset = [-s / 2 for s in size] if params.get("center") else [0, 0, 0]
+        result = (tuple(offset), tuple(o + s for o, s in zip(offset, size)))
+    elif name == "cylinder":
+        r = max(radius(params, "r1", radius(params, "r")), radius(params, "r2", radius(params, "r")))
+        h = params.get("h") or 1
+        z0 = -h / 2 if params.get("center") else 0
+        result = ((-r, -r, z0), (r, r, z0 + h))
+    elif name == "sphere":
+        r = radius(params, "r")
+        result = ((-r, -r, -r), (r, r, r))
+    elif name == "polyhedron":
+        result = box([vector(p) for p in params.get("points") or []])
+    elif name == "polygon":
+        result = box([vector(p) for p in params.get("points") or []])
+    elif name == "square":
+        size = vector(params.get("size"), 2, 1)
+        offset = [-s / 2 for s in size] if params.get("center") else [0, 0]
+        result = ((offset[0], offset[1], 0), (offset[0] + size[0], offset[1] + size[1], 0))
+    elif name == "circle":
+        r = radius(params, "r")
+        result = ((-r, -r, 0), (r, r, 0))
+    elif name == "linear_extrude":
+        flat = merge(*children)
+        if flat is not None and flat != UNBOUNDED:
+            (x0, y0, _), (x1, y1, _) = flat
+            if params.get("twist"):
+                r = max(abs(x0), abs(x1), abs(y0), abs(y1)) * sqrt(2)
+                x0, y0, x1, y1 = -r, -r, r, r
+            scale = max(vector(params.get("scale"), 2, 1))
+            if scale > 1:
+                x0, y0, x1, y1 = (v * scale for v in (x0, y0, x1, y1))
+            h = params.get("height") or 1
+            z0 = -h / 2 if params.get("center") else 0
+            result = ((x0, y0, z0), (x1, y1, z0 + h))
+        elif flat is None:
+            result = None
+    elif name == "rotate_extrude":
+        flat = merge(*children)
+        if flat is not None and flat != UNBOUNDED:
+            r = max(abs(flat[0][0]), abs(flat[1][0]))
+            result = ((-r, -r, flat[0][1]), (r, r, flat[1][1]))
+        elif flat is None:
+            result = None
+    elif name == "translate":
+        offset = vector(params.get("v"))
+        result = transform(merge(*children), [[1, 0, 0, offset[0]], [0, 1, 0, offset[1]], [0, 0, 1, offset[2]]])
+    elif name == "rotate":
+        angle, axis = params.get("a") or 0, params.get("v")
+        child = merge(*children)
+        if isinstance(angle, (int, float)):
+            result = transform(child, rotation(axis or (0, 0, 1), angle))
+        else:
+            ax, ay, az = vector(angle)
+            result = child
+            for a, v in ((ax, (1, 0, 0)), (ay, (0, 1, 0)), (az, (0, 0, 1))):
+                result = transform(result, rotation(v, a))
+    elif name == "mirror":
+        n = vector(params.get("v"))
+        norm = sum(v * v for v in n)
+        if norm == 0:
+            result = merge(*children)
+        else:
+            matrix = [[(1 if i == j else 0) - 2 * n[i] * n[j] / norm for j in range(3)] + [0] for i in range(3)]
+            result = transform(merge(*children), matrix)
+    elif name == "scale":
+        factor = vector(params.get("v"), default=1)
+        result = transform(merge(*children), [[factor[0], 0, 0, 0], [0, factor[1], 0, 0], [0, 0, factor[2], 0]])
+    elif name == "multmatrix":
+        matrix = [list(vector(row, 4)) for row in params.get("m")[:3]]
+        result = transform(merge(*children), matrix)
+    elif name in GROUPS:
+        result = merge(*children)
+    elif name == "intersection":
+        result = intersect(*children)
+    elif name == "difference":
+        result = children[0] if children else None
+    elif name == "minkowski":
+        if all(child is not None for child in children) and children:
+            result = (
+                tuple(sum(child[0][i] for child in children) for i in range(3)),
+                tuple(sum(child[1][i] for child in children) for i in range(3)),
+            )
+        else:
+            result = None
+    elif name == "part":
+        result = merge(*children)
+    elif name == "array":
+        child = merge(*children)
+        if child is not None and child != UNBOUNDED:
+            counts, steps, origin = params["counts"], params["steps"], params["origin"]
+            lo = [origin[i] + sum(min(0, (n - 1) * s[i]) for n, s in zip(counts, steps)) for i in range(3)]
+            hi = [origin[i] + sum(max(0, (n - 1) * s[i]) for n, s in zip(counts, steps)) for i in range(3)]
+            result = (tuple(c + o for c, o in zip(child[0], lo)), tuple(c + o for c, o in zip(child[1], hi)))
+        else:
+            result = child
+    elif name == "mirrored":
+        n = params["normal"]
+        norm = sum(v * v for v in n) or 1
+        matrix = [[(1 if i == j else 0) - 2 * n[i] * n[j] / norm for j in range(3)] + [0] for i in range(3)]
+        result = merge(merge(*children), transform(merge(*children), matrix))
+
+    memo[id(node)] = (node, result)
+    return result
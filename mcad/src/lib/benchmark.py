@@ -0,0 +1,215 @@
+"""
+A benchmark suite that measures the SCAD generation and the OpenSCAD
+render of every part across a matrix of resolutions and backends.
+
+For each combination the generation time, the size of the SCAD file, the
+number of CSG nodes, the render wall time and the peak memory usage of
+OpenSCAD are measured. The results are stored as JSON and compared
+against a saved baseline to flag regressions.
+
+Usage: PYTHONPATH=src python3 -m lib.benchmark --resolution 8 --resolution 32
+       PYTHONPATH=src python3 -m lib.benchmark --save
+"""
+import io
+import json
+import sys
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from os import environ
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional
+from . import governor, openscad
+from .build import discover, generate
+from .csg import stats
+from .features import arc_points
+from .utils import PARTS
+
+# File the results of the latest run are written to.
+RESULTS = Path("build/benchmark/results.json")
+
+# Baseline the results are compared against.
+BASELINE = Path("benchmark/baseline.json")
+
+# Metrics of each benchmark and whether they are timings, which are noisy.
+METRICS = {
+    "scad_time": True,
+    "scad_size": False,
+    "nodes": False,
+    "render_time": True,
+    "peak_rss": False,
+}
+
+# Minimum absolute change of timings in seconds that counts as regression.
+MIN_DELTA = 0.05
+
+
+def measure(part: str, resolution: str, backends: list, repeat: int, scad_only: bool) -> list:
+    """
+    Benchmark a part at the given resolution with all backends. Timings
+    are the minimum across the repetitions.
+    """
+    environ["RESOLUTION"] = resolution
+    scad = f"build/scad/{part}.scad"
+
+    # Parts and arcs are memoized, hence clear them to measure the
+    # construction of the geometry on every repetition, including the
+    # parts an assembly places.
+    timings = []
+    for _ in range(repeat):
+        for builder in PARTS.values():
+            builder.cache_clear()
+        arc_points.cache_clear()
+        with redirect_stdout(io.StringIO()):
+            elapsed, tree = generate(part)
+        timings.append(elapsed)
+
+    base = {
+        "part": part,
+        "resolution": int(resolution),
+        "scad_time": min(timings),
+        "scad_size": Path(scad).stat().st_size,
+        "nodes": stats(tree)[0],
+    }
+    if scad_only:
+        return [{**base, "backend": None}]
+
+    results = []
+    for backend in backends:
+        runs = []
+        with TemporaryDirectory() as tmp:
+            for _ in range(repeat):
+                runs.append(governor.execute(openscad.command(scad, f"{tmp}/{part}.stl", backend)))
+        code = max(run[0] for run in runs)
+        results.append(
+            {
+                **base,
+                "backend": backend,
+                "code": code,
+                "render_time": min(run[1] for run in runs) if code == 0 else None,
+                "peak_rss": max(run[3].ru_maxrss for run in runs) if code == 0 else None,
+            }
+        )
+    return results
+
+
+def identity(result: dict) -> tuple:
+    """
+    Identify a benchmark across runs.
+    """
+    return result["part"], result["resolution"], result["backend"]
+
+
+def regressions(results: list, baseline: list, threshold: float) -> list:
+    """
+    Compare the results against the baseline and describe the metrics
+    that grew by more than the relative threshold.
+    """
+    previous = {identity(result): result for result in baseline}
+    found = []
+    for result in results:
+        old = previous.get(identity(result))
+        if old is None:
+            continue
+        for metric, timing in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if before is None or after is None or after <= before * (1 + threshold):
+                continue
+            if timing and after - before < MIN_DELTA:
+                continue
+            part, resolution, backend = identity(result)
+            change = (after - before) / before * 100 if before else float("inf")
+            found.append(f"{part} @ {resolution} via {backend or 'scad'}: {metric} {before:g} -> {after:g} (+{change:.1f}%)")
+    return found
+
+
+def report(results: list):
+    """
+    Print the results as table.
+    """
+    print(
+        f"{'part':<32}{'res':>5}{'backend':>10}{'scad':>9}{'size':>10}{'nodes':>8}{'render':>10}{'memory':>10}"
+    )
+    for result in results:
+        render = result.get("render_time")
+        memory = result.get("peak_rss")
+        print(
+            f"{result['part']:<32}{result['resolution']:>5}{result['backend'] or '-':>10}"
+            f"{result['scad_time']:>8.2f}s{result['scad_size'] / 1024:>8.1f}kB{result['nodes']:>8}"
+            + (f"{render:>9.2f}s" if render is not None else f"{'-':>10}")
+            + (f"{memory / 1024:>8.1f}MB" if memory is not None else f"{'-':>10}")
+        )
+
+
+def load(path: Path) -> Optional[list]:
+    """
+    Load the results of a previous run, or `None` if there are none.
+    """
+    return json.loads(path.read_text()) if path.is_file() else None
+
+
+def main() -> int:
+    """
+    Run the benchmark suite, store the results and compare them against
+    the baseline.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.benchmark", description=__doc__)
+    parser.add_argument("parts", nargs="*", help="names of the parts to benchmark, defaults to all")
+    parser.add_argument("-r", "--resolution", action="append", help="resolution to benchmark, defaults to 8 and 32")
+    parser.add_argument("-b", "--backend", action="append", choices=openscad.BACKENDS, help="backend to benchmark")
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="number of repetitions per benchmark")
+    parser.add_argument("--scad-only", action="store_true", help="skip rendering via OpenSCAD")
+    parser.add_argument("-o", "--output", type=Path, default=RESULTS, help="file to store the results in")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="file of the baseline results")
+    parser.add_argument("--save", action="store_true", help="save the results as new baseline")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1, help="relative growth flagged as regression")
+    args = parser.parse_args()
+
+    available = discover()
+    parts = args.parts or available
+    unknown = sorted(set(parts) - set(available))
+    if unknown:
+        parser.error(f"unknown parts: {', '.join(unknown)}")
+    backends = args.backend or list(openscad.supported())
+
+    results = []
+    original = environ.get("RESOLUTION")
+    for resolution in args.resolution or ["8", "32"]:
+        for part in parts:
+            results += measure(part, resolution, backends, args.repeat, args.scad_only)
+            print(f"[{resolution}] {part}", file=sys.stderr)
+
+    # Regenerate the SCAD files at the original resolution, as Make would
+    # consider the benchmarked ones up to date.
+    if original is None:
+        environ.pop("RESOLUTION")
+    else:
+        environ["RESOLUTION"] = original
+    with redirect_stdout(io.StringIO()):
+        for part in parts:
+            generate(part)
+
+    report(results)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    baseline = load(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline found at {args.baseline}, save one via --save")
+        return 0
+
+    found = regressions(results, baseline, args.threshold)
+    print(f"\n{len(found)} regressions against {args.baseline}")
+    for line in found:
+        print(f"  {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+An analytic boolean engine for axis-aligned boxes. Subtrees that only
+consist of cubes, axis-aligned transforms and booleans are evaluated
+exactly in Python and emitted as a polyhedron, so that OpenSCAD does
+not need CGAL to evaluate them.
+
+The subtrees are evaluated on the grid spanned by the coordinates of
+all boxes, where each cell is either entirely inside or outside of the
+result. The engine is enabled via the `BOXES` environment variable.
+"""
+from os import getenv
+from typing import Optional
+import numpy as np
+from solid import OpenSCADObject, objects
+from .bbox import vector
+from .csg import clone, plain
+from .patterns import Pattern
+
+# Booleans that can be evaluated on the grid.
+BOOLEANS = ("union", "difference", "intersection")
+
+# Transforms that keep boxes axis-aligned, if their parameters allow it.
+TRANSFORMS = ("translate", "scale", "mirror")
+
+# Maximum number of cells of the grid, which bounds the memory usage.
+MAX_CELLS = 10**7
+
+
+def enabled() -> bool:
+    """
+    Check whether the box engine is enabled via the `BOXES` environment
+    variable.
+    """
+    return getenv("BOXES", "0") not in ("0", "false", "no")
+
+
+def affine(node: OpenSCADObject) -> Optional[tuple]:
+    """
+    Retrieve the transform of a node as a tuple of the per-axis scale
+    and offset, or `None` if it does not keep boxes axis-aligned.
+    """
+    if node.name == "translate":
+        return np.ones(3), np.array(vector(node.params.get("v")), dtype=float)
+    if node.name == "scale":
+        factor = np.array(vector(node.params.get("v"), default=1), dtype=float)
+        return (factor, np.zeros(3)) if factor.all() else None
+    if node.name == "mirror":
+        normal = np.array(vector(node.params.get("v")), dtype=float)
+        if np.count_nonzero(normal) != 1:
+            return None
+        return np.where(normal != 0, -1.0, 1.0), np.zeros(3)
+    return None
+
+
+def supported(node: OpenSCADObject, memo: dict) -> bool:
+    """
+    Check whether a subtree can be evaluated by the box engine.
+    """
+    if id(node) in memo:
+        return memo[id(node)][1]
+
+    if not plain(node):
+        result = False
+    elif isinstance(node, Pattern):
+        result = supported(node.expand(), memo)
+    elif node.name == "cube":
+        result = True
+    elif node.name in BOOLEANS or node.name in TRANSFORMS:
+        result = (
+            bool(node.children)
+            and (node.name in BOOLEANS or affine(node) is not None)
+            and all(supported(child, memo) for child in node.children)
+        )
+    else:
+        result = False
+
+    memo[id(node)] = (node, result)
+    return result
+
+
+def boxes(node: OpenSCADObject, scale: np.ndarray, offset: np.ndarray):
+    """
+    Iterate over the boxes of a subtree as tuples of the node, the
+    minimum and the maximum corner, applying the given transform.
+    """
+    if isinstance(node, Pattern):
+        yield from boxes(node.expand(), scale, offset)
+        return
+
+    if node.name == "cube":
+        size = np.array(vector(node.params.get("size"), default=1), dtype=float)
+        lo = -size / 2 if node.params.get("center") else np.zeros(3)
+        corners = np.array([lo, lo + size]) * scale + offset
+        yield node, corners.min(axis=0), corners.max(axis=0)
+        return
+
+    if node.name in TRANSFORMS:
+        factor, shift = affine(node)
+        scale, offset = scale * factor, scale * shift + offset
+
+    for child in node.children:
+        yield from boxes(child, scale, offset)
+
+
+def occupancy(node: OpenSCADObject, grid: list, scale: np.ndarray, offset: np.ndarray) -> np.ndarray:
+    """
+    Evaluate a subtree on the grid, returning which cells are inside.
+    """
+    if isinstance(node, Pattern):
+        return occupancy(node.expand(), grid, scale, offset)
+
+    if node.name == "cube":
+        cells = np.zeros([len(axis) - 1 for axis in grid], dtype=bool)
+        _, lo, hi = next(boxes(node, scale, offset))
+        if (hi > lo).all():
+            start = [np.searchsorted(axis, v) for axis, v in zip(grid, lo)]
+            stop = [np.searchsorted(axis, v) for axis, v in zip(grid, hi)]
+            cells[start[0] : stop[0], start[1] : stop[1], start[2] : stop[2]] = True
+        return cells
+
+    if node.name in TRANSFORMS:
+        factor, shift = affine(node)
+        scale, offset = scale * factor, scale * shift + offset
+
+    children = [occupancy(child, grid, scale, offset) for child in node.children]
+    if node.name == "difference":
+        return children[0] & ~np.logical_or.reduce(children[1:] or [np.zeros_like(children[0])])
+    if node.name == "intersection":
+        return np.logical_and.reduce(children)
+    return np.logical_or.reduce(children)
+
+
+def rectangles(mask: np.ndarray) -> list:
+    """
+    Greedily decompose a 2D mask into rectangles, given by the grid
+    indices of their minimum and maximum corners.
+    """
+    mask = mask.copy()
+    result = []
+    for a0, b0 in zip(*np.nonzero(mask)):
+        if not mask[a0, b0]:
+            continue
+        b1 = b0 + 1
+        while b1 < mask.shape[1] and mask[a0, b1]:
+            b1 += 1
+        a1 = a0 + 1
+        while a1 < mask.shape[0] and mask[a1, b0:b1].all():
+            a1 += 1
+        mask[a0:a1, b0:b1] = False
+        result.append((a0, b0, a1, b1))
+    return result
+
+
+def surface(cells: np.ndarray, grid: list) -> Optional[OpenSCADObject]:
+    """
+    Create a polyhedron from the boundary of the cells inside, merging
+    coplanar faces into rectangles. Returns `None` if the surface is not
+    manifold, e.g. if two cells only touch along an edge.
+    """
+    faces = []
+    for axis in range(3):
+        a, b = (axis + 1) % 3, (axis + 2) % 3
+        padded = np.moveaxis(np.pad(cells, [(1, 1) if i == axis else (0, 0) for i in range(3)]), (axis, a, b), (0, 1, 2))
+        for outwards, mask in ((True, padded[:-1] & ~padded[1:]), (False, ~padded[:-1] & padded[1:])):
+            for i in np.nonzero(mask.any(axis=(1, 2)))[0]:
+                faces += [(axis, i, rect, outwards) for rect in rectangles(mask[i])]
+
+    if not faces:
+        return objects.union()
+
+    def at(axis: int, i: int, u: int, v: int) -> tuple:
+        point = [0, 0, 0]
+        point[axis], point[(axis + 1) % 3], point[(axis + 2) % 3] = i, u, v
+        return tuple(point)
+
+    corners = {at(axis, i, u, v) for axis, i, (a0, b0, a1, b1), _ in faces for u in (a0, a1) for v in (b0, b1)}
+
+    # Include the corners of adjacent faces that lie on the edges of a
+    # face, so that the surface has no T-junctions.
+    polygons = []
+    for axis, i, (a0, b0, a1, b1), outwards in faces:
+        ring = []
+        for (u0, v0), (u1, v1) in (((a0, b0), (a1, b0)), ((a1, b0), (a1, b1)), ((a1, b1), (a0, b1)), ((a0, b1), (a0, b0))):
+            step = 1 if (u1 - u0) + (v1 - v0) > 0 else -1
+            if u0 != u1:
+                points = [at(axis, i, u, v0) for u in range(u0, u1, step)]
+            else:
+                points = [at(axis, i, u0, v) for v in range(v0, v1, step)]
+            ring += [p for k, p in enumerate(points) if k == 0 or p in corners]
+        # Faces are listed clockwise when viewed from outside, as expected by OpenSCAD.
+        polygons.append(ring[::-1] if outwards else ring)
+
+    vertices = {}
+    faces = [[vertices.setdefault(p, len(vertices)) for p in ring] for ring in polygons]
+
+    # Each edge of a manifold surface is shared by exactly two faces.
+    edges = {}
+    for face in faces:
+        for edge in zip(face, face[1:] + face[:1]):
+            edges[frozenset(edge)] = edges.get(frozenset(edge), 0) + 1
+    if any(count != 2 for count in edges.values()):
+        return None
+
+    points = [[float(grid[k][p[k]]) for k in range(3)] for p in vertices]
+    return objects.polyhedron(points=points, faces=faces)
+
+
+def evaluate(node: OpenSCADObject) -> Optional[OpenSCADObject]:
+    """
+    Evaluate a subtree of boxes and return the resulting polyhedron, or
+    `None` if the grid is too large or the result is not manifold.
+    """
+    identity = (np.ones(3), np.zeros(3))
+    extents = [(lo, hi) for _, lo, hi in boxes(node, *identity) if (hi > lo).all()]
+    if not extents:
+        return objects.union()
+
+    grid = [np.unique([v for extent in extents for v in (extent[0][i], extent[1][i])]) for i in range(3)]
+    if np.prod([len(axis) - 1 for axis in grid]) > MAX_CELLS:
+        return None
+
+    cells = occupancy(node, grid, *identity)
+
+    # Drop the grid planes between identical slices of cells, as they do
+    # not bound any face and would only split the faces of the surface.
+    for axis in range(3):
+        same = (np.diff(cells, axis=axis) == 0).all(axis=tuple(i for i in range(3) if i != axis))
+        cells = np.delete(cells, np.nonzero(same)[0] + 1, axis=axis)
+        grid[axis] = np.delete(grid[axis], np.nonzero(same)[0] + 1)
+
+    return surface(cells, grid)
+
+
+def substitute(root: OpenSCADObject) -> tuple:
+    """
+    Replace the largest subtrees of boxes with at least one boolean by
+    the polyhedra evaluated in Python. Returns the rewritten tree and
+    the number of replaced subtrees.
+    """
+    supports = {}
+    memo = {}
+    replaced = [0]
+
+    def visit(node: OpenSCADObject) -> OpenSCADObject:
+        if id(node) in memo:
+            return memo[id(node)]
+
+        result = None
+        if supported(node, supports) and sum(1 for _ in boxes(node, np.ones(3), np.zeros(3))) > 1:
+            result = evaluate(node)
+            replaced[0] += result is not None
+        if result is None:
+            result = clone(node, [visit(child) for child in node.children])
+
+        memo[id(node)] = result
+        return result
+
+    tree = visit(root)
+    return tree, replaced[0]
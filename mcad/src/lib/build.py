@@ -0,0 +1,120 @@
+"""
+A build driver that transpiles all parts to SCAD files in a single
+interpreter and renders them via OpenSCAD using a process pool.
+
+Usage: PYTHONPATH=src python3 -m lib.build --all -j 4
+"""
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib import import_module
+from os import cpu_count, environ
+from time import perf_counter
+from .deps import SRC_DIR
+from .governor import MEMORY_CODE, STARTED, TELEMETRY_DIR, TIMEOUT_CODE
+from .openscad import BACKENDS, render
+from .utils import PARTS, QUALITIES, build
+
+
+def discover() -> list:
+    """
+    Find the names of all modules in the source directory that declare
+    a part via `lib.utils.part`. Importing the modules is cheap, as the
+    geometry is only constructed when it is built.
+    """
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+    for path in sorted(SRC_DIR.glob("*.py")):
+        import_module(path.stem)
+
+    return sorted(PARTS)
+
+
+def generate(part: str) -> tuple:
+    """
+    Transpile a part to its SCAD file and return the elapsed time and
+    the emitted tree.
+    """
+    start = perf_counter()
+    module = import_module(part)
+    tree = build(module.obj(), module.__file__)
+    return perf_counter() - start, tree
+
+
+def main() -> int:
+    """
+    Build the requested parts and print a timing summary.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.build", description=__doc__)
+    parser.add_argument("parts", nargs="*", help="names of the parts to build")
+    parser.add_argument("--all", action="store_true", help="build all parts")
+    parser.add_argument("-j", "--jobs", type=int, default=cpu_count(), help="number of parallel renders")
+    parser.add_argument("-f", "--format", action="append", choices=["stl", "png"], help="output formats to render")
+    parser.add_argument("--scad-only", action="store_true", help="skip rendering via OpenSCAD")
+    parser.add_argument("-q", "--quality", choices=QUALITIES, help="quality tier of the build")
+    parser.add_argument("-b", "--backend", choices=["auto", *BACKENDS], help="geometry backend of OpenSCAD")
+    args = parser.parse_args()
+
+    # Name the build for the telemetry of the renders in the process pool.
+    environ.setdefault("BUILD_ID", STARTED)
+
+    # Select the backend for the renders in the process pool.
+    if args.backend:
+        environ["BACKEND"] = args.backend
+
+    # Select the quality tier before any part is imported.
+    if args.quality:
+        environ["QUALITY"] = args.quality
+
+    parts = discover() if args.all else args.parts
+    if not parts:
+        parser.error("no parts specified, pass part names or --all")
+    formats = args.format or ["stl"]
+    timings = {}
+    start = perf_counter()
+
+    # Transpile all parts sequentially as they share the interpreter.
+    for part in parts:
+        timings[(part, "scad")], _ = generate(part)
+        print(f"[scad] {part} ({timings[(part, 'scad')]:.2f}s)")
+
+    # Fan out the renders across the process pool.
+    failures = []
+    if not args.scad_only:
+        jobs = [(part, fmt) for part in parts for fmt in formats]
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {
+                pool.submit(render, f"build/scad/{part}.scad", f"build/{fmt}/{part}.{fmt}"): (part, fmt)
+                for part, fmt in jobs
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                part, fmt = futures[future]
+                code, elapsed, output, cached, backend = future.result()
+                timings[(part, fmt)] = elapsed
+                status = "cached" if cached else f"ok via {backend}" if code == 0 else f"failed ({code})"
+                status = "timed out" if code == TIMEOUT_CODE else "out of memory" if code == MEMORY_CODE else status
+                print(f"[{done}/{len(jobs)}] [{fmt}] {part} {status} ({elapsed:.2f}s)")
+                if code != 0:
+                    failures.append((part, fmt, output))
+
+    # Print a summary of the elapsed time per part and output format.
+    columns = ["scad"] + ([] if args.scad_only else formats)
+    print()
+    print(f"{'part':<32}" + "".join(f"{column:>10}" for column in columns))
+    for part in parts:
+        cells = [timings.get((part, column)) for column in columns]
+        print(f"{part:<32}" + "".join(f"{'-':>10}" if t is None else f"{t:>9.2f}s" for t in cells))
+    print(f"{'total':<32}{sum(timings.values()):>9.2f}s")
+    print(f"{'wall':<32}{perf_counter() - start:>9.2f}s")
+    if not args.scad_only:
+        print(f"\nTelemetry written to {TELEMETRY_DIR / environ['BUILD_ID']}.jsonl")
+
+    for part, fmt, output in failures:
+        print(f"\n[{fmt}] {part}:\n{output}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+A content-addressed cache for build artifacts that is shared across
+branches, clean builds and machines using the same cache directory.
+"""
+import re
+from hashlib import sha256
+from os import chmod, close, getenv, replace, unlink, utime
+from pathlib import Path
+from shutil import copyfile
+from tempfile import mkstemp
+from typing import Optional
+
+# Matches string literals, which must be preserved, and comments.
+SCAD_TOKENS = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+# Matches the file argument of an `import()` statement.
+SCAD_IMPORT = re.compile(r'(import\(\s*file\s*=\s*)"((?:\\.|[^"\\])*)"')
+
+
+def directory() -> Path:
+    """
+    Retrieve the cache directory, which can be configured via the
+    `CACHE_DIR` environment variable.
+    """
+    default = Path(getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "cremini"
+    return Path(getenv("CACHE_DIR", default))
+
+
+def limit() -> int:
+    """
+    Retrieve the maximum cache size in bytes, which can be configured
+    in megabytes via the `CACHE_SIZE` environment variable.
+    """
+    return int(float(getenv("CACHE_SIZE", "1024")) * 1024 * 1024)
+
+
+def enabled() -> bool:
+    """
+    Check whether the cache is enabled via the `CACHE` environment variable.
+    """
+    return getenv("CACHE", "1") not in ("0", "false", "no")
+
+
+def digest(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+    """
+    hasher = sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def canonical(scad: str) -> str:
+    """
+    Canonicalize a SCAD program by stripping comments, whitespace and
+    blank lines and by replacing the paths of imported files with the
+    digest of their content, so that equivalent programs hash equally.
+    """
+    scad = SCAD_TOKENS.sub(lambda m: m.group(1) or "", scad)
+
+    def imported(match: re.Match) -> str:
+        path = Path(match.group(2))
+        name = digest(str(path)) if path.is_file() else path.name
+        return f'{match.group(1)}"{name}"'
+
+    scad = SCAD_IMPORT.sub(imported, scad)
+    lines = (line.strip() for line in scad.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def key(*parts: str) -> str:
+    """
+    Derive a cache key from the given parts.
+    """
+    hasher = sha256()
+    for part in parts:
+        hasher.update(part.encode())
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def entry(name: str, suffix: str) -> Path:
+    """
+    Retrieve the path of a cache entry.
+    """
+    return directory() / name[:2] / f"{name}.{suffix}"
+
+
+def fetch(name: str, suffix: str, output: str) -> bool:
+    """
+    Copy a cache entry to the output path if it exists and mark it as
+    recently used. Returns whether the entry was found.
+    """
+    path = entry(name, suffix)
+    if not path.is_file():
+        return False
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    copyfile(path, output)
+    utime(path)
+    return True
+
+
+def store(name: str, suffix: str, source: str) -> Path:
+    """
+    Atomically add a file to the cache and evict the least recently
+    used entries if the cache exceeds its size limit.
+    """
+    path = entry(name, suffix)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Copy to a unique temporary file first, as the cache may be shared by
+    # concurrent writers.
+    fd, partial = mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".partial")
+    close(fd)
+    try:
+        copyfile(source, partial)
+        chmod(partial, 0o644)
+        replace(partial, path)
+    except BaseException:
+        unlink(partial)
+        raise
+
+    evict(limit())
+    return path
+
+
+def evict(size: int):
+    """
+    Remove the least recently used entries until the total size of the
+    cache does not exceed the given size in bytes.
+    """
+    entries = []
+    for path in directory().glob("*/*"):
+        if path.suffix == ".partial":
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(used for _, used, _ in entries)
+    for _, used, path in sorted(entries):
+        if total <= size:
+            break
+        path.unlink(missing_ok=True)
+        total -= used
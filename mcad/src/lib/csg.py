@@ -0,0 +1,291 @@
+"""
+Passes that analyze and rewrite the CSG tree before it is rendered.
+"""
+from hashlib import sha1
+from typing import Optional
+from solid import OpenSCADObject
+from .bbox import UNBOUNDED, bounds, overlaps, radius
+from .patterns import Pattern
+
+# Minimum number of nodes of a subtree to be worth sharing as a module.
+SHARE_MIN_NODES = 4
+
+
+def clone(node: OpenSCADObject, children: list) -> OpenSCADObject:
+    """
+    Create a shallow copy of a node with the given children. The copy is
+    a plain `OpenSCADObject`, as only the name and parameters are needed
+    to render it, except for patterns, which render themselves.
+    """
+    other = OpenSCADObject.__new__(type(node) if isinstance(node, Pattern) else OpenSCADObject)
+    OpenSCADObject.__init__(other, node.name, dict(node.params))
+    other.modifier = node.modifier
+    other.is_hole = node.is_hole
+    other.is_part_root = node.is_part_root
+    other.traits = dict(node.traits)
+    for child in children:
+        other.add(child)
+    return other
+
+
+def structure(node: OpenSCADObject, memo: dict) -> tuple:
+    """
+    Compute the structural hash and the number of nodes of a subtree.
+    Identical hashes mean the subtrees render to identical SCAD code.
+    The results are memoized by node identity, as SolidPython reuses
+    node instances across the tree.
+    """
+    if id(node) in memo:
+        return memo[id(node)]
+
+    hasher = sha1(node.name.encode())
+    hasher.update(node.modifier.encode())
+    hasher.update(repr(sorted(node.params.items(), key=lambda item: str(item[0]))).encode())
+    hasher.update(b"h" if node.is_hole else b"s")
+
+    size = 1
+    holes = node.is_hole
+    for child in node.children:
+        digest, count, hole = structure(child, memo)
+        hasher.update(digest.encode())
+        size += count
+        holes = holes or hole
+
+    memo[id(node)] = (hasher.hexdigest(), size, holes)
+    return memo[id(node)]
+
+
+def share(root: OpenSCADObject) -> tuple:
+    """
+    Detect structurally identical subtrees and replace every occurrence
+    with an instance of a named OpenSCAD module. Returns the rewritten
+    tree and a list of the module definitions as pairs of their name and
+    body.
+    """
+    memo = {}
+
+    # Count the occurrences of each subtree in the expanded tree.
+    counts = {}
+
+    def count(node: OpenSCADObject):
+        digest, _, _ = structure(node, memo)
+        counts[digest] = counts.get(digest, 0) + 1
+        for child in node.children:
+            count(child)
+
+    count(root)
+
+    def candidate(node: OpenSCADObject) -> bool:
+        digest, size, holes = structure(node, memo)
+        # Holes are subtracted at the root of the tree, so keep them inline.
+        return node is not root and counts[digest] > 1 and size >= SHARE_MIN_NODES and not holes
+
+    # Count the occurrences in the output, where each module body is only
+    # emitted once, to avoid modules that are instantiated a single time.
+    emitted = {}
+    visited = set()
+
+    def occur(node: OpenSCADObject):
+        digest, _, _ = structure(node, memo)
+        emitted[digest] = emitted.get(digest, 0) + 1
+        if candidate(node):
+            if digest in visited:
+                return
+            visited.add(digest)
+        for child in node.children:
+            occur(child)
+
+    occur(root)
+
+    # Rewrite the tree and collect the module definitions in order.
+    modules = {}
+
+    def rewrite(node: OpenSCADObject, define: bool = False) -> OpenSCADObject:
+        digest, _, _ = structure(node, memo)
+        if not define and candidate(node) and emitted[digest] > 1:
+            name = f"shared_{digest[:12]}"
+            if digest not in modules:
+                modules[digest] = None
+                modules[digest] = (name, rewrite(node, define=True))
+            return OpenSCADObject(name, {})
+        return clone(node, [rewrite(child) for child in node.children])
+
+    tree = rewrite(root)
+    return tree, list(modules.values())
+
+
+# Transforms with a single child, which distribute over booleans.
+TRANSFORMS = ("translate", "rotate", "scale", "mirror", "multmatrix", "color")
+
+
+def stats(root: OpenSCADObject, memo: Optional[dict] = None) -> tuple:
+    """
+    Count the nodes and measure the depth of the expanded tree.
+    """
+    # The memo holds a reference to the node, so that its identity stays valid.
+    memo = {} if memo is None else memo
+
+    def visit(node: OpenSCADObject) -> tuple:
+        if id(node) not in memo:
+            results = [visit(child) for child in node.children]
+            memo[id(node)] = (
+                node,
+                1 + sum(count for count, _ in results),
+                1 + max((depth for _, depth in results), default=0),
+            )
+        return memo[id(node)][1:]
+
+    return visit(root)
+
+
+def plain(node: OpenSCADObject) -> bool:
+    """
+    Check whether a node can be rewritten, i.e. it has no modifier and
+    is neither a hole nor the root of a separate part.
+    """
+    return not node.modifier and not node.is_hole and not node.is_part_root
+
+
+def holes(node: OpenSCADObject) -> bool:
+    """
+    Check whether a subtree contains holes.
+    """
+    return node.is_hole or any(holes(child) for child in node.children)
+
+
+def describe(node: OpenSCADObject, box: Optional[tuple] = None) -> str:
+    """
+    Describe a subtree by the path of its first children and its bounds.
+    """
+    path = [node.name]
+    while node.children and len(path) < 4:
+        node = node.children[0]
+        path.append(node.name)
+    if box is None or box == UNBOUNDED:
+        return " > ".join(path)
+    lo, hi = ([round(v, 2) for v in corner] for corner in box)
+    return f"{' > '.join(path)} {lo}..{hi}"
+
+
+def cull(root: OpenSCADObject) -> tuple:
+    """
+    Use bounding boxes to drop cutters that cannot intersect the body of
+    a difference and to only subtract cutters from those bodies of a
+    union they may intersect, leaving the other bodies untouched.
+    Returns the rewritten tree and a report of the culled operations.
+    """
+    memo = {}
+    boxes = {}
+    report = []
+
+    def members(node: OpenSCADObject) -> list:
+        if node.name == "union" and plain(node):
+            return list(node.children)
+        return [node]
+
+    def subtract(body: OpenSCADObject, cutters: list) -> OpenSCADObject:
+        if not cutters:
+            return body
+        return OpenSCADObject("difference", {}).add([body, *cutters])
+
+    def visit(node: OpenSCADObject) -> OpenSCADObject:
+        if id(node) in memo:
+            return memo[id(node)]
+
+        children = [visit(child) for child in node.children]
+        if not (node.name == "difference" and plain(node) and len(children) > 1):
+            memo[id(node)] = clone(node, children)
+            return memo[id(node)]
+
+        # Drop the cutters that do not intersect the body.
+        body = children[0]
+        target = bounds(body, boxes)
+        cutters = []
+        for cutter in (member for child in children[1:] for member in members(child)):
+            if holes(cutter) or overlaps(bounds(cutter, boxes), target):
+                cutters.append(cutter)
+            else:
+                report.append(f"dropped {describe(cutter, bounds(cutter, boxes))}")
+
+        # Push transforms of a union body into its members.
+        parts = [body]
+        if body.name in TRANSFORMS and plain(body) and len(body.children) == 1:
+            inner = body.children[0]
+            if inner.name == "union" and plain(inner) and len(inner.children) > 1:
+                parts = [clone(body, [member]) for member in inner.children]
+        elif body.name == "union" and plain(body) and len(body.children) > 1:
+            parts = list(body.children)
+
+        # Only subtract the cutters from the members of the union they intersect.
+        if len(parts) > 1:
+            assigned = [
+                [c for c in cutters if holes(c) or overlaps(bounds(c, boxes), bounds(part, boxes))]
+                for part in parts
+            ]
+            untouched = sum(1 for a in assigned if not a)
+            if untouched:
+                report.append(f"split union of {len(parts)} bodies, {untouched} untouched by cutters")
+                body = OpenSCADObject("union", {}).add(
+                    [subtract(part, a) for part, a in zip(parts, assigned)]
+                )
+                memo[id(node)] = body
+                return body
+
+        memo[id(node)] = subtract(body, cutters)
+        return memo[id(node)]
+
+    return visit(root), report
+
+
+def disjoint(root: OpenSCADObject) -> list:
+    """
+    Count the bodies of the unions whose bodies are pairwise disjoint,
+    as a hint for restructuring a part. They are not culled: OpenSCAD
+    unions the children of `group()` and the top-level objects as well,
+    so there is no construct that emits them without a boolean, short of
+    the experimental lazy unions.
+    """
+    boxes = {}
+    seen = set()
+    counts = []
+
+    def visit(node: OpenSCADObject):
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        if node.name == "union" and len(node.children) > 1:
+            kids = [bounds(child, boxes) for child in node.children]
+            if all(not overlaps(a, b) for i, a in enumerate(kids) for b in kids[i + 1 :]):
+                counts.append(len(kids))
+        for child in node.children:
+            visit(child)
+
+    visit(root)
+    return counts
+
+
+# Primitives with round surfaces whose number of segments is derived from their radius.
+ROUND = ("cylinder", "sphere", "circle")
+
+
+def tessellate(root: OpenSCADObject, policy) -> OpenSCADObject:
+    """
+    Set the number of segments of all round primitives that do not
+    specify it explicitly, using a policy mapping a radius to the
+    number of segments of a full circle.
+    """
+    memo = {}
+
+    def visit(node: OpenSCADObject) -> OpenSCADObject:
+        if id(node) in memo:
+            return memo[id(node)]
+
+        other = clone(node, [visit(child) for child in node.children])
+        if node.name in ROUND and node.params.get("segments") is None:
+            r = max(radius(node.params, key, radius(node.params, "r")) for key in ("r1", "r2"))
+            other.params["segments"] = policy(r)
+
+        memo[id(node)] = other
+        return other
+
+    return visit(root)
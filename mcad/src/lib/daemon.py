@@ -0,0 +1,227 @@
+"""
+A persistent generator process that keeps SolidPython and `lib` loaded
+and transpiles parts on request, which avoids the interpreter startup
+and the imports of every `build/scad/%.scad` target.
+
+The daemon listens on a Unix socket, `build/daemon.sock` unless set via
+the `DAEMON_SOCKET` environment variable, and serves one JSON request
+per connection. Before each request, it drops the modules whose source
+files changed: a change to `lib` reloads all local modules, while a
+change to a part only reloads the part and the parts importing it.
+
+The client only uses the standard library to start quickly and falls
+back to generating the part in-process if no daemon is running.
+
+Usage: PYTHONPATH=src python3 -m lib.daemon serve
+       PYTHONPATH=src python3 -m lib.daemon generate netstack_v1_assembly
+"""
+import contextlib
+import io
+import json
+import os
+import runpy
+import socket
+import sys
+from argparse import ArgumentParser
+from importlib import import_module, invalidate_caches
+from pathlib import Path
+from time import perf_counter
+from .deps import SRC_DIR
+
+# Maximum size of a request in bytes.
+MAX_REQUEST = 1 << 20
+
+
+def address() -> str:
+    """
+    Retrieve the path of the socket, which can be configured via the
+    `DAEMON_SOCKET` environment variable.
+    """
+    return os.getenv("DAEMON_SOCKET", "build/daemon.sock")
+
+
+def local() -> dict:
+    """
+    Map the names of all loaded modules from the source directory to
+    their source files.
+    """
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if name != "__main__" and path and Path(path).resolve().is_relative_to(SRC_DIR):
+            modules[name] = Path(path).resolve()
+    return modules
+
+
+class Generator:
+    """
+    Transpiles parts within the daemon and tracks the modules it loaded.
+    """
+
+    def __init__(self):
+        self.stamps = {}
+
+    def stamp(self):
+        """
+        Record the modification times of newly loaded modules.
+        """
+        for name, path in local().items():
+            if name not in self.stamps and path.is_file():
+                self.stamps[name] = path.stat().st_mtime_ns
+
+    def refresh(self) -> list:
+        """
+        Drop the modules whose source files changed or that depend on
+        them, so that they are imported again. Returns their names.
+        """
+        modules = local()
+        changed = {
+            name
+            for name, path in modules.items()
+            if not path.is_file() or path.stat().st_mtime_ns != self.stamps.get(name)
+        }
+        if not changed:
+            return []
+
+        deps = import_module("lib.deps")
+        if any(deps.is_library(name) for name in changed):
+            dropped = set(modules)
+        else:
+            # Parts depend on the files of the parts they import as a whole.
+            deps.module_files.cache_clear()
+            deps.bindings.cache_clear()
+            files = {modules[name] for name in changed}
+            dropped = changed | {
+                name
+                for name in modules
+                if not deps.is_library(name) and deps.source(name) and deps.module_files(name) & files
+            }
+
+        for name in dropped:
+            sys.modules.pop(name, None)
+            self.stamps.pop(name, None)
+        invalidate_caches()
+        return sorted(dropped)
+
+    def generate(self, part: str, env: dict, cwd: str) -> dict:
+        """
+        Transpile a part within the environment and the working directory
+        of the client, capturing its output.
+        """
+        start = perf_counter()
+        reloaded = self.refresh()
+
+        saved = (dict(os.environ), os.getcwd())
+        output = io.StringIO()
+        code = 0
+        try:
+            os.environ.clear()
+            os.environ.update(env)
+            os.chdir(cwd)
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                import_module("lib.build").generate(part)
+        except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+            print(f"{type(error).__name__}: {error}", file=output)
+            code = 1
+        finally:
+            os.environ.clear()
+            os.environ.update(saved[0])
+            os.chdir(saved[1])
+            self.stamp()
+
+        return {"code": code, "output": output.getvalue(), "elapsed": perf_counter() - start, "reloaded": reloaded}
+
+
+def serve() -> int:
+    """
+    Serve generation requests until a stop request is received.
+    """
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+    # Load SolidPython and all parts up front.
+    generator = Generator()
+    import_module("lib.build").discover()
+    generator.stamp()
+
+    path = Path(address())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    print(f"Serving on {path}")
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile("rwb") as stream:
+                request = json.loads(stream.readline(MAX_REQUEST) or b"{}")
+                if request.get("command") == "stop":
+                    stream.write(b'{"code": 0}\n')
+                    break
+                response = generator.generate(request["part"], request["env"], request["cwd"])
+                stream.write(json.dumps(response).encode() + b"\n")
+                status = "ok" if response["code"] == 0 else "failed"
+                reloaded = f", reloaded {', '.join(response['reloaded'])}" if response["reloaded"] else ""
+                print(f"{request['part']}: {status} ({response['elapsed']:.3f}s{reloaded})")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        path.unlink(missing_ok=True)
+    return 0
+
+
+def request(payload: dict) -> dict:
+    """
+    Send a request to the daemon and return its response. Raises an
+    `OSError` if no daemon is running.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(address())
+        with conn.makefile("rwb") as stream:
+            stream.write(json.dumps(payload).encode() + b"\n")
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def generate(part: str) -> int:
+    """
+    Transpile a part via the daemon, or in-process if none is running.
+    """
+    try:
+        response = request({"part": part, "env": dict(os.environ), "cwd": os.getcwd()})
+    except (OSError, ValueError):
+        sys.argv = [str(SRC_DIR / f"{part}.py")]
+        sys.path.insert(0, str(SRC_DIR))
+        runpy.run_path(sys.argv[0], run_name="__main__")
+        return 0
+
+    print(response["output"], end="")
+    return response["code"]
+
+
+def main() -> int:
+    """
+    Run the daemon or send a request to it.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.daemon", description=__doc__)
+    parser.add_argument("command", choices=["serve", "generate", "stop"], help="command to run")
+    parser.add_argument("parts", nargs="*", help="names of the parts to generate")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        return serve()
+    if args.command == "stop":
+        try:
+            request({"command": "stop"})
+        except OSError:
+            print("No daemon running")
+        return 0
+
+    return max((generate(part) for part in args.parts), default=0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Dependency tracking derived from the import graph of the parts.
+
+Parts depend on the files of other parts they import as a whole, as
+importing a part executes all of its code. Symbols imported from `lib`
+are tracked individually via stamp files, which are only rewritten if
+the fingerprint of the symbol, including all symbols it references,
+changes. Thus, touching `lib.features.corner` only rebuilds the parts
+that use it.
+
+Usage: PYTHONPATH=src python3 -m lib.deps --stamp lib.features.corner
+"""
+import ast
+import sys
+from copy import deepcopy
+from argparse import ArgumentParser
+from functools import lru_cache
+from hashlib import sha256
+from os import path as osp, replace
+from pathlib import Path
+from typing import Optional
+
+# Directory containing the part scripts.
+SRC_DIR = Path(__file__).resolve().parents[1]
+
+# Directory containing the depfiles and stamps.
+DEP_DIR = Path("build/dep")
+
+
+def source(module: str) -> Optional[Path]:
+    """
+    Retrieve the source file of a local module or `None` if the
+    module is not part of the source directory.
+    """
+    base = SRC_DIR.joinpath(*module.split("."))
+    for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def relative(path: Path) -> str:
+    """
+    Express a path relative to the working directory as used by Make.
+    """
+    return osp.relpath(path)
+
+
+@lru_cache(maxsize=None)
+def bindings(module: str) -> dict:
+    """
+    Map the top-level names of a local module to either the defining
+    AST node or the module and attribute they were imported from.
+    """
+    tree = ast.parse(source(module).read_text())
+    package = module if source(module).name == "__init__.py" else module.rpartition(".")[0]
+
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                names[alias.asname or alias.name.split(".")[0]] = (alias.name if alias.asname else alias.name.split(".")[0], None)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parent = package.split(".")[: len(package.split(".")) - node.level + 1]
+                base = ".".join([*parent, *([base] if base else [])])
+            for alias in node.names:
+                names[alias.asname or alias.name] = (base, alias.name)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names[node.name] = node
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for name in ast.walk(target):
+                    if isinstance(name, ast.Name):
+                        names[name.id] = node
+
+    return names
+
+
+def is_library(module: str) -> bool:
+    """
+    Check whether a module is part of the `lib` package, whose symbols
+    are tracked individually.
+    """
+    return module == "lib" or module.startswith("lib.")
+
+
+@lru_cache(maxsize=None)
+def module_files(module: str) -> frozenset:
+    """
+    Retrieve the files a module depends on as a whole, i.e. its own
+    file and the files of all local modules it imports.
+    """
+    files = set()
+    pending = [module]
+    visited = set()
+    while pending:
+        current = pending.pop()
+        if current in visited:
+            continue
+        visited.add(current)
+        files.add(source(current))
+        for binding in bindings(current).values():
+            if isinstance(binding, tuple):
+                pending += [t for t in imported(*binding) if source(t) is not None]
+    return frozenset(files)
+
+
+def imported(module: str, attr: Optional[str]) -> list:
+    """
+    Resolve an import to the local modules it may refer to.
+    """
+    if attr is not None and source(f"{module}.{attr}") is not None:
+        return [f"{module}.{attr}"]
+    return [module]
+
+
+def code(node: ast.AST) -> str:
+    """
+    Dump the code of a definition without its docstrings, so that only
+    changes to the code alter its fingerprint.
+    """
+    node = deepcopy(node)
+    for child in ast.walk(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and ast.get_docstring(child, clean=False) is not None:
+            child.body = child.body[1:]
+    return ast.dump(node)
+
+
+def fingerprint(module: str, symbol: str, seen: Optional[set] = None) -> tuple:
+    """
+    Compute the fingerprint of a symbol in a local module as well as the
+    files it was derived from. The fingerprint covers the definition of
+    the symbol and, recursively, all symbols it references.
+    """
+    seen = set() if seen is None else seen
+    if (module, symbol) in seen:
+        return "", frozenset()
+    seen.add((module, symbol))
+
+    binding = bindings(module).get(symbol)
+    hasher = sha256(f"{module}.{symbol}".encode())
+    files = {source(module)}
+
+    if binding is None:
+        # Fall back to the entire module for names that cannot be resolved.
+        files |= module_files(module)
+        for path in sorted(files):
+            hasher.update(path.read_bytes())
+    elif isinstance(binding, tuple):
+        target, attr = binding
+        if source(target) is None:
+            pass
+        elif attr is None or source(f"{target}.{attr}") is not None:
+            target = target if attr is None else f"{target}.{attr}"
+            files |= module_files(target)
+            for path in sorted(module_files(target)):
+                hasher.update(path.read_bytes())
+        elif is_library(target):
+            digest, paths = fingerprint(target, attr, seen)
+            hasher.update(digest.encode())
+            files |= paths
+        else:
+            files |= module_files(target)
+            for path in sorted(module_files(target)):
+                hasher.update(path.read_bytes())
+    else:
+        hasher.update(code(binding).encode())
+        names = {node.id for node in ast.walk(binding) if isinstance(node, ast.Name)}
+        for name in sorted(names & bindings(module).keys() - {symbol}):
+            digest, paths = fingerprint(module, name, seen)
+            hasher.update(digest.encode())
+            files |= paths
+
+    return hasher.hexdigest(), frozenset(files)
+
+
+def dependencies(module: str) -> tuple:
+    """
+    Retrieve the files and the library symbols a part depends on.
+    """
+    files = {source(module)}
+    symbols = set()
+    for binding in bindings(module).values():
+        if not isinstance(binding, tuple):
+            continue
+        target, attr = binding
+        if source(target) is None:
+            continue
+        if attr is not None and is_library(target) and source(f"{target}.{attr}") is None:
+            symbols.add(f"{target}.{attr}")
+            continue
+        for name in imported(target, attr):
+            if is_library(name):
+                files |= module_files(name)
+            else:
+                more_files, more_symbols = dependencies(name)
+                files |= more_files
+                symbols |= more_symbols
+
+    return files, symbols
+
+
+def stamp(symbol: str) -> Path:
+    """
+    Update the stamp file of a library symbol, but only rewrite it if the
+    fingerprint changed, so that Make only rebuilds the dependent parts
+    if the symbol actually changed.
+    """
+    module, _, name = symbol.rpartition(".")
+    digest, _ = fingerprint(module, name)
+
+    path = DEP_DIR / f"{symbol}.stamp"
+    if not path.is_file() or path.read_text() != digest:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.partial")
+        partial.write_text(digest)
+        replace(partial, path)
+
+    return path
+
+
+def write(script: str, target: str):
+    """
+    Write a Make-compatible depfile for the given part script, which
+    declares the dependencies of the target and the stamp files.
+    """
+    module = Path(script).stem
+    files, symbols = dependencies(module)
+
+    stamps = {symbol: stamp(symbol) for symbol in sorted(symbols)}
+    prerequisites = sorted(relative(path) for path in files)
+    prerequisites += [str(path) for path in stamps.values()]
+
+    lines = [f"{target}: {' '.join(prerequisites)}"]
+    for symbol, path in stamps.items():
+        owner, _, name = symbol.rpartition(".")
+        _, paths = fingerprint(owner, name)
+        files |= paths
+        lines.append(f"{path}: {' '.join(sorted(relative(path) for path in paths))}")
+    # Add empty rules for all files to handle their deletion gracefully.
+    for path in sorted({relative(path) for path in files}):
+        lines.append(f"{path}:")
+
+    depfile = DEP_DIR / f"{module}.d"
+    depfile.parent.mkdir(parents=True, exist_ok=True)
+    depfile.write_text("\n".join(lines) + "\n")
+
+
+def main() -> int:
+    """
+    Update the stamp files of the given library symbols.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.deps", description=__doc__)
+    parser.add_argument("--stamp", action="append", default=[], help="library symbol to update the stamp of")
+    args = parser.parse_args()
+
+    for symbol in args.stamp:
+        stamp(symbol)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,23 @@
 """
 Shared features that can be reused across several parts.
+
+Profiles are represented as NumPy arrays of shape `(n, 2)`, which can be
+passed to `polygon()` directly.
 """
-from os import getenv
-from math import ceil, sin, cos, pi
+from functools import lru_cache
+from math import ceil, pi
+import numpy as np
 from euclid3 import Point2
 from solid import OpenSCADObject
 from solid.objects import polygon, cube, cylinder
-from solid.utils import linear_extrude, rotate, translate, up, forward, right
-from .utils import combine
+from solid.utils import linear_extrude, rotate, translate, up
+from .patterns import Array, Mirrored
+from .utils import circle_segments, combine, feature
 from .units import rxxu, inches
 
+# Number of decimals of the points, which matches the SCAD output of SolidPython.
+PRECISION = 10
+
 
 def deg2rad(deg: float):
     """
@@ -18,59 +26,102 @@ def deg2rad(deg: float):
     return pi * (deg / 180)
 
 
+@lru_cache(maxsize=1024)
+def arc_points(center: tuple, radius: float, start: float, stop: float, segments: int) -> np.ndarray:
+    """
+    Compute the points of an arc as a read-only array of shape `(n, 2)`.
+    The arrays are cached, as profiles often reuse the same arcs.
+    """
+    start = deg2rad(start)
+    stop = deg2rad(stop)
+    span = stop - start
+
+    steps = max(1, ceil(segments * abs(span) / (2 * pi)))
+    angles = np.linspace(start, stop, steps + 1)
+
+    points = np.empty((steps + 1, 2))
+    points[:, 0] = center[0] + np.cos(angles) * radius
+    points[:, 1] = center[1] + np.sin(angles) * radius
+    points.round(PRECISION, out=points)
+    points.flags.writeable = False
+    return points
+
+
 def arc2d(
     center=Point2(),
     radius=1,
     start=0,
     stop=90,
-    segments=512,
-):
+    segments=None,
+) -> np.ndarray:
     """
     Draws an arc of specified `radius` aroung the given `center` point
     from `start` to `end`, where both are angles given in degrees. The
     resolution of the arc can be adjusted via the segments parameter,
-    which sets the number of points on a 360 degree full circle.
+    which sets the number of points on a 360 degree full circle and
+    defaults to the tessellation policy in `lib.utils.circle_segments`.
     """
-    resolution = getenv("RESOLUTION")
-    if resolution is not None:
-        segments = int(resolution)
+    if segments is None:
+        segments = circle_segments(radius)
 
-    start = deg2rad(start)
-    stop = deg2rad(stop)
-    span = stop - start
+    x, y = center
+    return arc_points((float(x), float(y)), float(radius), float(start), float(stop), int(segments))
 
-    steps = ceil(segments * abs(span) / (2 * pi))
-    step = span / steps
 
-    return [
-        Point2(
-            center.x + cos(start + step * i) * radius,
-            center.y + sin(start + step * i) * radius,
-        )
-        for i in range(steps + 1)
-    ]
+def profile(*parts) -> np.ndarray:
+    """
+    Concatenate points and arrays of points into a single profile.
+    """
+    return np.vstack([np.reshape(np.asarray(part, dtype=float), (-1, 2)) for part in parts])
 
 
+def linear_pattern(obj: OpenSCADObject, count: int, step, origin=(0, 0, 0)) -> OpenSCADObject:
+    """
+    Repeat an object `count` times, each copy moved by `step` from the
+    previous one, which is emitted as a single OpenSCAD loop.
+    """
+    return Array((count,), (step,), origin)(obj)
+
+
+def grid_pattern(obj: OpenSCADObject, counts, steps, origin=(0, 0, 0)) -> OpenSCADObject:
+    """
+    Repeat an object on a grid with `counts[k]` copies along `steps[k]`,
+    which is emitted as a single OpenSCAD loop.
+    """
+    return Array(counts, steps, origin)(obj)
+
+
+def mirror_pattern(obj: OpenSCADObject, normal) -> OpenSCADObject:
+    """
+    Combine an object with its mirror image along the plane through the
+    origin with the given normal, which is emitted as a single loop.
+    """
+    return Mirrored(normal)(obj)
+
+
+@feature
 def handle(length=50, width=5) -> OpenSCADObject:
     """
     Create a handle of the specified length and width.
     """
     return combine(
         polygon(
-            [
-                Point2(0, 0),
-                Point2(width, 0),
-                *arc2d(Point2(width * 2, -width * 2), width, 180, 270),
-                *arc2d(Point2(length - width * 2, -width * 2), width, 270, 360),
-                Point2(length - width, 0),
-                Point2(length, 0),
-                *arc2d(Point2(length - width * 2, -width * 2), width * 2, 360, 270),
-                *arc2d(Point2(width * 2, -width * 2), width * 2, 270, 180),
-            ],
+            profile(
+                (0, 0),
+                (width, 0),
+                arc2d(Point2(width * 2, -width * 2), width, 180, 270),
+                arc2d(Point2(length - width * 2, -width * 2), width, 270, 360),
+                (length - width, 0),
+                (length, 0),
+                arc2d(Point2(length - width * 2, -width * 2), width * 2, 360, 270),
+                arc2d(Point2(width * 2, -width * 2), width * 2, 270, 180),
+            ),
         ),
         linear_extrude(width),
     )
 
+
+@feature
 def corner(height: int = 1):
     """
     Create a corner that allows to connect two parts via M3 screws.
@@ -96,39 +147,23 @@ def corner(height: int = 1):
         cylinder(r=msr, h=c_y + 2 * msd),
         rotate(-90, [1, 0, 0]),
     )
-    for i in range(2):
-        solid += combine(
-            screw,
-            translate([mbo / 2, mso, inches(0.25) + i * inches(1.25)]),
-        )
-    for i in range(2):
-        solid += combine(
-            screw,
-            translate([-mbo / 2, mso, inches(0.25) + i * inches(1.25)]),
-        )
+    solid += grid_pattern(
+        screw,
+        (2, 2),
+        ([mbo, 0, 0], [0, 0, inches(1.25)]),
+        [-mbo / 2, mso, inches(0.25)],
+    )
 
     return solid
 
 
+@feature
 def corners(dim_x: float, dim_y: float, height: int = 1):
     """
     Create four corners along the specified rectangle that allow to connect parts via M3 screws.
     """
-    corn = corner(height)
-
-    solid = corn
-    solid += combine(
-        corn,
-        forward(dim_y),
+    return grid_pattern(
+        corner(height),
+        (2, 2),
+        ([dim_x, 0, 0], [0, dim_y, 0]),
     )
-    solid += combine(
-        corn,
-        forward(dim_y),
-        right(dim_x),
-    )
-    solid += combine(
-        corn,
-        right(dim_x),
-    )
-
-    return solid
@@ -0,0 +1,197 @@
+"""
+A resource governor for the OpenSCAD renders, which enforces limits on
+the wall-clock time and the memory of each render and records telemetry.
+
+The limits are configured via the `RENDER_TIMEOUT` environment variable
+in seconds and `RENDER_MEMORY` in megabytes, unless a part pins them via
+`@part(timeout=..., memory=...)`. The memory limit caps the address space
+of OpenSCAD, so that a runaway render fails instead of exhausting the RAM
+of the machine. Failed renders are retried `RENDER_RETRIES` times, each
+time with half the resolution of round primitives.
+
+Each render appends its resource usage and the cache statistics reported
+by OpenSCAD to `build/telemetry/<build>.jsonl`, where the build is named
+by the `BUILD_ID` environment variable.
+"""
+import json
+import os
+import re
+import resource
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from os import getenv
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryFile
+from time import perf_counter, sleep
+from typing import Optional
+
+# Directory the telemetry files are written to.
+TELEMETRY_DIR = Path("build/telemetry")
+
+# Exit code of renders that exceeded their time limit, as used by `timeout`.
+TIMEOUT_CODE = 124
+
+# Exit code of renders that exceeded their memory limit, as used for OOM kills.
+MEMORY_CODE = 137
+
+# Matches the errors of renders that ran out of their address space.
+OUT_OF_MEMORY = re.compile(r"std::bad_alloc|out of memory|Cannot allocate memory", re.IGNORECASE)
+
+# Interval in seconds to check whether a render finished or timed out.
+POLL_INTERVAL = 0.05
+
+# Minimum number of segments of round primitives when lowering the resolution.
+MIN_SEGMENTS = 5
+
+# Maximum minimum angle of segments in degrees, as enforced by OpenSCAD.
+MAX_ANGLE = 60
+
+# Matches the cache statistics and the rendering time reported by OpenSCAD.
+STATISTICS = re.compile(
+    r"^(CGAL Polyhedrons in cache|CGAL cache size in bytes|Geometry cache size in bytes|Total rendering time): (\S+)",
+    re.MULTILINE,
+)
+
+# Matches the resolution settings of the SCAD programs.
+SEGMENTS = re.compile(r"\$(fn|fa|fs) = ([0-9.]+)")
+
+# Name of the build, unless configured via the `BUILD_ID` environment variable.
+STARTED = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def number(name: str, pinned: Optional[str] = None) -> Optional[float]:
+    """
+    Parse a limit pinned by the part or configured via the environment,
+    where an empty value or zero disables the limit.
+    """
+    value = pinned if pinned is not None else getenv(name, "")
+    return float(value) or None if value else None
+
+
+def limits(pins: dict) -> tuple:
+    """
+    Retrieve the time limit in seconds and the memory limit in megabytes
+    of a render, given the pins of the part.
+    """
+    return number("RENDER_TIMEOUT", pins.get("timeout")), number("RENDER_MEMORY", pins.get("memory"))
+
+
+def retries() -> int:
+    """
+    Retrieve the number of retries at lower resolutions, which can be
+    configured via the `RENDER_RETRIES` environment variable.
+    """
+    return int(getenv("RENDER_RETRIES") or 0)
+
+
+def execute(args: list, timeout: Optional[float] = None, memory: Optional[float] = None) -> tuple:
+    """
+    Run a command within the given limits and return its exit code, the
+    elapsed wall time in seconds, the captured output and the resource
+    usage, which is `None` if the command could not be started.
+    """
+    def limit():
+        size = int(memory * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+    start = perf_counter()
+    # Capture the output in a file, as a pipe could fill up while polling.
+    with TemporaryFile(mode="w+") as log:
+        try:
+            proc = subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT, preexec_fn=limit if memory else None)
+        except FileNotFoundError:
+            return 127, perf_counter() - start, f"{args[0]}: command not found", None
+
+        # Reap the process via `wait4` to retrieve its resource usage.
+        killed = False
+        while True:
+            pid, status, usage = os.wait4(proc.pid, 0 if killed else os.WNOHANG)
+            if pid:
+                break
+            if timeout is not None and perf_counter() - start > timeout:
+                proc.kill()
+                killed = True
+            else:
+                sleep(POLL_INTERVAL)
+        proc.returncode = TIMEOUT_CODE if killed else os.waitstatus_to_exitcode(status)
+
+        log.seek(0)
+        output = log.read()
+
+    if killed:
+        output += f"{args[0]}: killed after exceeding the time limit of {timeout:g}s\n"
+    elif proc.returncode != 0 and memory and OUT_OF_MEMORY.search(output):
+        proc.returncode = MEMORY_CODE
+        output += f"{args[0]}: failed after exceeding the memory limit of {memory:g}MB\n"
+    elif proc.returncode != 0 and memory:
+        output += f"{args[0]}: failed with a memory limit of {memory:g}MB\n"
+    return proc.returncode, perf_counter() - start, output, usage
+
+
+def limited(code: int) -> bool:
+    """
+    Check whether a render was stopped by its time or memory limit rather
+    than failing on its own.
+    """
+    return code in (TIMEOUT_CODE, MEMORY_CODE)
+
+
+def statistics(output: str) -> dict:
+    """
+    Extract the cache statistics and the rendering time from the output
+    of OpenSCAD.
+    """
+    stats = {}
+    for label, value in STATISTICS.findall(output):
+        key = label.lower().replace(" ", "_")
+        if ":" in value:
+            hours, minutes, seconds = value.split(":")
+            stats[key] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        else:
+            stats[key] = int(value)
+    return stats
+
+
+@contextmanager
+def degrade(scad: str, factor: int):
+    """
+    Create a copy of a SCAD file next to it whose round primitives use
+    fewer segments by the given factor, and yield its path.
+    """
+    def lower(match: re.Match) -> str:
+        name, value = match.group(1), float(match.group(2))
+        if name == "fn":
+            return f"$fn = {max(int(value) // factor, MIN_SEGMENTS) if value else 0}"
+        if name == "fa":
+            return f"$fa = {min(value * factor, MAX_ANGLE):.4f}"
+        return f"$fs = {value * factor:g}"
+
+    text = SEGMENTS.sub(lower, Path(scad).read_text())
+    with NamedTemporaryFile("w", dir=Path(scad).parent, prefix=".", suffix=".scad", delete=False) as file:
+        file.write(text)
+    try:
+        yield file.name
+    finally:
+        os.unlink(file.name)
+
+
+def telemetry(entry: dict) -> Path:
+    """
+    Append an entry to the telemetry file of the build.
+    """
+    path = TELEMETRY_DIR / f"{getenv('BUILD_ID') or STARTED}.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {"time": datetime.now(timezone.utc).isoformat(timespec="seconds"), **entry}
+    with open(path, "a") as file:
+        file.write(json.dumps(entry) + "\n")
+    return path
+
+
+def resources(stats: Optional[resource.struct_rusage]) -> dict:
+    """
+    Summarize the CPU time in seconds and the peak memory in kilobytes.
+    """
+    if stats is None:
+        return {}
+    return {"cpu_user": stats.ru_utime, "cpu_system": stats.ru_stime, "peak_rss": stats.ru_maxrss}
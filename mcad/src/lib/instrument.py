@@ -0,0 +1,245 @@
+"""
+Opt-in instrumentation of the CSG trees built by the parts, which is
+enabled via the `INSTRUMENT` environment variable.
+
+Every node records the source line of the part that created it, i.e.
+the innermost frame outside of SolidPython and `lib`, so nodes created by
+features are attributed to the line using the feature. When building a
+part, the nodes of the tree are attributed to their lines, counting the
+primitives, transforms and booleans, their maximum depth, the estimated
+number of facets and the emitted SCAD bytes. Nodes reused by the tree or
+instantiated by patterns are counted for each occurrence, as OpenSCAD
+evaluates each of them.
+
+The statistics are written to `build/instrument/<part>.json`, from which
+the hot spots across all parts are reported.
+
+Usage: INSTRUMENT=1 PYTHONPATH=src python3 -m lib.build --all --scad-only
+       PYTHONPATH=src python3 -m lib.instrument --top 20 --sort facets
+"""
+import json
+import sys
+from argparse import ArgumentParser
+from collections import defaultdict
+from contextlib import contextmanager
+from os import getenv, path as osp
+from pathlib import Path
+from typing import Optional
+import solid
+from solid import OpenSCADObject
+from .csg import TRANSFORMS
+from .deps import SRC_DIR
+from .patterns import Pattern
+from .scad import statement
+
+# Directory the statistics are written to.
+INSTRUMENT_DIR = Path("build/instrument")
+
+# Directories whose frames are skipped when attributing a node.
+SKIPPED = (str(Path(solid.__file__).parent), str(Path(__file__).parent))
+
+# Nodes by kind. Transforms include extrusions, which do not combine bodies,
+# while patterns combine their copies like booleans.
+PRIMITIVES = ("cube", "sphere", "cylinder", "polyhedron", "square", "circle", "polygon", "text", "import", "surface")
+OPERATIONS = ("linear_extrude", "rotate_extrude", "offset", "resize", "projection")
+BOOLEANS = ("union", "difference", "intersection", "hull", "minkowski", "array", "mirrored")
+
+# Statistics recorded per source line.
+COLUMNS = ("nodes", "primitives", "transforms", "booleans", "depth", "facets", "bytes")
+
+
+def enabled() -> bool:
+    """
+    Check whether the instrumentation is enabled via the `INSTRUMENT`
+    environment variable.
+    """
+    return getenv("INSTRUMENT", "0") not in ("0", "false", "no")
+
+
+def site() -> str:
+    """
+    Determine the source line that creates a node.
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(SKIPPED) and not filename.startswith("<"):
+            return f"{osp.relpath(filename, SRC_DIR)}:{frame.f_lineno}"
+        if fallback is None and not filename.startswith(SKIPPED[0]):
+            fallback = f"{osp.relpath(filename, SRC_DIR)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return fallback or "<unknown>"
+
+
+@contextmanager
+def instrumented():
+    """
+    Record the creating source line of every node created within the
+    context as trait, which is retained when the tree is rewritten. The
+    constructor of SolidPython is only patched if the instrumentation is
+    enabled and restored afterwards, so that nested contexts are no-ops.
+    """
+    init = OpenSCADObject.__init__
+    if not enabled() or getattr(init, "instrumented", False):
+        yield
+        return
+
+    def patched(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.traits["site"] = {"line": site()}
+
+    patched.instrumented = True
+    OpenSCADObject.__init__ = patched
+    try:
+        yield
+    finally:
+        OpenSCADObject.__init__ = init
+
+
+def facets(node: OpenSCADObject, segments: Optional[int]) -> int:
+    """
+    Estimate the number of facets of a primitive, where round primitives
+    use their own or the given number of segments.
+    """
+    n = max(node.params.get("segments") or segments or 0, 3)
+    if node.name == "cube":
+        return 12
+    if node.name == "cylinder":
+        return 4 * n - 4
+    if node.name == "sphere":
+        return 2 * n * ((n + 1) // 2)
+    if node.name == "circle":
+        return n - 2
+    if node.name == "square":
+        return 2
+    if node.name == "polyhedron":
+        return len(node.params.get("faces") or [])
+    if node.name == "polygon":
+        return max(len(node.params.get("points") or []) - 2, 0)
+    return 0
+
+
+def kind(node: OpenSCADObject) -> str:
+    """
+    Classify a node as primitive, transform or boolean.
+    """
+    if node.name in BOOLEANS:
+        return "booleans"
+    if node.name in TRANSFORMS or node.name in OPERATIONS:
+        return "transforms"
+    if node.name in PRIMITIVES:
+        return "primitives"
+    return "nodes"
+
+
+def analyze(root: OpenSCADObject, segments: Optional[int]) -> dict:
+    """
+    Attribute the expanded tree to the source lines that created its
+    nodes and return the statistics per line.
+    """
+    # Order the distinct nodes such that parents precede their children.
+    order = []
+    seen = set()
+
+    def visit(node: OpenSCADObject):
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        for child in node.children:
+            visit(child)
+        order.append(node)
+
+    visit(root)
+    order.reverse()
+
+    # Propagate the number of occurrences and the depth downwards. Children
+    # of patterns occur once in the SCAD file, but are evaluated per copy.
+    occurrences = defaultdict(int, {id(root): 1})
+    emitted = defaultdict(int, {id(root): 1})
+    depth = defaultdict(int, {id(root): 1})
+    for node in order:
+        copies = node.copies() if isinstance(node, Pattern) else 1
+        for child in node.children:
+            occurrences[id(child)] += occurrences[id(node)] * copies
+            emitted[id(child)] += emitted[id(node)]
+            depth[id(child)] = max(depth[id(child)], depth[id(node)] + 1)
+
+    lines = defaultdict(lambda: dict.fromkeys(COLUMNS, 0))
+    for node in order:
+        count = occurrences[id(node)]
+        stats = lines[(node.get_trait("site") or {}).get("line", "<unknown>")]
+        stats["nodes"] += count
+        if kind(node) != "nodes":
+            stats[kind(node)] += count
+        stats["depth"] = max(stats["depth"], depth[id(node)])
+        stats["facets"] += count * facets(node, segments)
+        stats["bytes"] += emitted[id(node)] * (len(statement(node)) + 2)
+
+    return dict(lines)
+
+
+def record(part: str, root: OpenSCADObject, segments: Optional[int], scad: Path) -> dict:
+    """
+    Write the statistics of a part and print its hot spots.
+    """
+    lines = analyze(root, segments)
+    report = {
+        "part": part,
+        "bytes": scad.stat().st_size,
+        "depth": max((stats["depth"] for stats in lines.values()), default=0),
+        "lines": lines,
+    }
+
+    INSTRUMENT_DIR.mkdir(parents=True, exist_ok=True)
+    (INSTRUMENT_DIR / f"{part}.json").write_text(json.dumps(report, indent=2) + "\n")
+
+    totals = {column: sum(stats[column] for stats in lines.values()) for column in COLUMNS if column != "depth"}
+    print(
+        f"{part}: {totals['primitives']} primitives, {totals['transforms']} transforms, "
+        f"{totals['booleans']} booleans, depth {report['depth']}, ~{totals['facets']} facets, {report['bytes']} bytes"
+    )
+    for line, stats in hotspots(lines, "facets", 3):
+        print(f"  {line}: ~{stats['facets']} facets from {stats['nodes']} nodes")
+    return report
+
+
+def hotspots(lines: dict, column: str, top: int) -> list:
+    """
+    Retrieve the source lines with the largest value of a statistic.
+    """
+    return sorted(lines.items(), key=lambda item: item[1][column], reverse=True)[:top]
+
+
+def main() -> int:
+    """
+    Report the hot spots across all instrumented parts.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.instrument", description=__doc__)
+    parser.add_argument("parts", nargs="*", help="names of the parts to report, defaults to all")
+    parser.add_argument("-n", "--top", type=int, default=10, help="number of source lines to report")
+    parser.add_argument("-s", "--sort", choices=COLUMNS, default="facets", help="statistic to rank the lines by")
+    args = parser.parse_args()
+
+    files = [INSTRUMENT_DIR / f"{part}.json" for part in args.parts] or sorted(INSTRUMENT_DIR.glob("*.json"))
+    missing = [str(path) for path in files if not path.is_file()]
+    if not files or missing:
+        print(f"No statistics found {', '.join(missing)}, build with INSTRUMENT=1 first", file=sys.stderr)
+        return 1
+
+    # Lines of parts imported by assemblies are reported per assembly.
+    lines = {}
+    for path in files:
+        report = json.loads(path.read_text())
+        for line, stats in report["lines"].items():
+            owner = line.partition(".py:")[0]
+            lines[line if owner == report["part"] else f"{line} ({report['part']})"] = stats
+
+    print(f"{'line':<56}" + "".join(f"{column:>12}" for column in COLUMNS))
+    for line, stats in hotspots(lines, args.sort, args.top):
+        print(f"{line:<56}" + "".join(f"{stats[column]:>12}" for column in COLUMNS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+A persistent cache of rendered meshes for reusable features, so that a
+feature is only evaluated once by OpenSCAD and then reused by every part
+and assembly that contains it.
+
+Features are marked via the `lib.utils.feature` decorator. The cache is
+enabled via the `MESH_CACHE` environment variable and is backed by the
+render cache, which keys the mesh on the canonical SCAD program of the
+feature including its resolution.
+
+Likewise, assemblies can place the meshes of the parts they contain
+instead of their CSG, which is enabled via `ASSEMBLY=mesh`. The STL of a
+part in `build/stl` is reused if it was rendered from the same tree,
+which is recorded as digest in the header of its SCAD file, otherwise
+the part is rendered on its own via the render cache.
+"""
+import re
+from hashlib import sha256
+from os import getenv
+from pathlib import Path
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+from typing import Optional
+from solid import OpenSCADObject, import_
+from . import cache, openscad, scad
+from .bbox import affine, bounds
+from .csg import clone
+
+# Directory the meshes are copied to, so that builds do not depend on
+# the entries in the cache that may be evicted at any time.
+MESH_DIR = Path("build/mesh")
+
+# Modes of building assemblies, either from the CSG or the meshes of their parts.
+ASSEMBLY_MODES = ("csg", "mesh")
+
+# Matches the digest of the tree a SCAD file was generated from.
+TREE = re.compile(r"^// tree: ([0-9a-f]+)$")
+
+
+def enabled() -> bool:
+    """
+    Check whether the mesh cache is enabled via the `MESH_CACHE`
+    environment variable. It requires the render cache.
+    """
+    return getenv("MESH_CACHE", "0") not in ("0", "false", "no") and cache.enabled()
+
+
+def assembly() -> bool:
+    """
+    Check whether assemblies place the meshes of their parts, which is
+    configured via the `ASSEMBLY` environment variable.
+    """
+    mode = getenv("ASSEMBLY", "csg")
+    if mode not in ASSEMBLY_MODES:
+        raise ValueError(f"unknown assembly mode {mode}, expected one of {', '.join(ASSEMBLY_MODES)}")
+    return mode == "mesh"
+
+
+def digest(node: OpenSCADObject, header: str) -> str:
+    """
+    Compute the digest of a tree and its resolution settings.
+    """
+    return sha256(f"{header}\n{scad.render(node)}".encode()).hexdigest()
+
+
+def rendered(name: str, tree: str) -> Optional[Path]:
+    """
+    Retrieve the STL of a part in the build directory, or `None` if it is
+    missing or was not rendered from the tree with the given digest.
+    """
+    program = Path(f"build/scad/{name}.scad")
+    stl = Path(f"build/stl/{name}.stl")
+    if not program.is_file() or not stl.is_file() or stl.stat().st_mtime_ns < program.stat().st_mtime_ns:
+        return None
+
+    # The digest is part of the header comments.
+    with open(program) as file:
+        for line in file:
+            if not line.startswith("//"):
+                return None
+            match = TREE.match(line.rstrip("\n"))
+            if match:
+                return stl if match.group(1) == tree else None
+    return None
+
+
+def mesh(node: OpenSCADObject, header: str) -> tuple:
+    """
+    Retrieve the mesh of a feature from the cache or render it. Returns
+    the path of the mesh, or `None` if it could not be rendered, and
+    whether the cache was hit.
+    """
+    with TemporaryDirectory() as tmp:
+        program = scad.write(node, Path(tmp) / "feature.scad", header)
+        stl = Path(tmp) / "feature.stl"
+
+        backend = openscad.select(str(program))
+        name = openscad.cache_key(str(program), str(stl), backend)
+        path = MESH_DIR / f"{name[:16]}.stl"
+        if path.is_file():
+            return path, True
+
+        code, _, _, cached, _ = openscad.render(str(program), str(stl), backend)
+        if code != 0:
+            return None, False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        copyfile(stl, path)
+        return path, cached
+
+
+def substitute(root: OpenSCADObject, header: str) -> tuple:
+    """
+    Replace all features in the tree by an import of their cached mesh.
+    Returns the rewritten tree and the number of cache hits and misses.
+    """
+    memo = {}
+    meshes = {}
+    stats = {"hits": 0, "misses": 0}
+
+    def visit(node: OpenSCADObject) -> OpenSCADObject:
+        if id(node) in memo:
+            return memo[id(node)]
+
+        if node.get_trait("feature") is None:
+            memo[id(node)] = clone(node, [visit(child) for child in node.children])
+            return memo[id(node)]
+
+        code = scad.render(node)
+        if code not in meshes:
+            path, hit = mesh(node, header)
+            meshes[code] = path
+            stats["hits" if hit else "misses"] += path is not None
+
+        # Keep the feature inline if it could not be rendered.
+        if meshes[code] is None:
+            memo[id(node)] = clone(node, [visit(child) for child in node.children])
+            return memo[id(node)]
+
+        # Retain the bounds of the feature for culling.
+        imported = import_(str(meshes[code].resolve()))
+        box = bounds(node)
+        if box is not None:
+            imported.add_trait("bounds", {"min": box[0], "max": box[1]})
+        memo[id(node)] = imported
+        return imported
+
+    tree = visit(root)
+    return tree, stats["hits"], stats["misses"]
+
+
+def paint(node: OpenSCADObject) -> Optional[OpenSCADObject]:
+    """
+    Find the color applied to the root of a part, i.e. the innermost color
+    node among the colors and transforms wrapping its geometry, which is
+    lost in its mesh. Returns `None` if the part is not colored as a whole.
+    """
+    found = None
+    while len(node.children) == 1 and not node.children[0].is_hole:
+        if node.name == "color":
+            found = node
+        elif affine(node) is None:
+            break
+        node = node.children[0]
+    return found
+
+
+def assemble(root: OpenSCADObject, header: str) -> tuple:
+    """
+    Replace all parts contained in the tree by an import of their mesh,
+    keeping the transforms and colors applied to them. Returns the
+    rewritten tree and the number of meshes reused from the build
+    directory and rendered on their own.
+    """
+    memo = {}
+    stats = {"reused": 0, "rendered": 0}
+
+    def visit(node: OpenSCADObject) -> OpenSCADObject:
+        if id(node) in memo:
+            return memo[id(node)]
+
+        trait = node.get_trait("part")
+        if trait is None or node is root:
+            memo[id(node)] = clone(node, [visit(child) for child in node.children])
+            return memo[id(node)]
+
+        path = rendered(trait["name"], digest(node, header))
+        if path is not None:
+            stats["reused"] += 1
+        else:
+            path, _ = mesh(node, header)
+            stats["rendered"] += path is not None
+
+        # Keep the part inline if it could not be rendered.
+        if path is None:
+            memo[id(node)] = clone(node, [visit(child) for child in node.children])
+            return memo[id(node)]
+
+        # Retain the bounds of the part for culling.
+        imported = import_(str(path.resolve()))
+        box = bounds(node)
+        if box is not None:
+            imported.add_trait("bounds", {"min": box[0], "max": box[1]})
+
+        # Transforms are baked into the mesh, while its color is reapplied.
+        color = paint(node)
+        if color is not None:
+            imported = clone(color, [imported])
+            imported.traits.pop("part", None)
+        memo[id(node)] = imported
+        return imported
+
+    tree = visit(root)
+    return tree, stats["reused"], stats["rendered"]
@@ -0,0 +1,281 @@
+"""
+Utilities for invoking the OpenSCAD command line interface.
+
+The geometry backend is selected via the `BACKEND` environment variable,
+which is either `auto`, `cgal` or `manifold`, unless a part pins it.
+The backend that produced an artifact is recorded next to it in a JSON
+file, which is cached along with the artifact. The comparison mode
+renders a part with all supported backends.
+Renders are run within the resource limits of `lib.governor`.
+
+Usage: PYTHONPATH=src python3 -m lib.openscad -o build/stl/part.stl build/scad/part.scad
+       PYTHONPATH=src python3 -m lib.openscad --compare build/scad/part.scad
+"""
+import json
+import re
+import subprocess
+import sys
+from argparse import ArgumentParser
+from functools import lru_cache
+from os import getenv
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Optional
+import numpy as np
+from . import cache, governor, triangles, utils
+
+# Additional command line arguments depending on the output format.
+FORMAT_ARGS = {
+    "stl": [],
+    "png": ["--imgsize", "2048,2048"],
+}
+
+# Geometry backends of OpenSCAD in the order of preference.
+BACKENDS = ("manifold", "cgal")
+
+# Comments in the header of a SCAD file that pin the settings of a part.
+PINNED = re.compile(r"^// (backend|timeout|memory): (\S+)$", re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
+def version() -> str:
+    """
+    Retrieve the version of the installed OpenSCAD binary.
+    """
+    try:
+        proc = subprocess.run(
+            ["openscad", "--version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        return ""
+    return proc.stdout.strip()
+
+
+@lru_cache(maxsize=None)
+def options() -> str:
+    """
+    Retrieve the help text of the installed OpenSCAD binary, which lists
+    the supported command line options.
+    """
+    try:
+        proc = subprocess.run(
+            ["openscad", "--help"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        return ""
+    return proc.stdout
+
+
+def supported() -> tuple:
+    """
+    Probe the geometry backends supported by the installed OpenSCAD
+    binary. Manifold is either a backend or an experimental feature.
+    """
+    text = options()
+    if "--backend" in text or "manifold" in text.lower():
+        return BACKENDS
+    return ("cgal",)
+
+
+def flags(backend: str) -> list:
+    """
+    Assemble the command line arguments to select a geometry backend.
+    """
+    if "--backend" in options():
+        return ["--backend", backend]
+    if backend == "manifold":
+        return ["--enable", "manifold"]
+    return []
+
+
+def pins(scad: str) -> dict:
+    """
+    Retrieve the settings pinned by the part of a SCAD file.
+    """
+    return dict(PINNED.findall(Path(scad).read_text()))
+
+
+def select(scad: str) -> str:
+    """
+    Select the geometry backend of a SCAD file. A backend pinned by the
+    part takes precedence over the `BACKEND` environment variable, and
+    unsupported backends fall back to CGAL.
+    """
+    requested = pins(scad).get("backend") or getenv("BACKEND", "auto")
+    if requested == "auto":
+        return supported()[0]
+    if requested not in BACKENDS:
+        raise ValueError(f"unknown backend {requested}, expected auto or one of {', '.join(BACKENDS)}")
+    return requested if requested in supported() else "cgal"
+
+
+def command(scad: str, output: str, backend: str = "cgal") -> list:
+    """
+    Assemble the OpenSCAD command line to render a SCAD file to the
+    given output file, whose format is derived from its file extension.
+    """
+    fmt = Path(output).suffix[1:]
+    defines = ["-D", f'quality="{utils.quality()}"']
+    return ["openscad", "-o", output, *defines, *flags(backend), *FORMAT_ARGS.get(fmt, []), scad]
+
+
+def cache_key(scad: str, output: str, backend: str = "cgal") -> str:
+    """
+    Derive the render cache key from the canonicalized SCAD program, the
+    output resolution, the command line arguments and the OpenSCAD version.
+    """
+    args = command(scad, output, backend)[3:-1]
+    return cache.key(
+        cache.canonical(Path(scad).read_text()),
+        getenv("RESOLUTION", ""),
+        Path(output).suffix,
+        *args,
+        version(),
+    )
+
+
+def record(output: str, backend: str, factor: int = 1):
+    """
+    Record which backend and OpenSCAD version produced an artifact, and
+    by which factor its resolution was lowered.
+    """
+    meta = {"backend": backend, "openscad": version()}
+    if factor > 1:
+        meta["degraded"] = factor
+    Path(f"{output}.json").write_text(json.dumps(meta, indent=2) + "\n")
+
+
+def render(scad: str, output: str, backend: Optional[str] = None) -> tuple:
+    """
+    Render a SCAD file via OpenSCAD, unless the output is found in the
+    render cache, and return a tuple of the exit code, the elapsed wall
+    time in seconds, the captured output, whether the cache was hit and
+    the backend used. Manifold renders failing with an error are retried
+    with CGAL, and failed renders at lower resolutions if configured.
+    """
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    backend = backend or select(scad)
+    entry = {"part": Path(scad).stem, "output": output, "backend": backend, "resolution": getenv("RESOLUTION")}
+
+    start = perf_counter()
+    suffix = Path(output).suffix[1:]
+    name = cache_key(scad, output, backend) if cache.enabled() else None
+    # The record is cached along with the artifact, as the backend used may
+    # differ from the requested one after falling back to CGAL.
+    if name is not None and cache.fetch(name, f"{suffix}.json", f"{output}.json") and cache.fetch(name, suffix, output):
+        backend = json.loads(Path(f"{output}.json").read_text())["backend"]
+        governor.telemetry({**entry, "backend": backend, "code": 0, "cached": True, "elapsed": perf_counter() - start})
+        return 0, perf_counter() - start, "", True, backend
+
+    timeout, memory = governor.limits(pins(scad))
+    code, _, log, usage = governor.execute(command(scad, output, backend), timeout, memory)
+    # Only errors of Manifold itself are retried with CGAL, as CGAL is slower
+    # and would exceed the same limits again.
+    if code not in (0, 127) and not governor.limited(code) and backend != "cgal":
+        backend = "cgal"
+        code, _, retry, usage = governor.execute(command(scad, output, backend), timeout, memory)
+        log += f"{backend}: retrying after failure\n{retry}"
+
+    # Lower the resolution by a factor of two on each retry.
+    factor = 1
+    while code not in (0, 127) and factor < 2 ** governor.retries():
+        factor *= 2
+        with governor.degrade(scad, factor) as lower:
+            code, _, retry, usage = governor.execute(command(lower, output, backend), timeout, memory)
+        log += f"{backend}: retrying at 1/{factor} of the resolution\n{retry}"
+
+    # Artifacts of lower resolution are not cached, as they depend on the limits.
+    if code == 0 and Path(output).is_file():
+        record(output, backend, factor)
+        if name is not None and factor == 1:
+            cache.store(name, f"{suffix}.json", f"{output}.json")
+            cache.store(name, suffix, output)
+
+    elapsed = perf_counter() - start
+    governor.telemetry(
+        {
+            **entry,
+            "backend": backend,
+            "code": code,
+            "cached": False,
+            "elapsed": elapsed,
+            "timeout": timeout,
+            "memory": memory,
+            "degraded": factor,
+            **governor.resources(usage),
+            **governor.statistics(log),
+        }
+    )
+    return code, elapsed, log, False, backend
+
+
+def compare(scad: str) -> int:
+    """
+    Render a SCAD file to STL with all supported backends, bypassing the
+    cache, and report the elapsed time, the peak memory usage and the
+    differences of the resulting meshes.
+    """
+    results = {}
+    with TemporaryDirectory() as tmp:
+        for backend in supported():
+            stl = str(Path(tmp) / f"{backend}.stl")
+            code, elapsed, log, usage = governor.execute(command(scad, stl, backend))
+            if code != 0:
+                print(log, end="")
+                print(f"{backend}: failed ({code})")
+                continue
+            results[backend] = elapsed, usage.ru_maxrss, triangles.load(stl)
+
+    print(f"{'backend':<12}{'time':>10}{'memory':>12}{'triangles':>12}{'volume':>14}")
+    for backend, (elapsed, memory, mesh) in results.items():
+        volume = triangles.volume(mesh)
+        print(f"{backend:<12}{elapsed:>9.2f}s{memory / 1024:>10.1f}MB{len(mesh):>12}{volume:>14.3f}")
+
+    # Compare the meshes against those of the first backend.
+    meshes = [(backend, mesh) for backend, (_, _, mesh) in results.items()]
+    for backend, mesh in meshes[1:]:
+        base, reference = meshes[0]
+        volume = triangles.volume(reference)
+        change = triangles.volume(mesh) - volume
+        relative = change / volume * 100 if volume else float("nan")
+        boxes = triangles.bounds(reference), triangles.bounds(mesh)
+        deviation = np.abs(np.subtract(*boxes)).max() if None not in boxes else float("nan")
+        print(f"{backend} vs {base}: volume {change:+.3f} ({relative:+.3f}%), bounds deviate by up to {deviation:.4f}")
+
+    return 0 if len(results) == len(supported()) else 1
+
+
+def main() -> int:
+    """
+    Render a single SCAD file, which is used by the Makefile rules.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.openscad", description=__doc__)
+    parser.add_argument("-o", "--output", help="path of the output file")
+    parser.add_argument("--backend", choices=BACKENDS, help="geometry backend to use")
+    parser.add_argument("--compare", action="store_true", help="compare the supported backends")
+    parser.add_argument("scad", help="path of the SCAD file")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(args.scad)
+    if not args.output:
+        parser.error("the output file is required, pass -o")
+
+    code, elapsed, output, cached, backend = render(args.scad, args.output, args.backend)
+    print(output, end="")
+    status = "served from cache" if cached else f"rendered via {backend}" if code == 0 else f"failed ({code}) via {backend}"
+    print(f"{args.output}: {status} in {elapsed:.2f}s")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
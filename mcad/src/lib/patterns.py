@@ -0,0 +1,108 @@
+"""
+Pattern nodes that instantiate their children several times, which are
+emitted as a single OpenSCAD `for` loop over the children instead of
+unrolled copies. Thus, the size of the SCAD file does not grow with the
+number of copies and OpenSCAD evaluates the children only once.
+
+The nodes store their parameters like any other node, so that they can
+be hashed, shared and copied by the passes in `lib.csg`. Passes that need
+to look into the copies use `expand`, which returns the unrolled tree.
+"""
+from abc import ABCMeta, abstractmethod
+from itertools import product
+from solid import OpenSCADObject, mirror, translate, union
+from solid.solidpython import py2openscad
+
+
+class Pattern(OpenSCADObject, metaclass=ABCMeta):
+    """
+    Base class of the pattern nodes.
+    """
+
+    @abstractmethod
+    def copies(self) -> int:
+        """
+        Count the instances of the children.
+        """
+
+    @abstractmethod
+    def expand(self) -> OpenSCADObject:
+        """
+        Unroll the pattern into the equivalent tree of transforms.
+        """
+
+    @abstractmethod
+    def statement(self, literal) -> str:
+        """
+        Print the loop over the children, where values are printed by the
+        given function, e.g. with a fixed precision by `lib.scad`.
+        """
+
+    def _render_str_no_children(self) -> str:
+        return f"\n{self.modifier}{self.statement(py2openscad)}"
+
+
+class Array(Pattern):
+    """
+    Instantiate the children on a grid of offsets. The offset of the
+    instance with the indices `i` is `origin + i[0] * steps[0] + ...`.
+    """
+
+    def __init__(self, counts: tuple, steps: tuple, origin: tuple = (0, 0, 0)):
+        # OpenSCAD iterates the range `[0 : -1]` backwards instead of skipping it.
+        if any(n < 1 for n in counts):
+            raise ValueError(f"invalid counts {tuple(counts)}, expected at least one copy along each step")
+        super().__init__(
+            "array",
+            {
+                "counts": tuple(int(n) for n in counts),
+                "steps": tuple(tuple(float(v) for v in step) for step in steps),
+                "origin": tuple(float(v) for v in origin),
+            },
+        )
+
+    def offsets(self) -> list:
+        """
+        Compute the offsets of all instances.
+        """
+        counts, steps, origin = self.params["counts"], self.params["steps"], self.params["origin"]
+        return [
+            tuple(origin[axis] + sum(i * step[axis] for i, step in zip(index, steps)) for axis in range(3))
+            for index in product(*(range(n) for n in counts))
+        ]
+
+    def copies(self) -> int:
+        count = 1
+        for n in self.params["counts"]:
+            count *= n
+        return count
+
+    def expand(self) -> OpenSCADObject:
+        return union()([translate(offset)(*self.children) for offset in self.offsets()])
+
+    def statement(self, literal) -> str:
+        counts, steps, origin = self.params["counts"], self.params["steps"], self.params["origin"]
+        ranges = ", ".join(f"i{k} = [0 : {n - 1}]" for k, n in enumerate(counts))
+        terms = [f"i{k} * {literal(list(step))}" for k, step in enumerate(steps)]
+        offset = " + ".join([literal(list(origin))] * any(origin) + terms)
+        return f"for ({ranges}) translate({offset})"
+
+
+class Mirrored(Pattern):
+    """
+    Instantiate the children as they are and mirrored along a plane
+    through the origin with the given normal.
+    """
+
+    def __init__(self, normal: tuple):
+        super().__init__("mirrored", {"normal": tuple(float(v) for v in normal)})
+
+    def copies(self) -> int:
+        return 2
+
+    def expand(self) -> OpenSCADObject:
+        return union()(*self.children, mirror(self.params["normal"])(*self.children))
+
+    def statement(self, literal) -> str:
+        normals = literal([[0, 0, 0], list(self.params["normal"])])
+        return f"for (v = {normals}) mirror(v)"
@@ -0,0 +1,210 @@
+"""
+A streaming emitter of SCAD programs, which writes the statements of a
+tree to the file while traversing it, instead of rendering the entire
+program to a single string first like SolidPython.
+
+Lengths are rounded to `SCAD_PRECISION` decimals of a millimeter, which
+defaults to 1 µm, while angles, factors and matrices keep more decimals,
+as their error grows with the distance from the origin. All numbers are
+printed in their shortest form and includes are sorted, so that equal
+trees yield byte-identical programs and the content-addressed caches hit
+reliably. Otherwise, the output follows the semantics of SolidPython,
+including modifiers and holes, which are subtracted at the root of the
+tree or of a part.
+"""
+import io
+from numbers import Integral, Real
+from os import getenv
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+import numpy as np
+from solid import OpenSCADObject
+from solid.solidpython import IncludedOpenSCADObject, _find_include_strings, _unsubbed_keyword, non_rendered_classes
+from .patterns import Pattern
+
+# Decimals of lengths in millimeters, unless configured via `SCAD_PRECISION`.
+PRECISION = 3
+
+# Decimals of dimensionless parameters.
+EXACT = 9
+
+# Parameters that are not lengths, keyed by the name of their node.
+DIMENSIONLESS = {
+    "rotate": ("a", "v"),
+    "scale": ("v",),
+    "mirror": ("v",),
+    "multmatrix": ("m",),
+    "color": ("c", "alpha"),
+    "linear_extrude": ("twist", "scale"),
+    "rotate_extrude": ("angle",),
+}
+
+# Booleans that are replaced by unions above holes, so they do not shrink them.
+SUBTRACTIVE = ("difference", "intersection")
+
+
+def precision() -> int:
+    """
+    Retrieve the number of decimals of lengths, which can be configured
+    via the `SCAD_PRECISION` environment variable.
+    """
+    return int(getenv("SCAD_PRECISION") or PRECISION)
+
+
+def number(value: float, decimals: int) -> str:
+    """
+    Print a number rounded to the given decimals in its shortest form.
+    """
+    text = f"{value:.{decimals}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def value(obj, decimals: int) -> str:
+    """
+    Print a parameter value as OpenSCAD literal.
+    """
+    if isinstance(obj, (bool, np.bool_)):
+        return "true" if obj else "false"
+    if isinstance(obj, Integral):
+        return str(int(obj))
+    if isinstance(obj, Real):
+        return number(float(obj), decimals)
+    if isinstance(obj, str):
+        return '"' + obj.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    if isinstance(obj, IncludedOpenSCADObject):
+        return obj._render()[1:-1]
+    if hasattr(obj, "__iter__"):
+        return "[" + ", ".join(value(item, decimals) for item in obj) + "]"
+    return str(obj)
+
+
+def statement(node: OpenSCADObject, decimals: Optional[int] = None, name: Optional[str] = None) -> str:
+    """
+    Print the call of a node without its children, where positional
+    parameters precede the named ones in alphabetical order.
+    """
+    decimals = precision() if decimals is None else decimals
+    if isinstance(node, Pattern):
+        return node.modifier + node.statement(lambda obj: value(obj, decimals))
+
+    exact = DIMENSIONLESS.get(node.name, ())
+    params = {k if isinstance(k, int) else _unsubbed_keyword(k): v for k, v in node.params.items() if v is not None}
+    args = [value(params[k], decimals) for k in sorted(k for k in params if isinstance(k, int))]
+    args += [
+        f"{k} = {value(params[k], EXACT if k in exact else decimals)}"
+        for k in sorted(k for k in params if not isinstance(k, int))
+    ]
+    return f"{node.modifier}{name or _unsubbed_keyword(node.name)}({', '.join(args)})"
+
+
+class Emitter:
+    """
+    Streams the statements of trees with a fixed precision, memoizing
+    which subtrees contain holes.
+    """
+
+    def __init__(self, decimals: Optional[int] = None):
+        self.decimals = precision() if decimals is None else decimals
+        self.memo = {}
+
+    def holes(self, node: OpenSCADObject) -> bool:
+        """
+        Check whether a subtree contains holes that are subtracted at its
+        root, i.e. that do not belong to a separate part.
+        """
+        if id(node) not in self.memo:
+            self.memo[id(node)] = any(
+                child.is_hole or (not child.is_part_root and self.holes(child)) for child in node.children
+            )
+        return self.memo[id(node)]
+
+    def emit(self, node: OpenSCADObject, level: int, root: bool = False, render_holes: bool = False) -> Iterator[str]:
+        """
+        Stream the statements of a subtree, where holes are subtracted
+        after all other geometry of the root or of a part.
+        """
+        wrap = (root or node.is_part_root) and self.holes(node)
+        if wrap:
+            yield "\t" * level + "difference() {\n"
+            level += 1
+
+        tabs = "\t" * level
+        children = [child for child in node.children if render_holes or not child.is_hole]
+        if node.name in non_rendered_classes:
+            for child in children:
+                yield from self.emit(child, level, render_holes=render_holes)
+        elif not node.children:
+            yield f"{tabs}{statement(node, self.decimals)};\n"
+        else:
+            yield f"{tabs}{statement(node, self.decimals)} {{\n"
+            for child in children:
+                yield from self.emit(child, level + 1, render_holes=render_holes)
+            yield f"{tabs}}}\n"
+
+        if wrap:
+            yield from self.emit_holes(node, level)
+            yield "\t" * (level - 1) + "}\n"
+
+    def emit_holes(self, node: OpenSCADObject, level: int) -> Iterator[str]:
+        """
+        Stream the holes of a subtree along with the transforms placing
+        them.
+        """
+        if not self.holes(node):
+            return
+        hidden = node.name in non_rendered_classes
+        if not hidden:
+            name = "union" if node.name in SUBTRACTIVE else None
+            yield "\t" * level + f"{statement(node, self.decimals, name)} {{\n"
+
+        inner = level if hidden else level + 1
+        for child in node.children:
+            if child.is_hole:
+                yield from self.emit(child, inner, render_holes=True)
+            elif not child.is_part_root:
+                yield from self.emit_holes(child, inner)
+
+        if not hidden:
+            yield "\t" * level + "}\n"
+
+    def program(self, root: OpenSCADObject, header: str = "", modules: tuple = ()) -> Iterator[str]:
+        """
+        Stream the program of a tree, given the header and the shared
+        modules as pairs of their name and body.
+        """
+        if header:
+            yield header if header.endswith("\n") else header + "\n"
+        yield "".join(sorted(_find_include_strings(root))) + "\n"
+        for name, body in modules:
+            yield f"module {name}() {{\n"
+            yield from self.emit(body, 1)
+            yield "}\n"
+        yield from self.emit(root, 0, root=True)
+
+
+def stream(root: OpenSCADObject, file: TextIO, header: str = "", modules: tuple = ()):
+    """
+    Write the program of a tree to a file object.
+    """
+    file.writelines(Emitter().program(root, header, modules))
+
+
+def render(root: OpenSCADObject, header: str = "", modules: tuple = ()) -> str:
+    """
+    Render the program of a tree to a string.
+    """
+    buffer = io.StringIO()
+    stream(root, buffer, header, modules)
+    return buffer.getvalue()
+
+
+def write(root: OpenSCADObject, path, header: str = "", modules: tuple = ()) -> Path:
+    """
+    Write the program of a tree to a file and return its path.
+    """
+    path = Path(path)
+    with open(path, "w") as file:
+        stream(root, file, header, modules)
+    return path
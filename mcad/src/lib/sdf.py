@@ -0,0 +1,462 @@
+"""
+A preview renderer that evaluates the tree of a part as a signed distance
+field with NumPy, so that a rough look at a change does not require
+OpenSCAD.
+
+The field is sampled on a voxel grid, where each node is evaluated for
+all points at once: primitives yield their distance, transforms move the
+points and booleans combine the distances via minimum and maximum. Points
+outside of the bounding box of a subtree are not evaluated by it. Cubes,
+spheres, cylinders, extrusions of squares, circles and polygons as well
+as transforms, booleans, patterns, holes and colors are supported, while
+other nodes are approximated by their bounding box. The resolution of
+round primitives does not apply, as they are evaluated exactly.
+
+The preview is either a PNG file, shaded from the depth of the first
+voxel hit along each ray of an isometric view, or an STL file of the
+faces between occupied and empty voxels, which is blocky rather than a
+smooth marching cubes surface.
+
+Usage: PYTHONPATH=src python3 -m lib.sdf netstack_v1_case_nanopir5s -o build/preview/netstack_v1_case_nanopir5s.png
+"""
+import struct
+import sys
+import zlib
+from argparse import ArgumentParser
+from importlib import import_module
+from math import inf
+from pathlib import Path
+from time import perf_counter
+import numpy as np
+from solid import OpenSCADObject
+from solid.solidpython import non_rendered_classes
+from . import triangles
+from .bbox import UNBOUNDED, affine, bounds, radius, vector
+from .deps import SRC_DIR
+from .patterns import Pattern
+from .threemf import rgba
+
+# Number of voxels along the longest axis, unless configured otherwise.
+VOXELS = 96
+
+# Maximum number of point and edge pairs evaluated at once for polygons.
+CHUNK = 1 << 21
+
+# Direction towards the camera and the light in view coordinates.
+CAMERA = (0.6, -1.0, 0.8)
+LIGHT = (-0.3, 0.5, 1.0)
+
+# Colors of geometry without color and of the background.
+DEFAULT_COLOR = (249, 215, 44)
+BACKGROUND = (255, 255, 255)
+
+# Size of the PNG file in pixels along its longest side.
+IMAGE_SIZE = 512
+
+# Primitives that are only defined in the plane.
+PLANAR = ("square", "circle", "polygon")
+
+
+class Field:
+    """
+    Evaluates the signed distance and the color of a tree at points.
+    """
+
+    def __init__(self, root: OpenSCADObject):
+        self.root = root
+        self.bounds = {}
+        self.colors = [DEFAULT_COLOR]
+        self.approximated = set()
+        self.memo = {}
+        self.imports(root)
+
+    def imports(self, node: OpenSCADObject):
+        """
+        Determine the bounds of imported meshes, which are unknown to
+        `lib.bbox`. Missing meshes are treated as empty.
+        """
+        path = Path(str(node.params.get("file") or ""))
+        if node.name == "import" and path.suffix.lower() == ".stl" and node.get_trait("bounds") is None:
+            self.bounds[id(node)] = (node, triangles.bounds(triangles.load(path)) if path.exists() else None)
+        for child in node.children:
+            self.imports(child)
+
+    def color(self, node: OpenSCADObject) -> int:
+        """
+        Register the color of a node and return its index.
+        """
+        value = rgba(node.params)
+        if value is None:
+            return 0
+        rgb = tuple(int(value[i : i + 2], 16) for i in (1, 3, 5))
+        if rgb not in self.colors:
+            self.colors.append(rgb)
+        return self.colors.index(rgb)
+
+    def evaluate(self, points: np.ndarray) -> tuple:
+        """
+        Evaluate the tree at points of shape `(n, 3)`. Returns the signed
+        distances and the color indices.
+        """
+        return self.visit(self.root, points, planar=False)
+
+    def visit(self, node: OpenSCADObject, points: np.ndarray, planar: bool) -> tuple:
+        """
+        Evaluate a subtree, skipping the points outside of its bounds.
+        Holes are subtracted at the root of the tree or of a part, like
+        OpenSCAD does.
+        """
+        if node.is_hole or node.modifier in ("*", "%") or len(points) == 0:
+            return np.full(len(points), inf), np.zeros(len(points), dtype=int)
+        distances, colors = self.culled(node, points, planar)
+        if node is self.root or node.is_part_root:
+            cut, _ = self.holes(node, points, planar, top=True)
+            distances = np.maximum(distances, -cut)
+        return distances, colors
+
+    def culled(self, node: OpenSCADObject, points: np.ndarray, planar: bool) -> tuple:
+        """
+        Evaluate a node only at the points within its bounds, while the
+        distance to the bounds is used for all other points.
+        """
+        box = bounds(node, self.bounds)
+        if box is None:
+            return np.full(len(points), inf), np.zeros(len(points), dtype=int)
+        if box == UNBOUNDED:
+            return self.node(node, points, planar)
+        lo, hi = np.array(box[0], dtype=float), np.array(box[1], dtype=float)
+        if planar:
+            lo[2], hi[2] = -inf, inf
+        inside = np.all((points >= lo) & (points <= hi), axis=1)
+        if inside.all():
+            return self.node(node, points, planar)
+
+        distances = np.linalg.norm(np.maximum(np.maximum(lo - points, points - hi), 0), axis=1)
+        colors = np.zeros(len(points), dtype=int)
+        if inside.any():
+            distances[inside], colors[inside] = self.node(node, points[inside], planar)
+        return distances, colors
+
+    def contains(self, node: OpenSCADObject) -> bool:
+        """
+        Check whether a subtree contains holes that are subtracted at its
+        root, i.e. that do not belong to a separate part.
+        """
+        # The memo holds a reference to the node, so that its identity stays valid.
+        if id(node) not in self.memo:
+            found = any(child.is_hole or (not child.is_part_root and self.contains(child)) for child in node.children)
+            self.memo[id(node)] = (node, found)
+        return self.memo[id(node)][1]
+
+    def holes(self, node: OpenSCADObject, points: np.ndarray, planar: bool, top: bool = False) -> tuple:
+        """
+        Evaluate the union of the holes below a node, which are placed by
+        its transforms. Holes of nested parts are subtracted by them.
+        """
+        if node.is_hole:
+            return self.node(node, points, planar)
+        if node.modifier in ("*", "%") or (node.is_part_root and not top) or not self.contains(node):
+            return np.full(len(points), inf), np.zeros(len(points), dtype=int)
+        if isinstance(node, Pattern):
+            return self.holes(node.expand(), points, planar)
+        matrix = affine(node)
+        if matrix is not None:
+            points = self.inverse(matrix, points)
+        planar = planar or node.name == "linear_extrude"
+        return self.union([self.holes(child, points, planar) for child in node.children], len(points))
+
+    def node(self, node: OpenSCADObject, points: np.ndarray, planar: bool) -> tuple:
+        """
+        Evaluate a node at the points in its local coordinates.
+        """
+        name, params = node.name, node.params
+        zeros = np.zeros(len(points), dtype=int)
+
+        if isinstance(node, Pattern):
+            return self.visit(node.expand(), points, planar)
+        if name in PLANAR and not planar:
+            return np.full(len(points), inf), zeros
+        if name == "cube":
+            size = np.array(vector(params.get("size"), default=1), dtype=float)
+            center = points if params.get("center") else points - size / 2
+            return box(center, size / 2), zeros
+        if name == "sphere":
+            return np.linalg.norm(points, axis=1) - radius(params, "r"), zeros
+        if name == "cylinder":
+            return cylinder(params, points), zeros
+        if name == "square":
+            size = np.array(vector(params.get("size"), 2, default=1), dtype=float)
+            center = points[:, :2] if params.get("center") else points[:, :2] - size / 2
+            return box(center, size / 2), zeros
+        if name == "circle":
+            return np.linalg.norm(points[:, :2], axis=1) - radius(params, "r"), zeros
+        if name == "polygon":
+            return polygon(params, points[:, :2]), zeros
+        if name == "linear_extrude":
+            height = params.get("height") or 1
+            z = points[:, 2] - (0 if params.get("center") else height / 2)
+            flat, colors = self.children(node, points, True)
+            return np.maximum(flat, np.abs(z) - height / 2), colors
+        if name == "rotate_extrude":
+            section = np.stack([np.linalg.norm(points[:, :2], axis=1), points[:, 2], np.zeros(len(points))], axis=1)
+            return self.children(node, section, True)
+        if name == "offset":
+            distances, colors = self.children(node, points, planar)
+            return distances - (params.get("r") or params.get("delta") or 0), colors
+        if name == "color":
+            distances, colors = self.children(node, points, planar)
+            return distances, np.where(colors == 0, self.color(node), colors)
+
+        matrix = affine(node)
+        if matrix is not None:
+            local = self.inverse(matrix, points)
+            distances, colors = self.children(node, local, planar)
+            # Scale the distances by the smallest factor of the transform.
+            return distances * np.linalg.svd(np.array(matrix)[:, :3], compute_uv=False).min(), colors
+
+        results = [self.visit(child, points, planar) for child in node.children if not child.is_hole]
+        if name == "difference" and results:
+            distances, colors = results[0]
+            cut, _ = self.union(results[1:], len(points))
+            return np.maximum(distances, -cut), colors
+        if name == "intersection" and results:
+            distances = np.max([distances for distances, _ in results], axis=0)
+            return distances, results[0][1]
+        if name in ("union", "group", "render") or name in non_rendered_classes:
+            return self.union(results, len(points))
+
+        # Approximate any other node by its bounding box.
+        self.approximated.add(name)
+        lo, hi = (np.array(corner) for corner in bounds(node, self.bounds))
+        return box(points - (lo + hi) / 2, (hi - lo) / 2), zeros
+
+    def inverse(self, matrix: list, points: np.ndarray) -> np.ndarray:
+        """
+        Map points into the local coordinates of a transform.
+        """
+        matrix = np.array(matrix, dtype=float)
+        return (points - matrix[:, 3]) @ np.linalg.inv(matrix[:, :3]).T
+
+    def children(self, node: OpenSCADObject, points: np.ndarray, planar: bool) -> tuple:
+        """
+        Evaluate the union of the children of a node.
+        """
+        return self.union([self.visit(child, points, planar) for child in node.children], len(points))
+
+    def union(self, results: list, count: int) -> tuple:
+        """
+        Combine the distances of several results by their minimum, where
+        each of the `count` points takes the color of the nearest result.
+        """
+        if not results:
+            return np.full(count, inf), np.zeros(count, dtype=int)
+        if len(results) == 1:
+            return results[0]
+        distances = np.stack([distances for distances, _ in results])
+        nearest = distances.argmin(axis=0)
+        colors = np.stack([colors for _, colors in results])
+        columns = np.arange(count)
+        return distances[nearest, columns], colors[nearest, columns]
+
+
+def box(points: np.ndarray, half: np.ndarray) -> np.ndarray:
+    """
+    Compute the signed distance to a box centered at the origin.
+    """
+    q = np.abs(points) - half
+    return np.linalg.norm(np.maximum(q, 0), axis=1) + np.minimum(q.max(axis=1), 0)
+
+
+def cylinder(params: dict, points: np.ndarray) -> np.ndarray:
+    """
+    Compute the approximate signed distance to a cylinder or cone, which
+    is exact in sign.
+    """
+    r = radius(params, "r")
+    r1, r2 = radius(params, "r1", r), radius(params, "r2", r)
+    h = params.get("h") or 1
+    z = points[:, 2] + (h / 2 if params.get("center") else 0)
+    slope = (r2 - r1) / h
+    rho = np.linalg.norm(points[:, :2], axis=1)
+    side = (rho - (r1 + slope * np.clip(z, 0, h))) / np.sqrt(1 + slope * slope)
+    return np.maximum(side, np.abs(z - h / 2) - h / 2)
+
+
+def polygon(params: dict, points: np.ndarray) -> np.ndarray:
+    """
+    Compute the signed distance to a polygon, whose paths are combined via
+    the even-odd rule. Points outside its bounds only use the distance to
+    the bounds.
+    """
+    vertices = np.asarray(params.get("points"), dtype=float)[:, :2]
+    paths = params.get("paths") or [range(len(vertices))]
+    starts = np.concatenate([vertices[list(path)] for path in paths])
+    ends = np.concatenate([vertices[list(path)][np.r_[1 : len(path), 0]] for path in paths])
+
+    lo, hi = vertices.min(axis=0), vertices.max(axis=0)
+    distances = np.linalg.norm(np.maximum(np.maximum(lo - points, points - hi), 0), axis=1)
+    inside = np.flatnonzero(np.all((points >= lo) & (points <= hi), axis=1))
+
+    edges = ends - starts
+    lengths = np.maximum(np.einsum("ij,ij->i", edges, edges), 1e-12)
+    step = max(CHUNK // len(starts), 1)
+    for offset in range(0, len(inside), step):
+        indices = inside[offset : offset + step]
+        p = points[indices]
+        delta = p[:, None, :] - starts[None, :, :]
+        t = np.clip(np.einsum("nmk,mk->nm", delta, edges) / lengths, 0, 1)
+        nearest = np.linalg.norm(delta - t[..., None] * edges, axis=2).min(axis=1)
+        # Count the crossings of a ray in positive x direction.
+        ys, ye = starts[None, :, 1], ends[None, :, 1]
+        straddles = (ys > p[:, None, 1]) != (ye > p[:, None, 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = starts[None, :, 0] + (p[:, None, 1] - ys) * edges[None, :, 0] / (ye - ys)
+        odd = (straddles & (p[:, None, 0] < x)).sum(axis=1) % 2 == 1
+        distances[indices] = np.where(odd, -nearest, nearest)
+    return distances
+
+
+def view() -> np.ndarray:
+    """
+    Compute the orthonormal basis of the view, whose rows are the axes to
+    the right, upwards and towards the camera in model coordinates.
+    """
+    back = np.array(CAMERA) / np.linalg.norm(CAMERA)
+    right = np.cross([0, 0, 1], back)
+    right /= np.linalg.norm(right)
+    return np.array([right, np.cross(back, right), back])
+
+
+def sample(field: Field, basis: np.ndarray, voxels: int) -> tuple:
+    """
+    Sample the field on a grid aligned to a basis, covering the bounds of
+    the tree. Returns the occupancy and the colors of the voxels, the
+    origin of the grid and the size of the voxels.
+    """
+    box = bounds(field.root, field.bounds)
+    if box is None or box == UNBOUNDED:
+        raise ValueError("cannot preview empty geometry or geometry without finite bounds")
+
+    corners = np.array([[x, y, z] for x in (box[0][0], box[1][0]) for y in (box[0][1], box[1][1]) for z in (box[0][2], box[1][2])])
+    local = corners @ basis.T
+    lo, hi = local.min(axis=0), local.max(axis=0)
+    size = max((hi - lo).max(), 1e-9) / voxels
+    # Pad the grid by a voxel, so that the surface is closed.
+    lo -= size
+    shape = tuple(int(np.ceil(extent / size)) + 2 for extent in hi - lo)
+
+    axes = [lo[i] + (np.arange(shape[i]) + 0.5) * size for i in range(3)]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    distances, colors = field.evaluate(grid @ basis)
+    return (distances <= 0).reshape(shape), colors.reshape(shape), lo, size
+
+
+def image(field: Field, voxels: int = VOXELS) -> np.ndarray:
+    """
+    Render a preview of a field as RGB image of shape `(h, w, 3)`.
+    """
+    occupied, colors, _, size = sample(field, view(), voxels)
+
+    # Find the first voxel along each ray towards the camera.
+    front = occupied[:, :, ::-1]
+    hit = front.any(axis=2)
+    index = front.shape[2] - 1 - front.argmax(axis=2)
+    depth = index * size
+
+    # Shade the surface by the normals derived from the depth.
+    dx, dy = np.gradient(depth, size)
+    normals = np.stack([-dx, -dy, np.ones_like(depth)], axis=-1)
+    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+    light = np.array(LIGHT) / np.linalg.norm(LIGHT)
+    shade = 0.35 + 0.65 * np.clip(normals @ light, 0, 1)
+
+    palette = np.array(field.colors, dtype=float)
+    color = palette[np.take_along_axis(colors, index[..., None], axis=2)[..., 0]]
+    rgb = np.where(hit[..., None], color * shade[..., None], BACKGROUND)
+
+    # Orient the image with the x axis to the right and y upwards.
+    rgb = rgb.transpose(1, 0, 2)[::-1].astype(np.uint8)
+    scale = max(IMAGE_SIZE // max(rgb.shape[:2]), 1)
+    return rgb.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+def png(rgb: np.ndarray, path: Path) -> Path:
+    """
+    Write an RGB image to a PNG file.
+    """
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    height, width, _ = rgb.shape
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, -1)], axis=1)
+    path.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows.tobytes()))
+        + chunk(b"IEND", b"")
+    )
+    return path
+
+
+def mesh(field: Field, voxels: int = VOXELS) -> np.ndarray:
+    """
+    Compute the surface of the occupied voxels of a field as mesh. This is
+    not marching cubes: the mesh consists of the axis-aligned faces between
+    occupied and empty voxels, so it is closed but blocky at the size of a
+    voxel.
+    """
+    occupied, _, origin, size = sample(field, np.eye(3), voxels)
+    faces = []
+    for axis in range(3):
+        # Faces lie between neighboring voxels of which only one is occupied.
+        pad = [(1, 1) if i == axis else (0, 0) for i in range(3)]
+        padded = np.pad(occupied, pad)
+        ahead = np.take(padded, range(1, padded.shape[axis]), axis=axis)
+        behind = np.take(padded, range(padded.shape[axis] - 1), axis=axis)
+        for outward, mask in ((1, behind & ~ahead), (-1, ahead & ~behind)):
+            cells = np.argwhere(mask).astype(float)
+            u, v = np.eye(3)[(axis + 1) % 3], np.eye(3)[(axis + 2) % 3]
+            if outward < 0:
+                u, v = v, u
+            a, b, c, d = cells, cells + u, cells + u + v, cells + v
+            faces += [np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)]
+    return triangles.merge(*faces) * size + origin
+
+
+def main() -> int:
+    """
+    Render the previews of the given parts.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.sdf", description=__doc__)
+    parser.add_argument("parts", nargs="+", help="names of the parts to preview")
+    parser.add_argument("-o", "--output", help="output PNG or STL file, defaults to build/preview/<part>.png")
+    parser.add_argument("-n", "--voxels", type=int, default=VOXELS, help="number of voxels along the longest axis")
+    args = parser.parse_args()
+    if args.output and len(args.parts) > 1:
+        parser.error("an output file can only be given for a single part")
+
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+    code = 0
+    for part in args.parts:
+        start = perf_counter()
+        output = Path(args.output or f"build/preview/{part}.png")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        field = Field(import_module(part).obj())
+        try:
+            if output.suffix == ".stl":
+                triangles.save(mesh(field, args.voxels), output)
+            else:
+                png(image(field, args.voxels), output)
+        except ValueError as error:
+            print(f"{part}: {error}", file=sys.stderr)
+            code = 1
+            continue
+        approximated = f", approximated {', '.join(sorted(field.approximated))}" if field.approximated else ""
+        print(f"{output} ({perf_counter() - start:.2f}s{approximated})")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
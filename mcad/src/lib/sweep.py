@@ -0,0 +1,193 @@
+"""
+Parameter sweeps of parts for print calibration, which generate a variant
+of a part for each combination of parameter values and lay them out with
+labels on a single print plate.
+
+Parameters are the top-level constants of a part script like `tol_xy`.
+Each variant executes the script with the assignments of the parameters
+replaced, so that derived dimensions follow. Values are given as list
+`tol_xy=0.2,0.25,0.3` or inclusive range `tol_xy=0.15:0.35:0.05`, where
+several parameters are combined exhaustively.
+
+The variants are transpiled and rendered in parallel, each to its own
+files in `build/sweep/<part>`. The plate imports the rendered meshes, so
+OpenSCAD only has to place them and emboss the labels.
+
+Usage: PYTHONPATH=src python3 -m lib.sweep nanopi_r5s_test_shrinkage_xy tol_xy=0.15:0.35:0.05
+"""
+import ast
+import io
+import sys
+import types
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from itertools import product
+from math import ceil, sqrt
+from os import cpu_count
+from pathlib import Path
+from time import perf_counter
+from solid import OpenSCADObject, import_, linear_extrude, text, translate, union
+from . import deps, scad, triangles
+from .openscad import render
+from .utils import build
+
+# Directory the variants and plates are written to.
+SWEEP_DIR = Path("build/sweep")
+
+# Gap between the variants on the plate in millimeters.
+SPACING = 5
+
+# Size and height of the labels in millimeters.
+LABEL_SIZE = 4
+LABEL_HEIGHT = 0.6
+
+
+def values(spec: str) -> tuple:
+    """
+    Parse a parameter and its values from a list or an inclusive range.
+    """
+    name, sep, value = spec.partition("=")
+    if not sep or not name.isidentifier():
+        raise ValueError(f"invalid parameter {spec}, expected name=a,b,c or name=start:stop:step")
+
+    if ":" in value:
+        start, stop, step = (float(v) for v in value.split(":"))
+        if step <= 0:
+            raise ValueError(f"invalid step of parameter {name}: {step:g}")
+        count = int((stop - start) / step + 1e-9) + 1
+        return name, [round(start + i * step, 9) for i in range(count)]
+    return name, [ast.literal_eval(v) for v in value.split(",")]
+
+
+def label(params: dict) -> str:
+    """
+    Describe a variant by its parameter values.
+    """
+    return " ".join(f"{name}={value}" for name, value in params.items())
+
+
+def assignments(tree: ast.Module) -> list:
+    """
+    Retrieve the top-level assignments of names in a part script.
+    """
+    found = []
+    for node in tree.body:
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target] if isinstance(node, ast.AnnAssign) else []
+        found += [(target.id, node) for target in targets if isinstance(target, ast.Name)]
+    return found
+
+
+def parameters(part: str) -> set:
+    """
+    Retrieve the names of the parameters of a part.
+    """
+    return {name for name, _ in assignments(ast.parse(deps.source(part).read_text()))}
+
+
+def variant(part: str, params: dict) -> types.ModuleType:
+    """
+    Execute a part script with its parameters replaced by the given
+    values and return the resulting module. The variant declares its own
+    part, which is named by the part and the values.
+    """
+    tree = ast.parse(deps.source(part).read_text())
+    for name, node in assignments(tree):
+        if name in params:
+            node.value = ast.Constant(params[name])
+
+    name = f"{part}@{','.join(f'{k}={v}' for k, v in params.items())}"
+    filename = str((SWEEP_DIR / part / f"{name}.py").resolve())
+    module = types.ModuleType(name)
+    module.__file__ = filename
+    exec(compile(ast.fix_missing_locations(tree), filename, "exec"), module.__dict__)  # pylint: disable=exec-used
+    return module
+
+
+def generate(part: str, params: dict) -> tuple:
+    """
+    Transpile a variant and return the path of its SCAD file and the
+    output of the build. The output is printed by the main process, so
+    that the output of the workers does not interleave.
+    """
+    with redirect_stdout(io.StringIO()) as output:
+        module = variant(part, params)
+        build(module.obj(), module.__file__, directory=str(SWEEP_DIR / part))
+    return str(Path(module.__file__).with_suffix(".scad")), output.getvalue()
+
+
+def plate(meshes: list) -> OpenSCADObject:
+    """
+    Lay out the meshes of the variants on a grid, each resting on the
+    plate with its label embossed in front of it.
+    """
+    boxes = [triangles.bounds(triangles.load(path)) for path, _ in meshes]
+    width = max(hi[0] - lo[0] for lo, hi in boxes) + SPACING
+    depth = max(hi[1] - lo[1] for lo, hi in boxes) + SPACING * 2 + LABEL_SIZE
+    columns = ceil(sqrt(len(meshes)))
+
+    solid = union()
+    for index, ((path, caption), (lo, _)) in enumerate(zip(meshes, boxes)):
+        x, y = (index % columns) * width, -(index // columns) * depth
+        solid += translate([x - lo[0], y - lo[1], -lo[2]])(import_(str(Path(path).resolve())))
+        solid += translate([x, y - SPACING - LABEL_SIZE, 0])(linear_extrude(LABEL_HEIGHT)(text(caption, size=LABEL_SIZE)))
+    return solid
+
+
+def main() -> int:
+    """
+    Generate, render and lay out the variants of a part.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.sweep", description=__doc__)
+    parser.add_argument("part", help="name of the part to sweep")
+    parser.add_argument("params", nargs="+", help="parameters as name=a,b,c or name=start:stop:step")
+    parser.add_argument("-j", "--jobs", type=int, default=cpu_count(), help="number of parallel processes")
+    args = parser.parse_args()
+
+    if str(deps.SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(deps.SRC_DIR))
+    if deps.source(args.part) is None:
+        parser.error(f"unknown part {args.part}")
+    try:
+        sweep = dict(values(spec) for spec in args.params)
+    except ValueError as error:
+        parser.error(str(error))
+    missing = sweep.keys() - parameters(args.part)
+    if missing:
+        parser.error(f"{args.part} has no parameters {', '.join(sorted(missing))}")
+    variants = [dict(zip(sweep, combination)) for combination in product(*sweep.values())]
+    start = perf_counter()
+
+    # Transpile and render the variants in parallel.
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        scads = []
+        for path, output in pool.map(generate, [args.part] * len(variants), variants):
+            print(output, end="")
+            scads.append(path)
+        print(f"[scad] {len(scads)} variants of {args.part} ({perf_counter() - start:.2f}s)")
+        stls = [str(Path(path).with_suffix(".stl")) for path in scads]
+        results = list(pool.map(render, scads, stls))
+
+    meshes = []
+    for params, stl, (code, elapsed, output, cached, _) in zip(variants, stls, results):
+        status = "cached" if cached else "ok" if code == 0 else f"failed ({code})"
+        print(f"[stl] {label(params)} {status} ({elapsed:.2f}s)")
+        if code == 0 and triangles.bounds(triangles.load(stl)) is not None:
+            meshes.append((stl, label(params)))
+        else:
+            print(output, file=sys.stderr)
+    if not meshes:
+        return 1
+
+    # Place the meshes and labels on the plate.
+    program = scad.write(plate(meshes), SWEEP_DIR / args.part / "plate.scad")
+    code, elapsed, output, _, _ = render(str(program), str(program.with_suffix(".stl")))
+    if code != 0:
+        print(output, file=sys.stderr)
+    print(f"[plate] {program.with_suffix('.stl')} with {len(meshes)} variants {'ok' if code == 0 else 'failed'} ({elapsed:.2f}s)")
+    print(f"{'wall':<32}{perf_counter() - start:>9.2f}s")
+    return 1 if code != 0 or len(meshes) < len(variants) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Export of parts and assemblies as 3MF files, which hold one mesh per
+distinct part and place it once per instance via a transform, instead of
+unioning all instances into a single STL.
+
+The tree of a part is traversed through unions, transforms and colors.
+Parts contained in it are instances of their mesh, which is reused from
+`build/stl` if it is up to date or rendered on its own via the render
+cache, see `lib/meshes.py`. Any other geometry is exported as a body,
+where identical bodies are likewise instantiated. Thus, OpenSCAD never
+evaluates the assembly as a whole. Instances keep the innermost color
+applied to them, given as hex value or RGB vector, including the color
+applied to the root of a part. Colors deeper within a part are lost with
+its mesh.
+
+Usage: PYTHONPATH=src python3 -m lib.threemf netstack_v1_assembly
+"""
+import sys
+import zipfile
+from argparse import ArgumentParser
+from importlib import import_module
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+import numpy as np
+from solid import OpenSCADObject
+from . import meshes, triangles
+from .bbox import affine
+from .csg import holes
+from .deps import SRC_DIR
+from .patterns import Pattern
+from .utils import prepare
+
+# Nodes whose children are exported separately, as they only group them.
+GROUPS = ("union", "group", "render")
+
+# Modifiers of nodes that are not part of the rendered geometry.
+SKIPPED = ("%", "*")
+
+# Namespace of the 3MF core specification.
+NAMESPACE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+ <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+ <Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+RELATIONSHIPS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+ <Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+
+def rgba(params: dict) -> Optional[str]:
+    """
+    Convert the parameters of a color node to an `#RRGGBBAA` value, or
+    `None` for color names, which are not supported.
+    """
+    value, alpha = params.get("c"), params.get("alpha")
+    if isinstance(value, str) and value.startswith("#"):
+        digits = value[1:]
+        if len(digits) in (3, 4):
+            digits = "".join(digit * 2 for digit in digits)
+        if len(digits) == 6:
+            digits += "ff"
+        channels = [int(digits[i : i + 2], 16) / 255 for i in range(0, 8, 2)]
+    elif isinstance(value, (list, tuple)) and len(value) in (3, 4):
+        channels = [*value, 1][:4]
+    else:
+        return None
+    if alpha is not None:
+        channels[3] = alpha
+    return "#" + "".join(f"{round(min(max(c, 0), 1) * 255):02X}" for c in channels)
+
+
+def instances(root: OpenSCADObject) -> list:
+    """
+    Collect the instances of the parts and bodies of a tree, each as the
+    instantiated node, the name of its part, its 4x4 matrix and its color.
+    """
+    found = []
+
+    def visit(node: OpenSCADObject, matrix: np.ndarray, color: Optional[str]):
+        if node.modifier in SKIPPED:
+            return
+        part = node.get_trait("part")
+        if node is not root and part is not None:
+            paint = meshes.paint(node)
+            found.append((node, part["name"], matrix, (paint and rgba(paint.params)) or color))
+        elif isinstance(node, Pattern) and not holes(node):
+            visit(node.expand(), matrix, color)
+        elif node.name in GROUPS and not holes(node):
+            for child in node.children:
+                visit(child, matrix, color)
+        elif node.name == "color" and not holes(node):
+            for child in node.children:
+                visit(child, matrix, rgba(node.params) or color)
+        elif affine(node) is not None and not holes(node):
+            transform = np.vstack([np.array(affine(node), dtype=float), [0, 0, 0, 1]])
+            for child in node.children:
+                visit(child, matrix @ transform, color)
+        else:
+            found.append((node, part["name"] if part else None, matrix, color))
+
+    visit(root, np.eye(4), None)
+    return found
+
+
+def load(node: OpenSCADObject, name: Optional[str], header: str) -> Optional[np.ndarray]:
+    """
+    Load the mesh of a part from the build directory or render it, as
+    well as the mesh of a body. Returns `None` if it could not be rendered.
+    """
+    path = meshes.rendered(name, meshes.digest(node, header)) if name else None
+    if path is None:
+        path, _ = meshes.mesh(node, header)
+    return None if path is None else triangles.load(path)
+
+
+def indexed(mesh: np.ndarray) -> tuple:
+    """
+    Weld the vertices of a triangle soup and return the vertices and the
+    vertex indices of the triangles.
+    """
+    points = np.round(mesh.reshape(-1, 3).astype(float), triangles.DECIMALS) + 0.0
+    vertices, inverse = np.unique(points, axis=0, return_inverse=True)
+    faces = inverse.reshape(-1, 3)
+    # Drop triangles that degenerated by welding.
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    return vertices, faces
+
+
+def number(value: float) -> str:
+    """
+    Format a coordinate compactly.
+    """
+    return f"{value:.6f}".rstrip("0").rstrip(".") or "0"
+
+
+def element(oid: int, name: str, mesh: np.ndarray, material: Optional[int]) -> str:
+    """
+    Serialize a mesh as an object resource.
+    """
+    vertices, faces = indexed(mesh)
+    properties = f' pid="1" pindex="{material}"' if material is not None else ""
+    lines = [f'  <object id="{oid}" type="model" name="{name}"{properties}>', "   <mesh>", "    <vertices>"]
+    lines += [f'     <vertex x="{number(x)}" y="{number(y)}" z="{number(z)}"/>' for x, y, z in vertices.tolist()]
+    lines += ["    </vertices>", "    <triangles>"]
+    lines += [f'     <triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in faces.tolist()]
+    lines += ["    </triangles>", "   </mesh>", "  </object>"]
+    return "\n".join(lines)
+
+
+def export(part: str, output: Path) -> dict:
+    """
+    Export a part as 3MF file and return the numbers of its distinct
+    meshes, objects and instances.
+    """
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+    root, header, _ = prepare(import_module(part).obj())
+
+    # Load each distinct mesh once, keyed by the digest of its tree.
+    loaded = {}
+    objects = {}
+    colors = {}
+    resources = []
+    items = []
+    for node, name, matrix, color in instances(root):
+        key = meshes.digest(node, header)
+        if key not in loaded:
+            loaded[key] = load(node, name, header)
+        mesh = loaded[key]
+        if mesh is None or len(mesh) == 0:
+            print(f"{part}: skipped {name or node.name}, it could not be rendered")
+            continue
+
+        # Mirrored instances are baked into their own mesh, as transforms
+        # of items must not flip the orientation of the triangles.
+        mirrored = np.linalg.det(matrix[:3, :3]) < 0
+        if mirrored:
+            mesh = triangles.transform(mesh, matrix)
+            matrix = np.eye(4)
+
+        material = colors.setdefault(color, len(colors)) if color else None
+        identity = (key, color, len(items) if mirrored else None)
+        if identity not in objects:
+            objects[identity] = len(objects) + 2
+            resources.append(element(objects[identity], name or node.name, mesh, material))
+        transform = " ".join(number(v) for v in [*matrix[:3, :3].T.flatten(), *matrix[:3, 3]])
+        items.append(f'  <item objectid="{objects[identity]}" transform="{transform}"/>')
+
+    materials = [f'   <base name="{color}" displaycolor="{color}"/>' for color in colors]
+    model = "\n".join(
+        [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<model unit="millimeter" xml:lang="en-US" xmlns="{NAMESPACE}">',
+            f' <metadata name="Title">{part}</metadata>',
+            " <resources>",
+            *(['  <basematerials id="1">', *materials, "  </basematerials>"] if materials else []),
+            *resources,
+            " </resources>",
+            " <build>",
+            *items,
+            " </build>",
+            "</model>",
+            "",
+        ]
+    )
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        archive.writestr("3D/3dmodel.model", model)
+
+    return {"meshes": sum(mesh is not None for mesh in loaded.values()), "objects": len(objects), "instances": len(items)}
+
+
+def main() -> int:
+    """
+    Export the given parts as 3MF files.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.threemf", description=__doc__)
+    parser.add_argument("parts", nargs="+", help="names of the parts to export")
+    parser.add_argument("-o", "--output", help="output file, defaults to build/3mf/<part>.3mf")
+    args = parser.parse_args()
+    if args.output and len(args.parts) > 1:
+        parser.error("an output file can only be given for a single part")
+
+    for part in args.parts:
+        start = perf_counter()
+        output = Path(args.output or f"build/3mf/{part}.3mf")
+        counts = export(part, output)
+        print(
+            f"{output}: {counts['meshes']} meshes, {counts['objects']} objects, "
+            f"{counts['instances']} instances ({perf_counter() - start:.2f}s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+"""
+Processing of triangle meshes as NumPy arrays, which allows to cut and
+move imported meshes without OpenSCAD having to convert them to CGAL
+polyhedra for boolean operations.
+
+A mesh is a triangle soup, i.e. an array of shape `(n, 3, 3)` holding
+the vertices of each triangle in counter-clockwise order when viewed
+from the outside, as in STL files.
+"""
+import re
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from solid import OpenSCADObject, objects
+
+# Record of a triangle in a binary STL file.
+RECORD = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")])
+
+# Size of the header of a binary STL file including the triangle count.
+HEADER = 84
+
+# Tolerance to treat vertices as lying on a cutting plane.
+EPSILON = 1e-7
+
+# Tolerance of the normals of triangles to treat them as parallel to an axis.
+PARALLEL = 1e-5
+
+# Number of decimals vertices are rounded to when welding them.
+DECIMALS = 6
+
+# Number of a floating point value in an ASCII STL file.
+NUMBER = rb"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+
+
+def empty() -> np.ndarray:
+    """
+    Create a mesh without any triangles.
+    """
+    return np.empty((0, 3, 3))
+
+
+def load(path) -> np.ndarray:
+    """
+    Load a binary or ASCII STL file. Binary files are memory-mapped, so
+    that only the triangles that are actually processed are read.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    with path.open("rb") as file:
+        header = file.read(HEADER)
+
+    # ASCII files may also start with `solid`, so rely on the file size instead.
+    if len(header) == HEADER:
+        count = int.from_bytes(header[80:], "little")
+        if size == HEADER + count * RECORD.itemsize:
+            if count == 0:
+                return empty()
+            records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER, shape=(count,))
+            return records["vertices"]
+
+    pattern = rb"vertex\s+(" + NUMBER + rb")\s+(" + NUMBER + rb")\s+(" + NUMBER + rb")"
+    values = re.findall(pattern, path.read_bytes())
+    return np.array(values, dtype=float).reshape(-1, 3, 3)
+
+
+def normals(mesh: np.ndarray) -> np.ndarray:
+    """
+    Compute the unit normals of the triangles of a mesh.
+    """
+    mesh = np.asarray(mesh, dtype=float)
+    cross = np.cross(mesh[:, 1] - mesh[:, 0], mesh[:, 2] - mesh[:, 0])
+    length = np.linalg.norm(cross, axis=1, keepdims=True)
+    return np.divide(cross, length, out=np.zeros_like(cross), where=length > 0)
+
+
+def save(mesh: np.ndarray, path) -> Path:
+    """
+    Write a mesh to a binary STL file and return its path.
+    """
+    records = np.zeros(len(mesh), dtype=RECORD)
+    records["normal"] = normals(mesh)
+    records["vertices"] = mesh
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as file:
+        file.write(b"\0" * 80)
+        file.write(len(mesh).to_bytes(4, "little"))
+        records.tofile(file)
+    return path
+
+
+def bounds(mesh: np.ndarray) -> Optional[tuple]:
+    """
+    Compute the bounding box of a mesh.
+    """
+    if len(mesh) == 0:
+        return None
+    points = np.asarray(mesh, dtype=float).reshape(-1, 3)
+    return tuple(points.min(axis=0)), tuple(points.max(axis=0))
+
+
+def volume(mesh: np.ndarray) -> float:
+    """
+    Compute the enclosed volume of a closed mesh via the divergence
+    theorem, which is positive for outward-facing triangles.
+    """
+    mesh = np.asarray(mesh, dtype=float)
+    if len(mesh) == 0:
+        return 0.0
+    return float(np.einsum("ij,ij->i", mesh[:, 0], np.cross(mesh[:, 1], mesh[:, 2])).sum() / 6)
+
+
+def translate(mesh: np.ndarray, offset) -> np.ndarray:
+    """
+    Move a mesh by the given offset.
+    """
+    return np.asarray(mesh, dtype=float) + np.asarray(offset, dtype=float)
+
+
+def transform(mesh: np.ndarray, matrix) -> np.ndarray:
+    """
+    Apply an affine 3x4 or 4x4 matrix to a mesh. Mirroring matrices
+    reverse the order of the vertices to keep the triangles outward.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    moved = np.asarray(mesh, dtype=float) @ matrix[:3, :3].T + matrix[:3, 3]
+    return moved[:, ::-1] if np.linalg.det(matrix[:3, :3]) < 0 else moved
+
+
+def merge(*meshes: np.ndarray) -> np.ndarray:
+    """
+    Combine several meshes or pieces of a surface into one. Closed meshes
+    must be disjoint, as no boolean operation is performed: touching
+    meshes leave coincident faces inside of the result, so that it is not
+    a manifold.
+    """
+    return np.concatenate([np.asarray(mesh, dtype=float).reshape(-1, 3, 3) for mesh in meshes] or [empty()])
+
+
+def cut(mesh: np.ndarray, origin, normal) -> np.ndarray:
+    """
+    Cut a closed mesh by a plane and keep the part behind the plane, i.e.
+    opposite of its normal. The opening is closed by a cap.
+    """
+    mesh = np.asarray(mesh, dtype=float)
+    origin = np.asarray(origin, dtype=float)
+    normal = np.asarray(normal, dtype=float)
+    normal = normal / np.linalg.norm(normal)
+
+    dist = (mesh - origin) @ normal
+    dist[np.abs(dist) < EPSILON] = 0
+
+    # Triangles on the plane are kept if they face away from the kept part.
+    coplanar = (dist == 0).all(axis=1)
+    keep = (dist <= 0).all(axis=1) & (~coplanar | (normals(mesh) @ normal > 0))
+    crossing = (dist < 0).any(axis=1) & (dist > 0).any(axis=1)
+
+    # Split the clipped quads into two triangles.
+    polygons, on, count = clip(mesh[crossing], dist[crossing])
+    pieces = [mesh[keep], polygons[:, :3], polygons[count == 4][:, [0, 2, 3]]]
+
+    # Collect the directed edges on the plane of all kept pieces.
+    starts, ends = [], []
+    kept, flags = mesh[keep], dist[keep] == 0
+    for i in range(3):
+        edge = flags[:, i] & flags[:, (i + 1) % 3]
+        starts.append(kept[edge, i])
+        ends.append(kept[edge, (i + 1) % 3])
+    rows = np.arange(len(polygons))
+    for i in range(4):
+        following = np.where(i + 1 < count, i + 1, 0)
+        edge = (i < count) & on[:, i] & on[rows, following]
+        starts.append(polygons[edge, i])
+        ends.append(polygons[rows, following][edge])
+    starts, ends = np.concatenate(starts), np.concatenate(ends)
+
+    # The cap is bounded by the edges on the plane that are not shared
+    # by two kept pieces, reversed to face outwards.
+    pending = {}
+    for edge in zip(keys(starts), keys(ends), range(len(starts))):
+        reverse = pending.get((edge[1], edge[0]))
+        if reverse:
+            reverse.pop()
+        else:
+            pending.setdefault(edge[:2], []).append(edge[2])
+    boundary = [i for indices in pending.values() for i in indices]
+
+    return merge(*pieces, fill(ends[boundary], starts[boundary], normal))
+
+
+def clip(mesh: np.ndarray, dist: np.ndarray) -> tuple:
+    """
+    Clip triangles crossing the cutting plane to the part behind the
+    plane. Returns the resulting polygons padded to four vertices,
+    whether their vertices lie on the plane and their vertex counts.
+    """
+    slots = np.zeros((len(mesh), 6, 3))
+    valid = np.zeros((len(mesh), 6), dtype=bool)
+    on = np.ones((len(mesh), 6), dtype=bool)
+    for i in range(3):
+        j = (i + 1) % 3
+        slots[:, 2 * i] = mesh[:, i]
+        valid[:, 2 * i] = dist[:, i] <= 0
+        on[:, 2 * i] = dist[:, i] == 0
+        slots[:, 2 * i + 1] = intersect(mesh[:, i], mesh[:, j], dist[:, i], dist[:, j])
+        valid[:, 2 * i + 1] = dist[:, i] * dist[:, j] < 0
+
+    # Move the vertices of each polygon to the front, keeping their order.
+    order = np.argsort(~valid, axis=1, kind="stable")[:, :4]
+    rows = np.arange(len(mesh))[:, None]
+    return slots[rows, order], on[rows, order], valid.sum(axis=1)
+
+
+def intersect(a: np.ndarray, b: np.ndarray, da: np.ndarray, db: np.ndarray) -> np.ndarray:
+    """
+    Compute the intersections of edges with the cutting plane. The
+    endpoints are ordered, so that both triangles sharing an edge
+    yield exactly the same point.
+    """
+    swap = np.zeros(len(a), dtype=bool)
+    decided = np.zeros(len(a), dtype=bool)
+    for k in range(3):
+        swap |= ~decided & (a[:, k] > b[:, k])
+        decided |= a[:, k] != b[:, k]
+    a, b = np.where(swap[:, None], b, a), np.where(swap[:, None], a, b)
+    da, db = np.where(swap, db, da), np.where(swap, da, db)
+
+    denominator = da - db
+    t = np.divide(da, denominator, out=np.zeros_like(da), where=denominator != 0)
+    return a + (b - a) * t[:, None]
+
+
+def keys(points: np.ndarray) -> list:
+    """
+    Derive the keys of vertices to weld them with coincident vertices.
+    """
+    return list(map(tuple, (np.round(points, DECIMALS) + 0.0).tolist()))
+
+
+def fill(starts: np.ndarray, ends: np.ndarray, normal: np.ndarray) -> np.ndarray:
+    """
+    Triangulate the planar polygons bounded by the given directed edges,
+    such that the triangles face along the normal. Outer boundaries run
+    counter-clockwise and holes clockwise around the normal.
+    """
+    if len(starts) == 0:
+        return empty()
+
+    # Chain the edges into closed loops.
+    following = {}
+    for start, index in zip(keys(starts), range(len(starts))):
+        following.setdefault(start, []).append(index)
+    targets = keys(ends)
+    loops = []
+    while following:
+        first = next(iter(following))
+        loop = []
+        current = first
+        while current in following:
+            index = following[current].pop()
+            if not following[current]:
+                del following[current]
+            loop.append(index)
+            current = targets[index]
+            if current == first:
+                break
+        if len(loop) >= 3:
+            loops.append(ends[loop[-1:] + loop[:-1]])
+
+    # Project the loops onto the plane, such that the normal points towards the viewer.
+    axis = np.eye(3)[np.argmin(np.abs(normal))]
+    u = np.cross(axis, normal)
+    u /= np.linalg.norm(u)
+    v = np.cross(normal, u)
+    flat = [loop @ np.array([u, v]).T for loop in loops]
+
+    # Assign each hole to the smallest outer boundary containing it.
+    areas = [area(loop) for loop in flat]
+    outers = [i for i, size in enumerate(areas) if size > 0]
+    holes = {i: [] for i in outers}
+    for i, loop in enumerate(flat):
+        if areas[i] < 0:
+            parents = [j for j in outers if inside(loop[0], flat[j])]
+            if parents:
+                holes[min(parents, key=lambda j: areas[j])].append(i)
+
+    triangles = []
+    for i in outers:
+        points, indices = bridge(flat, loops, i, holes[i])
+        vertices = np.array([q for _, q in points])
+        triangles += [vertices[list(ear)] for ear in earcut(np.array([p for p, _ in points]), indices)]
+
+    return np.array(triangles).reshape(-1, 3, 3)
+
+
+def area(loop: np.ndarray) -> float:
+    """
+    Compute the signed area of a 2D polygon, which is positive if it
+    runs counter-clockwise.
+    """
+    x, y = loop[:, 0], loop[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def inside(point: np.ndarray, loop: np.ndarray) -> bool:
+    """
+    Check whether a 2D point lies inside a polygon via ray casting.
+    """
+    x, y = point
+    result = False
+    for (x0, y0), (x1, y1) in zip(loop, np.roll(loop, -1, axis=0)):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            result = not result
+    return result
+
+
+def crosses(p: np.ndarray, q: np.ndarray, a: np.ndarray, b: np.ndarray) -> bool:
+    """
+    Check whether two 2D segments properly intersect.
+    """
+
+    def side(o, s, t):
+        return np.sign((s[0] - o[0]) * (t[1] - o[1]) - (s[1] - o[1]) * (t[0] - o[0]))
+
+    return side(p, q, a) * side(p, q, b) < 0 and side(a, b, p) * side(a, b, q) < 0
+
+
+def bridge(flat: list, loops: list, outer: int, holes: list) -> tuple:
+    """
+    Merge the holes into their outer boundary by connecting each hole to
+    a visible vertex of the boundary. Returns the vertices as tuples of
+    the 2D and the 3D point and the order they are visited in.
+    """
+    points = [(p, q) for p, q in zip(flat[outer], loops[outer])]
+    indices = list(range(len(points)))
+    segments = [(flat[h][k], flat[h][(k + 1) % len(flat[h])]) for h in holes for k in range(len(flat[h]))]
+
+    # Holes are merged from right to left, so that bridges do not cross.
+    for h in sorted(holes, key=lambda h: -flat[h][:, 0].max()):
+        start = int(np.argmax(flat[h][:, 0]))
+        m = flat[h][start]
+        offset = len(points)
+        points += [(p, q) for p, q in zip(flat[h], loops[h])]
+
+        # Pick the closest vertex of the boundary that is visible from the hole.
+        candidates = sorted(range(len(indices)), key=lambda k: np.linalg.norm(points[indices[k]][0] - m))
+        edges = [(points[indices[k]][0], points[indices[(k + 1) % len(indices)]][0]) for k in range(len(indices))]
+        target = candidates[0]
+        for k in candidates:
+            p = points[indices[k]][0]
+            if not any(crosses(m, p, a, b) for a, b in edges + segments):
+                target = k
+                break
+
+        # Duplicate both ends of the bridge, so that each vertex is visited once.
+        ring = [offset + (start + k) % len(flat[h]) for k in range(len(flat[h]))]
+        points += [points[ring[0]], points[indices[target]]]
+        indices = indices[: target + 1] + ring + [len(points) - 2, len(points) - 1] + indices[target + 1 :]
+
+    return points, indices
+
+
+def earcut(points: np.ndarray, indices: list) -> list:
+    """
+    Triangulate a simple counter-clockwise 2D polygon via ear clipping.
+    Returns the triangles as triples of indices.
+    """
+    # Plain floats are much faster than NumPy scalars for single points.
+    points = [tuple(p) for p in np.asarray(points).tolist()]
+
+    def cross(a, b, c):
+        return (points[b][0] - points[a][0]) * (points[c][1] - points[a][1]) - (
+            points[b][1] - points[a][1]
+        ) * (points[c][0] - points[a][0])
+
+    def blocked(a, b, c):
+        # Check whether a reflex vertex lies within the ear, skipping those
+        # outside of its bounding box and those coinciding with its corners.
+        corners = {points[a], points[b], points[c]}
+        xs, ys = zip(*corners)
+        for p in reflex:
+            x, y = points[p]
+            if x < min(xs) or x > max(xs) or y < min(ys) or y > max(ys) or points[p] in corners:
+                continue
+            if cross(a, b, p) >= 0 and cross(b, c, p) >= 0 and cross(c, a, p) >= 0:
+                return True
+        return False
+
+    def corner(i):
+        return cross(ring[i - 1], ring[i], ring[(i + 1) % len(ring)])
+
+    # Only reflex vertices can lie inside an ear.
+    ring = list(indices)
+    reflex = {ring[i] for i in range(len(ring)) if corner(i) <= 0}
+
+    ears = []
+    i = misses = 0
+    while len(ring) > 3:
+        if misses > len(ring):
+            # Clip the most convex vertex on degenerate input, unless all
+            # remaining vertices are collinear.
+            i = max(range(len(ring)), key=corner)
+            if corner(i) < EPSILON:
+                break
+        else:
+            i %= len(ring)
+            a, b, c = ring[i - 1], ring[i], ring[(i + 1) % len(ring)]
+            if corner(i) < EPSILON or blocked(a, b, c):
+                i += 1
+                misses += 1
+                continue
+
+        ears.append((ring[i - 1], ring[i], ring[(i + 1) % len(ring)]))
+        reflex.discard(ring.pop(i))
+        misses = 0
+
+        # The neighbours of the clipped vertex may have become convex.
+        i = (i - 1) % len(ring)
+        for j in (i, (i + 1) % len(ring)):
+            if corner(j) > 0:
+                reflex.discard(ring[j])
+
+    if len(ring) == 3 and abs(cross(*ring)) >= EPSILON:
+        ears.append(tuple(ring))
+    return ears
+
+
+def subtract(mesh: np.ndarray, lo, hi) -> np.ndarray:
+    """
+    Subtract a box from a mesh. The box must span the entire mesh along
+    all but one axis, so that the difference can be computed by cutting
+    the mesh by two planes.
+    """
+    extent = bounds(mesh)
+    if extent is None:
+        return empty()
+
+    partial = [i for i in range(3) if lo[i] > extent[0][i] or hi[i] < extent[1][i]]
+    if len(partial) > 1:
+        raise ValueError("box must span the mesh along all but one axis")
+    if not partial:
+        return empty()
+
+    axis = partial[0]
+    direction = np.eye(3)[axis]
+    parts = []
+    if lo[axis] > extent[0][axis]:
+        parts.append(cut(mesh, lo, direction))
+    if hi[axis] < extent[1][axis]:
+        parts.append(cut(mesh, hi, -direction))
+    return merge(*parts)
+
+
+def shorten(mesh: np.ndarray, axis: int, lo: float, hi: float) -> np.ndarray:
+    """
+    Remove the slab between two planes orthogonal to an axis and close the
+    gap by moving the part of the mesh beyond it. The mesh must be a prism
+    along the axis within the slab, i.e. no vertex lies within the slab and
+    all triangles crossing it are parallel to the axis. Then these walls
+    are merely shortened, so that the mesh stays closed.
+    """
+    mesh = np.array(mesh, dtype=float)
+    coords = mesh[..., axis]
+    if ((coords > lo + EPSILON) & (coords < hi - EPSILON)).any():
+        raise ValueError("mesh has vertices within the slab")
+    crossing = (coords <= lo + EPSILON).any(axis=1) & (coords >= hi - EPSILON).any(axis=1)
+    if (np.abs(normals(mesh[crossing])[:, axis]) > PARALLEL).any():
+        raise ValueError("mesh is not a prism along the axis within the slab")
+
+    coords[coords >= hi - EPSILON] -= hi - lo
+    return mesh
+
+
+def polyhedron(mesh: np.ndarray) -> OpenSCADObject:
+    """
+    Convert a mesh to an OpenSCAD polyhedron with welded vertices.
+    """
+    points, faces = np.unique(
+        np.round(np.asarray(mesh, dtype=float).reshape(-1, 3), DECIMALS), axis=0, return_inverse=True
+    )
+    # OpenSCAD expects the faces in clockwise order when viewed from the outside.
+    faces = faces.reshape(-1, 3)[:, ::-1]
+    return objects.polyhedron(points=points.tolist(), faces=faces.tolist())
@@ -1,30 +1,137 @@
 """
 Utilities for building the SCAD files and creating objects.
 """
+from functools import wraps
 from os import getenv
 from pathlib import Path
-from solid import OpenSCADObject, scad_render_to_file, import_
+from typing import Optional
+from solid import OpenSCADObject, import_, union
+from . import boxes, deps, instrument, meshes, scad
+from .adm import chordal_error, fragments, segments as adaptive_segments
+from .csg import cull, disjoint, share, tessellate
 
+# Builders of all parts that were declared via `part`, keyed by part name.
+PARTS = {}
 
-def build(obj, script, segments=32):
+# Quality tiers, which can be selected via the `QUALITY` environment variable.
+QUALITIES = ("draft", "production")
+
+# Factor to coarsen the tessellation by in draft quality.
+DRAFT_COARSENING = 8
+
+
+def quality() -> str:
+    """
+    Retrieve the quality tier of the build, which defaults to production.
+    """
+    tier = getenv("QUALITY", "production")
+    if tier not in QUALITIES:
+        raise ValueError(f"unknown quality {tier}, expected one of {', '.join(QUALITIES)}")
+    return tier
+
+
+def draft() -> bool:
     """
-    Renders an OpenSCAD object to a file in the build directory.
+    Check whether the build is a draft, which skips cosmetic details
+    to speed up previews.
+    """
+    return quality() == "draft"
+
+
+def cosmetic(obj: OpenSCADObject) -> OpenSCADObject:
+    """
+    Mark an object as a cosmetic detail, which is omitted in drafts.
+    """
+    return union() if draft() else obj
+
+
+def circle_segments(radius: float) -> int:
+    """
+    The number of segments of a full circle of the given radius in the
+    quality tier of the build, where drafts use low-poly proxies.
+    """
+    error = chordal_error() * (DRAFT_COARSENING if draft() else 1)
+    return adaptive_segments(radius, error)
+
+
+def prepare(obj, segments=None) -> tuple:
+    """
+    Apply the output resolution to an OpenSCAD object. Returns the object,
+    the header of its SCAD file and the fixed number of segments, if any.
     """
     # Fetch output resolution.
     resolution = getenv("RESOLUTION")
     if resolution is not None:
         segments = int(resolution)
 
+    # Derive the number of segments of round primitives from their radius,
+    # unless a fixed resolution is requested.
+    if segments is None:
+        fa, fs = fragments()
+        return tessellate(obj, circle_segments), f"$fa = {fa:.4f};\n$fs = {fs};", None
+    return obj, f"$fn = {segments};", segments
+
+
+def build(obj, script, segments=None, directory="build/scad"):
+    """
+    Renders an OpenSCAD object to a file in the build directory and
+    returns the emitted tree.
+    """
+    obj, header, segments = prepare(obj, segments)
+
     # Replace file extension of the invoked Python file.
     filename = script.split("/")[-1].replace(".py", ".scad")
 
-    # Render script to output file.
-    scad_render_to_file(
-        obj,
-        f"build/scad/{filename}",
-        file_header=f"$fn = {segments};",
-        include_orig_code=False,
-    )
+    # Track dependencies before writing the output to keep it up to date,
+    # unless the script is not part of the source directory.
+    if deps.source(Path(script).stem) is not None:
+        deps.write(script, f"{directory}/{filename}")
+
+    # Record the tree the SCAD file is generated from, so that assemblies
+    # can tell whether the rendered mesh of the part is up to date.
+    tree = meshes.digest(obj, header)
+
+    # Place the meshes of the parts contained in assemblies.
+    if meshes.assembly():
+        obj, reused, rendered = meshes.assemble(obj, header)
+        if reused or rendered:
+            print(f"{filename}: {reused} part meshes reused, {rendered} rendered")
+
+    # Reuse the cached meshes of features shared across parts.
+    if meshes.enabled():
+        obj, hits, misses = meshes.substitute(obj, header)
+        if hits or misses:
+            print(f"{filename}: mesh cache {hits} hits, {misses} misses")
+
+    # Drop boolean operations that cannot intersect.
+    obj, culled = cull(obj)
+    for line in culled:
+        print(f"{filename}: {line}")
+    for count in disjoint(obj):
+        print(f"{filename}: union of {count} disjoint bodies kept, as OpenSCAD cannot skip its boolean")
+
+    # Evaluate subtrees of boxes in Python, so that OpenSCAD skips CGAL for them.
+    if boxes.enabled():
+        obj, evaluated = boxes.substitute(obj)
+        print(f"{filename}: {evaluated} box subtrees evaluated in Python")
+
+    # Emit repeated subtrees once as shared modules.
+    emitted = obj
+    obj, modules = share(obj)
+
+    # Pin the geometry backend and the render limits of the part for `lib.openscad`.
+    settings = getattr(PARTS.get(Path(script).stem), "pins", {})
+    pins = [f"// {key}: {value}" for key, value in settings.items() if value is not None]
+
+    # Stream the program to the output file, see `lib/scad.py`.
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    scad.write(obj, f"{directory}/{filename}", "\n".join([*pins, f"// tree: {tree}", header]), modules)
+
+    # Attribute the emitted tree to the source lines of the part.
+    if instrument.enabled():
+        instrument.record(Path(script).stem, emitted, segments, Path(f"{directory}/{filename}"))
+
+    return obj
 
 
 def stl(path: str, convexity: int = 4) -> OpenSCADObject:
@@ -34,6 +141,60 @@ def stl(path: str, convexity: int = 4) -> OpenSCADObject:
     return import_(str(Path(path).resolve()), convexity=convexity)
 
 
+def feature(func):
+    """
+    Mark the objects created by a function as a reusable feature, whose
+    mesh may be cached and shared across parts, see `lib/meshes.py`.
+    """
+
+    @wraps(func)
+    def create(*args, **kwargs) -> OpenSCADObject:
+        obj = func(*args, **kwargs)
+        obj.add_trait("feature", {"name": func.__name__})
+        return obj
+
+    return create
+
+
+def part(
+    func=None,
+    *,
+    backend: Optional[str] = None,
+    timeout: Optional[float] = None,
+    memory: Optional[float] = None,
+):
+    """
+    Declare the builder of a part. The geometry is only constructed on
+    the first call and memoized per set of parameters, so that importing
+    a part for its dimensions does not construct any geometry. Parts
+    may pin the geometry backend via `@part(backend="cgal")` as well as
+    the time limit in seconds and the memory limit in megabytes of their
+    renders via `@part(timeout=600, memory=4096)`. The geometry is marked
+    with the name of the part, so that assemblies can place its mesh.
+    """
+    if func is None:
+        return lambda func: part(func, backend=backend, timeout=timeout, memory=memory)
+
+    memo = {}
+    # Parts run as scripts are named `__main__`, hence use the file name.
+    name = Path(func.__code__.co_filename).stem
+
+    @wraps(func)
+    def obj(*args, **kwargs) -> OpenSCADObject:
+        # The geometry also depends on the tier and resolution of the build.
+        key = (quality(), getenv("RESOLUTION"), args, tuple(sorted(kwargs.items())))
+        if key not in memo:
+            with instrument.instrumented():
+                memo[key] = func(*args, **kwargs)
+            memo[key].add_trait("part", {"name": name})
+        return memo[key]
+
+    obj.cache_clear = memo.clear
+    obj.pins = {"backend": backend, "timeout": timeout, "memory": memory}
+    PARTS[name] = obj
+    return obj
+
+
 def combine(*transforms: OpenSCADObject):
     """
     Combine an object with the list of transforms.
@@ -0,0 +1,250 @@
+"""
+An incremental watch mode, which regenerates and renders only the parts
+affected by changes to the source directory.
+
+Changes are reported by `inotifywait` if available, or else by polling
+the modification times. Bursts of changes are debounced and filtered to
+Python sources. The changed files are mapped through the import graph of
+`lib.deps` to the affected parts, where changes to `lib` only affect the
+parts using a changed symbol. Their SCAD files are regenerated in-process
+via `lib.daemon` and their renders are restarted, cancelling the renders
+that became stale. The `preview` format is rendered without OpenSCAD via
+`lib.sdf`, which takes well under a second per part.
+
+Usage: PYTHONPATH=src python3 -m lib.watch netstack_v1_assembly.stl seeed_cm4rt_case.preview
+"""
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+from argparse import ArgumentParser
+from datetime import datetime
+from importlib import import_module
+from pathlib import Path
+from shutil import which
+from tempfile import TemporaryFile
+from time import sleep
+from .daemon import Generator
+from .deps import SRC_DIR
+
+# Seconds without further changes after which a burst of changes is handled.
+DEBOUNCE = 0.2
+
+# Interval in seconds to scan for changes if `inotifywait` is unavailable.
+POLL_INTERVAL = 0.5
+
+# Formats that can be rendered, besides transpiling to SCAD only.
+FORMATS = ("stl", "png", "preview")
+
+
+def relevant(path: Path) -> bool:
+    """
+    Check whether a changed file may affect any part, which skips caches
+    and temporary files of editors.
+    """
+    return path.suffix == ".py" and "__pycache__" not in path.parts and not path.name.startswith((".", "#"))
+
+
+def command(part: str, fmt: str) -> list:
+    """
+    Build the command rendering a part to the given format.
+    """
+    if fmt == "preview":
+        return [sys.executable, "-m", "lib.sdf", "-o", f"build/preview/{part}.png", part]
+    return [sys.executable, "-m", "lib.openscad", "-o", f"build/{fmt}/{part}.{fmt}", f"build/scad/{part}.scad"]
+
+
+def inotify(events: queue.Queue):
+    """
+    Report changed files via `inotifywait`.
+    """
+    args = ["inotifywait", "-mrq", "-e", "close_write,moved_to,delete", "--format", "%w%f", str(SRC_DIR)]
+    with subprocess.Popen(args, stdout=subprocess.PIPE, text=True) as proc:
+        for line in proc.stdout:
+            events.put(Path(line.rstrip("\n")))
+
+
+def poll(events: queue.Queue):
+    """
+    Report changed files by polling their modification times.
+    """
+    def scan() -> dict:
+        return {path: path.stat().st_mtime_ns for path in SRC_DIR.rglob("*.py")}
+
+    before = scan()
+    while True:
+        sleep(POLL_INTERVAL)
+        after = scan()
+        for path in before.keys() | after.keys():
+            if before.get(path) != after.get(path):
+                events.put(path)
+        before = after
+
+
+def collect(events: queue.Queue, timeout: float) -> set:
+    """
+    Wait for a change and collect the burst of changes following it.
+    Returns an empty set if nothing changed within the timeout.
+    """
+    try:
+        changed = {events.get(timeout=timeout)}
+    except queue.Empty:
+        return set()
+    while True:
+        try:
+            changed.add(events.get(timeout=DEBOUNCE))
+        except queue.Empty:
+            return {path.resolve() for path in changed if relevant(path)}
+
+
+class Watcher:
+    """
+    Tracks the fingerprints of the library symbols used by the parts and
+    the in-flight renders.
+    """
+
+    def __init__(self, targets: dict, jobs: int):
+        self.targets = targets
+        self.jobs = jobs
+        self.generator = Generator()
+        self.digests = {}
+        self.pending = []
+        self.renders = {}
+
+    def parts(self) -> list:
+        """
+        Retrieve the watched parts, which are all parts unless specified.
+        """
+        return sorted(self.targets) if self.targets else import_module("lib.build").discover()
+
+    def affected(self, changed: set) -> set:
+        """
+        Map the changed files to the parts that depend on them, where
+        parts using library symbols are only affected if the fingerprint
+        of a symbol changed.
+        """
+        deps = import_module("lib.deps")
+        deps.bindings.cache_clear()
+        deps.module_files.cache_clear()
+
+        parts = set()
+        digests = {}
+        for part in self.parts():
+            if deps.source(part) is None:
+                continue
+            files, symbols = deps.dependencies(part)
+            if files & changed:
+                parts.add(part)
+            for symbol in symbols:
+                if symbol not in digests:
+                    module, _, name = symbol.rpartition(".")
+                    digests[symbol] = deps.fingerprint(module, name)[0]
+                if digests[symbol] != self.digests.get(symbol, digests[symbol]):
+                    parts.add(part)
+
+        self.digests.update(digests)
+        return parts
+
+    def cancel(self, part: str):
+        """
+        Cancel the pending and in-flight renders of a part.
+        """
+        self.pending = [(p, fmt) for p, fmt in self.pending if p != part]
+        for (p, fmt), (proc, _) in list(self.renders.items()):
+            if p == part:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait()
+                del self.renders[(p, fmt)]
+                print(f"[{fmt}] {part} cancelled")
+
+    def update(self, parts: set):
+        """
+        Regenerate the SCAD files of the parts and queue their renders.
+        """
+        for part in sorted(parts):
+            self.cancel(part)
+            response = self.generator.generate(part, dict(os.environ), os.getcwd())
+            if response["code"] != 0:
+                print(response["output"], end="")
+            print(f"[scad] {part} {'ok' if response['code'] == 0 else 'failed'} ({response['elapsed']:.2f}s)")
+            if response["code"] == 0:
+                self.pending += [(part, fmt) for fmt in self.targets.get(part, ["stl"]) if fmt in FORMATS]
+
+    def step(self):
+        """
+        Report finished renders and start pending ones.
+        """
+        for (part, fmt), (proc, log) in list(self.renders.items()):
+            if proc.poll() is None:
+                continue
+            del self.renders[(part, fmt)]
+            if proc.returncode != 0:
+                log.seek(0)
+                print(log.read(), end="")
+            log.close()
+            print(f"[{fmt}] {part} {'ok' if proc.returncode == 0 else f'failed ({proc.returncode})'}")
+
+        while self.pending and len(self.renders) < self.jobs:
+            part, fmt = self.pending.pop(0)
+            Path(f"build/{fmt}").mkdir(parents=True, exist_ok=True)
+            log = TemporaryFile(mode="w+")
+            args = command(part, fmt)
+            env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+            # Start a new session to cancel OpenSCAD along with the wrapper.
+            proc = subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT, env=env, start_new_session=True)
+            self.renders[(part, fmt)] = (proc, log)
+
+    def shutdown(self):
+        """
+        Cancel all renders.
+        """
+        for part in {part for part, _ in self.renders}:
+            self.cancel(part)
+
+
+def main() -> int:
+    """
+    Watch the source directory and rebuild the affected parts.
+    """
+    parser = ArgumentParser(prog="python3 -m lib.watch", description=__doc__)
+    parser.add_argument("targets", nargs="*", help="parts to watch with an optional format suffix, defaults to all")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of parallel renders")
+    args = parser.parse_args()
+
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+    targets = {}
+    for target in args.targets:
+        part, _, fmt = target.partition(".")
+        targets.setdefault(part, []).append(fmt or "stl")
+
+    events = queue.Queue()
+    source = inotify if which("inotifywait") else poll
+    threading.Thread(target=source, args=(events,), daemon=True).start()
+
+    watcher = Watcher(targets, args.jobs)
+    watcher.update(set(watcher.parts()))
+    watcher.affected(set())
+    print(f"Watching {SRC_DIR} via {'inotifywait' if source is inotify else 'polling'}")
+
+    try:
+        while True:
+            watcher.step()
+            changed = collect(events, 0.1)
+            if not changed:
+                continue
+            print(f"\n[{datetime.now():%H:%M:%S}] {', '.join(sorted(os.path.relpath(p, SRC_DIR) for p in changed))}")
+            parts = watcher.affected(changed)
+            if not parts:
+                print("No parts affected")
+            watcher.update(parts)
+    except KeyboardInterrupt:
+        watcher.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@ A test file to calibrate 3D-printing shrinkage.
 """
 from solid import OpenSCADObject, cube
 from solid.objects import translate, color
-from lib.utils import build, combine
+from lib.utils import build, combine, part
 from lib.units import rxxu, rxxr, r19o
 
 # Design parameters.
@@ -19,25 +19,27 @@ case_x = r5s_x + 2 * brim
 case_y = r5s_y + 2 * brim
 case_z = brim
 
-solid = combine(
-    cube([case_x, case_y, case_z]),
-    translate([0, 0, 0]),
-    color("#333"),
-)
-
 pocket_x = r5s_x + 2 * tol_xy
 pocket_y = r5s_y + 2 * tol_xy
 pocket_z = r5s_z
 
-solid -= combine(
-    cube([pocket_x, pocket_y, pocket_z + 2]),
-    translate([brim - (tol_xy / 2), brim - (tol_xy / 2), -1]),
-)
 
+@part
 def obj() -> OpenSCADObject:
     """
     Retrieve part object when importing it into assemblies or similar.
     """
+    solid = combine(
+        cube([case_x, case_y, case_z]),
+        translate([0, 0, 0]),
+        color("#333"),
+    )
+
+    solid -= combine(
+        cube([pocket_x, pocket_y, pocket_z + 2]),
+        translate([brim - (tol_xy / 2), brim - (tol_xy / 2), -1]),
+    )
+
     return solid
 
 
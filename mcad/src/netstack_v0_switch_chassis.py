@@ -3,61 +3,64 @@ A chassis to hold two network switch cases.
 """
 from math import floor
 from solid import cube, translate, OpenSCADObject
-from lib.utils import build, combine
+from lib.utils import build, combine, part
 from lib.units import rxxu
-from lib.features import corners
+from lib.features import corners, linear_pattern
 
 # Define body solid.
 X = 200
 Y = 150
 Z = floor(rxxu(1))
-solid = cube([X, Y, Z])
 
-# Create slot for network switch.
-SX = 163
-SY = Y
-SZ = 28
-solid -= combine(
-    cube([SX, SY + 2, SZ]),
-    translate([(X - SX) / 2, -1, (Z - SZ) / 2]),
-)
 
-# Create slot for foam padding.
-FT = 5
-FX = SX + FT * 2
-FY = SY + FT * 2
-FZ = SZ + FT * 2
-solid -= combine(
-    cube([FX, FY, FZ]),
-    translate([(X - FX) / 2, 20, (Z - FZ) / 2]),
-)
+@part
+def obj() -> OpenSCADObject:
+    """
+    Retrieve part object when importing it into assemblies or similar.
+    """
+    solid = cube([X, Y, Z])
 
-# Create corners for assembly.
-solid -= corners(X, Y)
+    # Create slot for network switch.
+    SX = 163
+    SY = Y
+    SZ = 28
+    solid -= combine(
+        cube([SX, SY + 2, SZ]),
+        translate([(X - SX) / 2, -1, (Z - SZ) / 2]),
+    )
 
-# Add notches to lock switch in place.
-NX = (FX - SX) / 2 + 15
-NY = 102
-for i in range(2):
-    solid += combine(
-        cube([NX, Y - NY, Z]),
-        translate([(X - FX) / 2 + i * (FX - NX), NY, 0]),
+    # Create slot for foam padding.
+    FT = 5
+    FX = SX + FT * 2
+    FY = SY + FT * 2
+    FZ = SZ + FT * 2
+    solid -= combine(
+        cube([FX, FY, FZ]),
+        translate([(X - FX) / 2, 20, (Z - FZ) / 2]),
     )
 
-# Create slot for back cover.
-BX = FX - NX * 2 + 2 * 2
-BY = 2
-BZ = FZ
-solid -= combine(
-    cube([BX, BY, BZ]),
-    translate([(X - BX) / 2, Y - BY * 2, (Z - FZ) / 2]),
-)
+    # Create corners for assembly.
+    solid -= corners(X, Y)
+
+    # Add notches to lock switch in place.
+    NX = (FX - SX) / 2 + 15
+    NY = 102
+    solid += linear_pattern(
+        cube([NX, Y - NY, Z]),
+        2,
+        [FX - NX, 0, 0],
+        [(X - FX) / 2, NY, 0],
+    )
 
+    # Create slot for back cover.
+    BX = FX - NX * 2 + 2 * 2
+    BY = 2
+    BZ = FZ
+    solid -= combine(
+        cube([BX, BY, BZ]),
+        translate([(X - BX) / 2, Y - BY * 2, (Z - FZ) / 2]),
+    )
 
-def obj() -> OpenSCADObject:
-    """
-    Retrieve part object when importing it into assemblies or similar.
-    """
     return solid
 
 
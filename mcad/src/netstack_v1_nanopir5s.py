@@ -5,7 +5,7 @@ from solid import OpenSCADObject, polygon
 from solid.objects import color
 from solid.utils import linear_extrude
 from euclid3 import Point2
-from lib.utils import build, combine
+from lib.utils import build, combine, part
 from lib.features import arc2d
 
 # Nanopi R5S dimensions.
@@ -14,23 +14,25 @@ r5s_y = 68
 r5s_z = 30
 r5s_r = 4
 
-solid = combine(
-    polygon(
-        [
-            *arc2d(Point2(r5s_r, r5s_r), r5s_r, 180, 270),
-            *arc2d(Point2(r5s_x - r5s_r,  r5s_r), r5s_r, 270, 360),
-            *arc2d(Point2(r5s_x - r5s_r, r5s_y - r5s_r), r5s_r, 0, 90),
-            *arc2d(Point2(r5s_r, r5s_y - r5s_r), r5s_r, 90, 180),
-        ],
-    ),
-    linear_extrude(r5s_z),
-    color("#333"),
-)
 
+@part
 def obj() -> OpenSCADObject:
     """
     Retrieve part object when importing it into assemblies or similar.
     """
+    solid = combine(
+        polygon(
+            [
+                *arc2d(Point2(r5s_r, r5s_r), r5s_r, 180, 270),
+                *arc2d(Point2(r5s_x - r5s_r,  r5s_r), r5s_r, 270, 360),
+                *arc2d(Point2(r5s_x - r5s_r, r5s_y - r5s_r), r5s_r, 0, 90),
+                *arc2d(Point2(r5s_r, r5s_y - r5s_r), r5s_r, 90, 180),
+            ],
+        ),
+        linear_extrude(r5s_z),
+        color("#333"),
+    )
+
     return solid
 
 
@@ -0,0 +1,62 @@
+"""
+Tests of the benchmark suite, measured on an assembly of stub parts.
+"""
+import sys
+import unittest
+from os import chdir, getcwd
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from lib import benchmark, features
+
+BOARD = '''
+from solid import polygon
+from lib.features import arc2d
+from lib.utils import part
+
+BUILDS = []
+
+
+@part
+def obj():
+    BUILDS.append(1)
+    return polygon(arc2d(radius=5, segments=16))
+'''
+
+ASSEMBLY = '''
+from solid import cube
+from lib.utils import part
+import bench_board
+
+
+@part
+def obj():
+    return cube(1) + bench_board.obj()
+'''
+
+
+class MeasureTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        (Path(tmp.name) / "bench_board.py").write_text(BOARD)
+        (Path(tmp.name) / "bench_assembly.py").write_text(ASSEMBLY)
+        sys.path.insert(0, tmp.name)
+        self.addCleanup(sys.path.remove, tmp.name)
+        self.addCleanup(chdir, getcwd())
+        chdir(tmp.name)
+        for name in ("bench_board", "bench_assembly"):
+            self.addCleanup(sys.modules.pop, name, None)
+            self.addCleanup(benchmark.PARTS.pop, name, None)
+
+    def test_repetitions_rebuild_parts_of_assemblies(self):
+        results = benchmark.measure("bench_assembly", "8", [], 3, True)
+        self.assertEqual(len(sys.modules["bench_board"].BUILDS), 3)
+        # Clearing the arcs also resets their statistics.
+        info = features.arc_points.cache_info()
+        self.assertEqual((info.hits, info.misses), (0, 1))
+        self.assertEqual(results[0]["part"], "bench_assembly")
+        self.assertIsNone(results[0]["backend"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests of the analytic boolean engine for axis-aligned boxes.
+"""
+import unittest
+import numpy as np
+from solid import cube, difference, translate, union
+from lib import boxes
+
+
+def mesh(polyhedron) -> np.ndarray:
+    """
+    Triangulate the faces of a polyhedron, which are listed clockwise when
+    viewed from outside, into outward-facing triangles.
+    """
+    points = np.array(polyhedron.params["points"], dtype=float)
+    triangles = [(ring[0], ring[i + 1], ring[i]) for ring in polyhedron.params["faces"] for i in range(1, len(ring) - 1)]
+    return points[np.array(triangles)]
+
+
+def volume(polyhedron) -> float:
+    """
+    Compute the enclosed volume, which is positive for outward faces.
+    """
+    triangles = mesh(polyhedron)
+    return float(np.einsum("ij,ij->i", triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum() / 6)
+
+
+def manifold(polyhedron) -> bool:
+    """
+    Check whether each directed edge of the faces is matched by its reverse.
+    """
+    edges = [(a, b) for ring in polyhedron.params["faces"] for a, b in zip(ring, ring[1:] + ring[:1])]
+    return sorted(edges) == sorted((b, a) for a, b in edges)
+
+
+class EvaluateTest(unittest.TestCase):
+    def test_difference(self):
+        result = boxes.evaluate(difference()(cube(2), translate([1, 1, 1])(cube(2))))
+        self.assertEqual(result.name, "polyhedron")
+        self.assertAlmostEqual(volume(result), 7)
+        self.assertTrue(manifold(result))
+
+    def test_union_of_overlapping_boxes(self):
+        result = boxes.evaluate(union()(cube([3, 1, 1]), translate([1, -1, 0])(cube([1, 3, 1]))))
+        self.assertAlmostEqual(volume(result), 5)
+        self.assertTrue(manifold(result))
+
+    def test_faces_are_clockwise_from_outside(self):
+        result = boxes.evaluate(union()(cube(1), translate([1, 0, 0])(cube(1))))
+        points = np.array(result.params["points"], dtype=float)
+        center = points.mean(axis=0)
+        for ring in result.params["faces"]:
+            # The normal of a clockwise face computed via Newell's method points inwards.
+            loop = points[ring]
+            normal = np.cross(loop, np.roll(loop, -1, axis=0)).sum(axis=0)
+            self.assertLess(normal @ (loop.mean(axis=0) - center), 0)
+
+    def test_empty_result(self):
+        result = boxes.evaluate(difference()(cube(1), translate([-1, -1, -1])(cube(3))))
+        self.assertEqual(result.name, "union")
+        self.assertFalse(result.children)
+
+    def test_edge_touching_boxes_are_not_manifold(self):
+        self.assertIsNone(boxes.evaluate(union()(cube(1), translate([1, 1, 0])(cube(1)))))
+
+
+if __name__ == "__main__":
+    unittest.main()
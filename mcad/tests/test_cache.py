@@ -0,0 +1,63 @@
+"""
+Tests of the content-addressed artifact cache.
+"""
+import unittest
+from os import environ, utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from lib import cache
+
+
+class CanonicalTest(unittest.TestCase):
+    def test_comments_and_whitespace(self):
+        program = '// header\ncube(1); /* block */\n\n  sphere(2);  \ntext("// kept");\n'
+        self.assertEqual(cache.canonical(program), 'cube(1);\nsphere(2);\ntext("// kept");')
+
+    def test_imports_by_content(self):
+        with TemporaryDirectory() as tmp:
+            a, b = Path(tmp) / "a.stl", Path(tmp) / "b.stl"
+            a.write_text("solid a")
+            b.write_text("solid a")
+            self.assertEqual(cache.canonical(f'import(file = "{a}");'), cache.canonical(f'import(file = "{b}");'))
+            b.write_text("solid b")
+            self.assertNotEqual(cache.canonical(f'import(file = "{a}");'), cache.canonical(f'import(file = "{b}");'))
+
+
+class StoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        patch = mock.patch.dict(environ, {"CACHE_DIR": str(self.dir / "cache"), "CACHE_SIZE": "1"})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def store(self, name: str, size: int, mtime: float) -> Path:
+        source = self.dir / name
+        source.write_bytes(b"\0" * size)
+        path = cache.store(cache.key(name), "stl", str(source))
+        utime(path, (mtime, mtime))
+        return path
+
+    def test_fetch(self):
+        self.store("part", 16, 1000)
+        output = self.dir / "out" / "part.stl"
+        self.assertTrue(cache.fetch(cache.key("part"), "stl", str(output)))
+        self.assertEqual(output.read_bytes(), b"\0" * 16)
+        self.assertFalse(cache.fetch(cache.key("other"), "stl", str(output)))
+
+    def test_evicts_least_recently_used(self):
+        size = 400 * 1024
+        fetched, old = self.store("fetched", size, 1000), self.store("old", size, 1001)
+        # Fetching marks an entry as recently used.
+        cache.fetch(cache.key("fetched"), "stl", str(self.dir / "fetched.stl"))
+        new = self.store("new", size, 1002)
+        self.assertFalse(old.exists())
+        self.assertTrue(fetched.exists())
+        self.assertTrue(new.exists())
+        self.assertEqual(list(self.dir.glob("cache/*/*.partial")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
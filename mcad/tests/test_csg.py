@@ -0,0 +1,72 @@
+"""
+Tests of the pass culling the CSG tree, which must not change the
+geometry. The geometry is compared by sampling the signed distance
+fields of `lib.sdf` on a grid.
+"""
+import unittest
+import numpy as np
+from solid import cube, cylinder, difference, hole, part, rotate, translate, union
+from lib.csg import cull, disjoint, stats
+from lib.sdf import Field
+
+
+def fixtures() -> dict:
+    """
+    Create trees as built by the parts via `+=` and `-=`.
+    """
+    a, b, c, d = cube(4), translate([1, 1, -1])(cube([1, 1, 2])), translate([2, 2, 3])(cylinder(r=1, h=2)), cube([1, 4, 1])
+    far = translate([10, 10, 10])(cube(1))
+    return {
+        "chain": difference()(difference()(difference()(a, b), c), d),
+        "transformed": difference()(translate([1, 0, 0])(difference()(a, b, c)), d),
+        "single": difference()(rotate([0, 0, 45])(difference()(a, b)), d),
+        "added after cut": difference()(union()(difference()(a, b), translate([0, 0, 3])(cube(2))), c),
+        "unions": union()(union()(union()(a, far), b), c),
+        "disjoint cutter": difference()(a, far, b),
+        "split union": difference()(union()(a, translate([8, 0, 0])(cube(2))), b),
+        "holes": union()(difference()(a, c), hole()(translate([0.5, 0.5, -1])(cylinder(r=0.25, h=6)))),
+        "part": union()(part()(difference()(a, b)), translate([5, 0, 0])(difference()(a, c))),
+    }
+
+
+def sample(tree) -> np.ndarray:
+    """
+    Sample which points of a grid around the fixtures are inside.
+    """
+    axes = [np.linspace(-2.05, 12.05, 48)] * 3
+    points = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    return Field(tree).evaluate(points)[0] <= 0
+
+
+class CullTest(unittest.TestCase):
+    def test_geometry(self):
+        for name, tree in fixtures().items():
+            with self.subTest(name):
+                np.testing.assert_array_equal(sample(cull(tree)[0]), sample(tree))
+
+    def test_drops_disjoint_cutters(self):
+        tree, report = cull(fixtures()["disjoint cutter"])
+        self.assertEqual(stats(tree), (4, 3))
+        self.assertTrue(any(line.startswith("dropped") for line in report))
+
+    def test_subtracts_only_from_intersected_bodies(self):
+        tree, report = cull(fixtures()["split union"])
+        self.assertEqual(tree.name, "union")
+        self.assertEqual([child.name for child in tree.children], ["difference", "translate"])
+        self.assertTrue(any(line.startswith("split union") for line in report))
+
+
+class DisjointTest(unittest.TestCase):
+    def test_counts_disjoint_bodies(self):
+        self.assertEqual(disjoint(fixtures()["split union"]), [2])
+        self.assertEqual(disjoint(fixtures()["unions"]), [2])
+        self.assertEqual(disjoint(union()(cube(2), translate([1, 1, 1])(cube(2)))), [])
+
+    def test_culling_keeps_disjoint_unions(self):
+        tree, report = cull(fixtures()["part"])
+        self.assertEqual(report, [])
+        self.assertEqual(disjoint(tree), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
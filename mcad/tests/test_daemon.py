@@ -0,0 +1,113 @@
+"""
+Tests of the generator daemon, using stub parts in a temporary source
+directory.
+"""
+import io
+import sys
+import threading
+import unittest
+from contextlib import redirect_stdout
+from importlib import import_module
+from os import environ, utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from lib import daemon, deps
+from lib.utils import PARTS
+
+BOARD = '''
+from solid import cube
+from lib.utils import build, part
+
+SIZE = {size}
+
+
+@part
+def obj():
+    return cube(SIZE)
+
+
+if __name__ == "__main__":
+    build(obj(), __file__)
+'''
+
+CASE = '''
+from solid import cube
+from lib.utils import part
+import daemon_board
+
+
+@part
+def obj():
+    return cube(daemon_board.SIZE + 2)
+'''
+
+OTHER = '''
+SIZE = 3
+'''
+
+
+class DaemonTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = Path(tmp.name).resolve()
+        self.write("daemon_board", BOARD.format(size=1))
+        self.write("daemon_case", CASE)
+        self.write("daemon_other", OTHER)
+        sys.path.insert(0, str(self.src))
+        self.addCleanup(sys.path.remove, str(self.src))
+        for patch in (
+            mock.patch.object(daemon, "SRC_DIR", self.src),
+            mock.patch.object(deps, "SRC_DIR", self.src),
+            mock.patch.dict(environ, {"DAEMON_SOCKET": str(self.src / "daemon.sock")}),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(deps.bindings.cache_clear)
+        self.addCleanup(deps.module_files.cache_clear)
+        for name in ("daemon_board", "daemon_case", "daemon_other"):
+            self.addCleanup(sys.modules.pop, name, None)
+            self.addCleanup(PARTS.pop, name, None)
+
+    def write(self, name: str, code: str):
+        path = self.src / f"{name}.py"
+        mtime = path.stat().st_mtime_ns + 10**9 if path.exists() else None
+        path.write_text(code)
+        if mtime is not None:
+            utime(path, ns=(mtime, mtime))
+
+    def test_refresh_drops_changed_parts_and_their_importers(self):
+        generator = daemon.Generator()
+        for name in ("daemon_case", "daemon_other"):
+            import_module(name)
+        generator.stamp()
+        self.assertEqual(generator.refresh(), [])
+
+        self.write("daemon_board", BOARD.format(size=5))
+        self.assertEqual(generator.refresh(), ["daemon_board", "daemon_case"])
+        self.assertIn("daemon_other", sys.modules)
+        self.assertEqual(import_module("daemon_case").daemon_board.SIZE, 5)
+
+    def test_serves_requests(self):
+        # The daemon reports each request on stdout.
+        with redirect_stdout(io.StringIO()):
+            self.serve()
+
+    def serve(self):
+        server = threading.Thread(target=daemon.serve)
+        server.start()
+        self.addCleanup(server.join)
+        while not (self.src / "daemon.sock").exists():
+            server.join(0.01)
+        try:
+            response = daemon.request({"part": "daemon_board", "env": dict(environ), "cwd": str(self.src)})
+        finally:
+            daemon.request({"command": "stop"})
+        self.assertEqual(response["code"], 0, response["output"])
+        self.assertEqual(response["reloaded"], [])
+        self.assertIn("cube(size = 1);", (self.src / "build" / "scad" / "daemon_board.scad").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests of the dependency tracking, which fingerprints library symbols by
+their AST so that only the parts using a changed symbol are rebuilt.
+"""
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from lib import deps
+
+GEOMETRY = '''
+def plate(width):
+    return rounded(width) + 1
+
+
+def rounded(width):
+    return width * 2
+
+
+def unused():
+    return 3
+'''
+
+PART = '''
+from lib.geometry import plate
+
+def obj():
+    return plate(4)
+'''
+
+
+class FingerprintTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = Path(tmp.name)
+        (self.src / "lib").mkdir()
+        (self.src / "lib" / "__init__.py").write_text("")
+        self.write(GEOMETRY)
+        (self.src / "widget.py").write_text(PART)
+        patch = mock.patch.object(deps, "SRC_DIR", self.src)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(self.clear)
+
+    def clear(self):
+        deps.bindings.cache_clear()
+        deps.module_files.cache_clear()
+
+    def write(self, code: str):
+        (self.src / "lib" / "geometry.py").write_text(code)
+        self.clear()
+
+    def digest(self) -> str:
+        return deps.fingerprint("lib.geometry", "plate")[0]
+
+    def test_dependencies(self):
+        files, symbols = deps.dependencies("widget")
+        self.assertEqual(files, {self.src / "widget.py"})
+        self.assertEqual(symbols, {"lib.geometry.plate"})
+
+    def test_referenced_symbol_changes(self):
+        before = self.digest()
+        self.write(GEOMETRY.replace("width * 2", "width * 3"))
+        self.assertNotEqual(self.digest(), before)
+
+    def test_unrelated_symbol_changes(self):
+        before = self.digest()
+        self.write(GEOMETRY.replace("return 3", "return 4"))
+        self.assertEqual(self.digest(), before)
+
+    def test_formatting_and_comments(self):
+        before = self.digest()
+        self.write("# Geometry helpers.\n" + GEOMETRY.replace("rounded(width) + 1", "rounded( width )+1  # Margin."))
+        self.assertEqual(self.digest(), before)
+
+    def test_docstrings(self):
+        before = self.digest()
+        documented = GEOMETRY.replace("def rounded(width):\n", 'def rounded(width):\n    """\n    Double a width.\n    """\n')
+        self.write(documented)
+        self.assertEqual(self.digest(), before)
+        self.write(documented.replace("Double", "Scale"))
+        self.assertEqual(self.digest(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
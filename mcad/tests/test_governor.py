@@ -0,0 +1,100 @@
+"""
+Tests of the resource governor of the renders.
+"""
+import json
+import re
+import sys
+import unittest
+from os import environ
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from lib import governor, openscad
+
+
+class ExecuteTest(unittest.TestCase):
+    def test_success(self):
+        code, _, output, usage = governor.execute([sys.executable, "-c", "print('done')"])
+        self.assertEqual((code, output), (0, "done\n"))
+        self.assertIsNotNone(usage)
+
+    def test_timeout(self):
+        code, elapsed, output, _ = governor.execute([sys.executable, "-c", "import time; time.sleep(10)"], timeout=0.2)
+        self.assertEqual(code, governor.TIMEOUT_CODE)
+        self.assertLess(elapsed, 5)
+        self.assertIn("time limit of 0.2s", output)
+        self.assertTrue(governor.limited(code))
+
+    def test_out_of_memory(self):
+        args = [sys.executable, "-c", "import sys; print('std::bad_alloc'); sys.exit(1)"]
+        code, _, output, _ = governor.execute(args, memory=4096)
+        self.assertEqual(code, governor.MEMORY_CODE)
+        self.assertIn("memory limit of 4096MB", output)
+        self.assertTrue(governor.limited(code))
+
+    def test_command_not_found(self):
+        code, _, _, usage = governor.execute(["/nonexistent/openscad"])
+        self.assertEqual((code, usage), (127, None))
+        self.assertFalse(governor.limited(code))
+
+    def test_limits(self):
+        with mock.patch.dict(environ, {"RENDER_TIMEOUT": "60", "RENDER_MEMORY": "0"}):
+            self.assertEqual(governor.limits({}), (60, None))
+            self.assertEqual(governor.limits({"timeout": "600", "memory": "4096"}), (600, 4096))
+
+
+class DegradeTest(unittest.TestCase):
+    def test_lowers_the_resolution(self):
+        with TemporaryDirectory() as tmp:
+            scad = Path(tmp) / "part.scad"
+            scad.write_text("$fa = 12.0000;\n$fs = 0.5;\nsphere(r = 1, $fn = 64);\ncircle(r = 1, $fn = 6);\n")
+            with governor.degrade(str(scad), 4) as lower:
+                text = Path(lower).read_text()
+            self.assertFalse(Path(lower).exists())
+        self.assertEqual(text, "$fa = 48.0000;\n$fs = 2;\nsphere(r = 1, $fn = 16);\ncircle(r = 1, $fn = 5);\n")
+
+
+def execute(args: list, timeout=None, memory=None) -> tuple:
+    """
+    Stub of `governor.execute` that runs out of memory unless at most 16
+    segments are used.
+    """
+    if int(re.search(r"\$fn = (\d+)", Path(args[-1]).read_text()).group(1)) > 16:
+        return governor.MEMORY_CODE, 0.0, "out of memory\n", None
+    Path(args[args.index("-o") + 1]).write_text("solid empty\nendsolid empty\n")
+    return 0, 0.0, "", None
+
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        (self.dir / "part.scad").write_text("$fn = 64;\nsphere(r = 1);\n")
+        self.execute = mock.Mock(side_effect=execute)
+        for patch in (
+            mock.patch.dict(environ, {"CACHE": "0"}),
+            mock.patch.object(openscad, "options", return_value=""),
+            mock.patch.object(openscad, "version", return_value="OpenSCAD 2021.01"),
+            mock.patch.object(governor, "execute", self.execute),
+            mock.patch.object(governor, "telemetry"),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def render(self, retries: str) -> tuple:
+        with mock.patch.dict(environ, {"RENDER_RETRIES": retries}):
+            return openscad.render(str(self.dir / "part.scad"), str(self.dir / "part.stl"))[0]
+
+    def test_retries_at_lower_resolutions(self):
+        self.assertEqual(self.render("2"), 0)
+        self.assertEqual(self.execute.call_count, 3)
+        self.assertEqual(json.loads((self.dir / "part.stl.json").read_text())["degraded"], 4)
+
+    def test_gives_up_after_the_retries(self):
+        self.assertEqual(self.render("1"), governor.MEMORY_CODE)
+        self.assertEqual(self.execute.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests of the instrumentation attributing the CSG tree to source lines.
+"""
+import unittest
+from os import environ
+from pathlib import Path
+from unittest import mock
+from solid import OpenSCADObject, cube, cylinder, translate, union
+from lib import instrument
+from lib.patterns import Array
+
+
+def line(node: OpenSCADObject) -> str:
+    """
+    Retrieve the source line recorded for a node.
+    """
+    return (node.get_trait("site") or {}).get("line")
+
+
+class InstrumentedTest(unittest.TestCase):
+    def test_records_source_lines(self):
+        with mock.patch.dict(environ, {"INSTRUMENT": "1"}), instrument.instrumented():
+            body = cube(1)
+            drill = translate([1, 0, 0])(cylinder(r=1, h=2))
+        path, _, number = line(body).rpartition(":")
+        self.assertEqual(Path(path).name, "test_instrument.py")
+        self.assertEqual(line(drill), f"{path}:{int(number) + 1}")
+        self.assertIsNone(line(cube(1)))
+
+    def test_disabled(self):
+        init = OpenSCADObject.__init__
+        with mock.patch.dict(environ, {"INSTRUMENT": "0"}), instrument.instrumented():
+            self.assertIs(OpenSCADObject.__init__, init)
+            self.assertIsNone(line(cube(1)))
+
+    def test_nested_contexts_restore_the_constructor(self):
+        init = OpenSCADObject.__init__
+        with mock.patch.dict(environ, {"INSTRUMENT": "1"}), instrument.instrumented():
+            with instrument.instrumented():
+                pass
+            self.assertIsNotNone(line(cube(1)))
+        self.assertIs(OpenSCADObject.__init__, init)
+
+
+class AnalyzeTest(unittest.TestCase):
+    def test_counts_occurrences(self):
+        with mock.patch.dict(environ, {"INSTRUMENT": "1"}), instrument.instrumented():
+            tile = cube(1)
+            tree = union()(Array((3,), ((2, 0, 0),))(tile), cylinder(r=1, h=1, segments=16))
+        lines = instrument.analyze(tree, None)
+
+        self.assertEqual(lines[line(tile)]["primitives"], 3)
+        self.assertEqual(lines[line(tile)]["facets"], 36)
+        self.assertEqual(lines[line(tile)]["depth"], 3)
+        self.assertEqual(lines[line(tree)]["booleans"], 2)
+        self.assertEqual(lines[line(tree)]["primitives"], 1)
+        self.assertEqual(lines[line(tree)]["facets"], 60)
+
+    def test_facets(self):
+        self.assertEqual(instrument.facets(cylinder(r=1, h=1), 8), 28)
+        self.assertEqual(instrument.facets(cylinder(r=1, h=1, segments=16), 8), 60)
+        self.assertEqual(instrument.facets(translate([1, 0, 0]), 8), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Tests of rendering via OpenSCAD, which is replaced by a stub that fails
+with Manifold and succeeds with CGAL.
+"""
+import json
+import unittest
+from os import environ
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from lib import governor, openscad
+
+
+def execute(args: list, timeout=None, memory=None) -> tuple:
+    """
+    Stub of `governor.execute` writing an empty STL file via CGAL only.
+    """
+    if "manifold" in args:
+        return 1, 0.0, "manifold crashed\n", None
+    Path(args[args.index("-o") + 1]).write_text("solid empty\nendsolid empty\n")
+    return 0, 0.0, "", None
+
+
+class RenderTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.scad = self.dir / "part.scad"
+        self.scad.write_text("cube(1);\n")
+        self.execute = mock.Mock(side_effect=execute)
+        for patch in (
+            mock.patch.dict(environ, {"CACHE_DIR": str(self.dir / "cache"), "CACHE": "1", "RENDER_RETRIES": "0"}),
+            mock.patch.object(openscad, "options", return_value="--backend arg"),
+            mock.patch.object(openscad, "version", return_value="OpenSCAD 2025.01.01"),
+            mock.patch.object(governor, "execute", self.execute),
+            mock.patch.object(governor, "telemetry"),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def render(self) -> tuple:
+        output = self.dir / "part.stl"
+        code, _, _, cached, backend = openscad.render(str(self.scad), str(output), "manifold")
+        return code, cached, backend, json.loads(Path(f"{output}.json").read_text())["backend"]
+
+    def test_falls_back_to_cgal(self):
+        self.assertEqual(self.render(), (0, False, "cgal", "cgal"))
+        self.assertEqual(self.execute.call_count, 2)
+
+    def test_cache_hit_records_the_backend_used(self):
+        self.render()
+        (self.dir / "part.stl").unlink()
+        (self.dir / "part.stl.json").unlink()
+        self.assertEqual(self.render(), (0, True, "cgal", "cgal"))
+        self.assertEqual(self.execute.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
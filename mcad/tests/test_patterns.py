@@ -0,0 +1,51 @@
+"""
+Tests of the pattern nodes, which are emitted as `for` loops.
+"""
+import unittest
+from solid import cube, scad_render
+from lib.bbox import bounds
+from lib.patterns import Array, Mirrored, Pattern
+
+
+class ArrayTest(unittest.TestCase):
+    def test_offsets(self):
+        array = Array((2, 3), ((10, 0, 0), (0, 5, 0)), (1, 1, 0))
+        self.assertEqual(array.copies(), 6)
+        self.assertEqual(array.offsets(), [(1, 1, 0), (1, 6, 0), (1, 11, 0), (11, 1, 0), (11, 6, 0), (11, 11, 0)])
+
+    def test_statement(self):
+        array = Array((3,), ((2.5, 0, 0),))(cube(1))
+        program = scad_render(array)
+        self.assertIn("for (i0 = [0 : 2]) translate(i0 * [2.5000000000, 0.0000000000, 0.0000000000])", program)
+        self.assertIn("cube(size = 1);", program)
+
+    def test_expand(self):
+        tree = Array((2, 2), ((3, 0, 0), (0, 3, 0)))(cube(1)).expand()
+        self.assertEqual(tree.name, "union")
+        self.assertEqual([child.params["v"] for child in tree.children], [(0, 0, 0), (0, 3, 0), (3, 0, 0), (3, 3, 0)])
+        self.assertEqual(bounds(tree), ((0, 0, 0), (4, 4, 1)))
+
+    def test_rejects_empty_arrays(self):
+        with self.assertRaises(ValueError):
+            Array((2, 0), ((1, 0, 0), (0, 1, 0)))
+
+
+class MirroredTest(unittest.TestCase):
+    def test_expand(self):
+        tree = Mirrored((1, 0, 0))(cube(1)).expand()
+        self.assertEqual([child.name for child in tree.children], ["cube", "mirror"])
+        self.assertEqual(bounds(tree), ((-1, 0, 0), (1, 1, 1)))
+
+    def test_statement(self):
+        program = scad_render(Mirrored((0, 1, 0))(cube(1)))
+        self.assertIn("for (v = [[0, 0, 0], [0.0000000000, 1.0000000000, 0.0000000000]]) mirror(v)", program)
+
+
+class PatternTest(unittest.TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            Pattern("pattern", {})  # pylint: disable=abstract-class-instantiated
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests of the streaming SCAD emitter, which must render trees like
+SolidPython apart from the formatting of numbers and whitespace.
+"""
+import re
+import unittest
+from solid import (
+    color,
+    cube,
+    cylinder,
+    debug,
+    difference,
+    hole,
+    intersection,
+    linear_extrude,
+    part,
+    polygon,
+    rotate,
+    rotate_extrude,
+    scad_render,
+    sphere,
+    text,
+    translate,
+    union,
+)
+from lib import scad
+from lib.patterns import Array, Mirrored
+
+# Matches comments and numbers, which are not part of identifiers.
+COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?(?:e-?\d+)?")
+
+
+def canonical(program: str) -> str:
+    """
+    Normalize a program by printing all numbers in their shortest form
+    with 9 decimals and removing comments and whitespace.
+    """
+    program = COMMENT.sub("", program)
+    program = NUMBER.sub(lambda match: scad.number(float(match.group()), 9), program)
+    return re.sub(r"\s+", "", program)
+
+
+def fixtures() -> dict:
+    """
+    Create trees covering modifiers, holes, subtractive booleans above
+    holes and patterns.
+    """
+    body = cube([1.5, 2, 3], center=True)
+    drill = rotate([0, 0, 45.123456789])(cylinder(r=0.5, h=4, segments=16))
+    return {
+        "primitives": union()(
+            body, translate([-1, 0.25, 0])(sphere(d=2)), linear_extrude(height=2)(polygon([[0, 0], [1, 0], [0, 1]]))
+        ),
+        "modifiers": union()(debug(cube(1)), translate([2, 0, 0])(color("#666")(cube(1)))),
+        "text": linear_extrude(1)(text("tol=0.25", size=4)),
+        "holes": difference()(color("#666")(intersection()(body, hole()(drill))), translate([0, 0, 2])(cube(1))),
+        "nested holes": union()(translate([1, 0, 0])(difference()(body, hole()(drill))), hole()(cube(0.5))),
+        "patterns": union()(
+            Array((3, 2), ((2.5, 0, 0), (0, 1.25, 0)), (1, 0, 0))(cube(1)),
+            Mirrored((1, 0, 0))(translate([1, 0, 0])(cube(1))),
+        ),
+    }
+
+
+class EmitterTest(unittest.TestCase):
+    def test_matches_solidpython(self):
+        for name, tree in fixtures().items():
+            with self.subTest(name):
+                self.assertEqual(canonical(scad.render(tree)), canonical(scad_render(tree)))
+
+    def test_holes_of_parts_stay_in_parts(self):
+        # SolidPython subtracts them again at the root once a part was
+        # rendered, as it keeps the state of the holes in the nodes.
+        tree = union()(part()(translate([5, 0, 0])(sphere(1), hole()(cube(0.5)))), cube(1))
+        program = scad.render(tree)
+        self.assertEqual(program.count("cube(size = 0.5)"), 1)
+        self.assertEqual(program.count("difference()"), 1)
+
+    def test_rounds_lengths_but_not_angles(self):
+        tree = rotate([0, 0, 45.123456789])(translate([0.12345678, -0.0001, 2])(cube(1)))
+        program = scad.Emitter(3).program(tree)
+        self.assertEqual(
+            "".join(program),
+            "\nrotate(a = [0, 0, 45.123456789]) {\n\ttranslate(v = [0.123, 0, 2]) {\n\t\tcube(size = 1);\n\t}\n}\n",
+        )
+
+    def test_keeps_the_angles_and_scales_of_extrusions(self):
+        tree = union()(
+            linear_extrude(height=2.00001, twist=12.3456789, scale=0.9876543)(cube(1)),
+            rotate_extrude(angle=45.123456789)(cube(1)),
+        )
+        program = "".join(scad.Emitter(3).program(tree))
+        self.assertIn("linear_extrude(height = 2, scale = 0.9876543, twist = 12.3456789)", program)
+        self.assertIn("rotate_extrude(angle = 45.123456789)", program)
+
+    def test_modules(self):
+        body = translate([1, 0, 0])(cube(1))
+        program = scad.render(union()(cube(1)), "// header", [("shared", body)])
+        self.assertTrue(program.startswith("// header\n"))
+        self.assertIn("module shared() {\n\ttranslate(v = [1, 0, 0]) {\n\t\tcube(size = 1);\n\t}\n}\n", program)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Tests of the preview renderer evaluating parts as signed distance fields.
+"""
+import unittest
+import numpy as np
+from solid import cube, difference, hole, linear_extrude, part, polygon, square, translate, union
+from lib.sdf import Field, image, mesh
+
+
+def volume(triangles: np.ndarray) -> float:
+    """
+    Compute the volume enclosed by outward-facing triangles.
+    """
+    return float(np.einsum("ij,ij->i", triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum() / 6)
+
+
+class FieldTest(unittest.TestCase):
+    def test_distances_of_a_cube(self):
+        distances, _ = Field(cube(2)).evaluate(np.array([[1, 1, 1], [1, 1, 3], [-1, 1, 1]], dtype=float))
+        np.testing.assert_allclose(distances, [-1, 1, 1])
+
+    def test_distances_outside_of_the_bounds(self):
+        tree = union()(cube(1), translate([10, 0, 0])(cube(1)))
+        distances, _ = Field(tree).evaluate(np.array([[5, 0.5, 0.5], [10.5, 0.5, 0.5]]))
+        self.assertAlmostEqual(distances[0], 4)
+        self.assertLess(distances[1], 0)
+
+    def test_holes_are_subtracted_at_the_root(self):
+        tree = union()(cube(4), hole()(translate([1, 1, -1])(cube([2, 2, 6]))))
+        distances, _ = Field(tree).evaluate(np.array([[2, 2, 2], [0.5, 0.5, 2]]))
+        self.assertGreater(distances[0], 0)
+        self.assertLess(distances[1], 0)
+
+    def test_holes_of_parts_stay_in_parts(self):
+        tree = union()(part()(difference()(cube(4), hole()(translate([1, 1, -1])(cube([2, 2, 6]))))), translate([1, 1, 0])(cube(2)))
+        distances, _ = Field(tree).evaluate(np.array([[2, 2, 1]]))
+        self.assertLess(distances[0], 0)
+
+
+class PreviewTest(unittest.TestCase):
+    def test_integer_sized_extrusions(self):
+        for shape in (square([10, 20]), polygon([[0, 0], [10, 0], [0, 10]])):
+            with self.subTest(shape.name):
+                rgb = image(Field(linear_extrude(height=5)(shape)), 32)
+                self.assertEqual(rgb.dtype, np.uint8)
+                self.assertTrue((rgb != rgb[0, 0]).any())
+
+    def test_mesh_volume(self):
+        triangles = mesh(Field(cube([4, 2, 1])), 32)
+        self.assertAlmostEqual(volume(triangles), 8, delta=0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Tests of the parameter sweeps, using the shrinkage calibration part.
+"""
+import unittest
+from lib import sweep
+from lib.utils import PARTS
+
+PART = "nanopi_r5s_test_shrinkage_xy"
+
+
+class ValuesTest(unittest.TestCase):
+    def test_list(self):
+        self.assertEqual(sweep.values("tol_xy=0.2,0.25,3"), ("tol_xy", [0.2, 0.25, 3]))
+
+    def test_inclusive_range(self):
+        self.assertEqual(sweep.values("tol_xy=0.15:0.35:0.05"), ("tol_xy", [0.15, 0.2, 0.25, 0.3, 0.35]))
+
+    def test_invalid(self):
+        for spec in ("tol_xy", "1x=2", "tol_xy=0:1:0"):
+            with self.subTest(spec), self.assertRaises(ValueError):
+                sweep.values(spec)
+
+
+class VariantTest(unittest.TestCase):
+    def test_parameters(self):
+        self.assertLessEqual({"brim", "tol_xy", "pocket_x"}, sweep.parameters(PART))
+
+    def test_derived_dimensions_follow(self):
+        module = sweep.variant(PART, {"tol_xy": 0.5, "brim": 2})
+        self.addCleanup(PARTS.pop, f"{PART}@tol_xy=0.5,brim=2", None)
+        self.assertEqual((module.tol_xy, module.brim), (0.5, 2))
+        self.assertEqual(module.pocket_x, module.r5s_x + 1)
+        self.assertEqual(module.case_x, module.r5s_x + 4)
+        self.assertEqual(sweep.label({"tol_xy": 0.5, "brim": 2}), "tol_xy=0.5 brim=2")
+
+    def test_variants_declare_their_own_parts(self):
+        first, second = sweep.variant(PART, {"tol_xy": 0.1}), sweep.variant(PART, {"tol_xy": 0.2})
+        for name in (f"{PART}@tol_xy=0.1", f"{PART}@tol_xy=0.2"):
+            self.addCleanup(PARTS.pop, name, None)
+            self.assertIn(name, PARTS)
+        self.assertIsNot(first.obj(), second.obj())
+
+
+if __name__ == "__main__":
+    unittest.main()
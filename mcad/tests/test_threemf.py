@@ -0,0 +1,72 @@
+"""
+Tests of the 3MF export, which places the meshes of parts via transforms.
+"""
+import unittest
+import numpy as np
+from solid import color, cube, difference, hole, rotate, translate, union
+from lib import threemf
+
+
+def part(node, name: str):
+    """
+    Mark a node as the geometry of a part, like `lib.utils.part`.
+    """
+    node.add_trait("part", {"name": name})
+    return node
+
+
+class InstancesTest(unittest.TestCase):
+    def test_transforms_and_colors(self):
+        board = part(cube(1), "board")
+        body = cube(2)
+        root = union()(translate([10, 0, 0])(color("#f00")(board)), rotate([0, 0, 90])(board), color([0, 0, 1])(body))
+        found = threemf.instances(root)
+
+        self.assertEqual([(node, name, paint) for node, name, _, paint in found], [
+            (board, "board", "#FF0000FF"),
+            (board, "board", None),
+            (body, None, "#0000FFFF"),
+        ])
+        np.testing.assert_allclose(found[0][2], [[1, 0, 0, 10], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+        np.testing.assert_allclose(found[1][2], [[0, -1, 0, 0], [1, 0, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]], atol=1e-12)
+        np.testing.assert_allclose(found[2][2], np.eye(4))
+
+    def test_nested_transforms(self):
+        board = part(cube(1), "board")
+        found = threemf.instances(union()(translate([1, 2, 3])(translate([1, 0, 0])(board)), board))
+        np.testing.assert_allclose(found[0][2][:3, 3], [2, 2, 3])
+        np.testing.assert_allclose(found[1][2], np.eye(4))
+
+    def test_root_color_of_parts(self):
+        lid = part(color("#666")(cube(1)), "lid")
+        found = threemf.instances(union()(color("#f00")(lid), cube(1)))
+        self.assertEqual(found[0][1:2] + found[0][3:], ("lid", "#666666FF"))
+
+    def test_holes_keep_their_subtree_whole(self):
+        # Holes are subtracted at the root, hence from the siblings as well.
+        root = union()(translate([1, 0, 0])(difference()(cube(2), hole()(cube(1)))), part(cube(1), "board"))
+        self.assertEqual([(node, name) for node, name, _, _ in threemf.instances(root)], [(root, None)])
+
+
+class ColorTest(unittest.TestCase):
+    def test_rgba(self):
+        self.assertEqual(threemf.rgba({"c": "#abc"}), "#AABBCCFF")
+        self.assertEqual(threemf.rgba({"c": "#11223344"}), "#11223344")
+        self.assertEqual(threemf.rgba({"c": [1, 0.5, 0], "alpha": 0.5}), "#FF800080")
+        self.assertIsNone(threemf.rgba({"c": "red"}))
+
+
+class MeshTest(unittest.TestCase):
+    def test_indexed(self):
+        mesh = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[1, 0, 0], [1, 1, 0], [0, 1, 0]], [[0, 0, 0], [0, 0, 0], [1, 1, 1]]])
+        vertices, faces = threemf.indexed(mesh)
+        self.assertEqual(len(vertices), 5)
+        self.assertEqual(len(faces), 2)
+        np.testing.assert_allclose(vertices[faces], mesh[:2])
+
+    def test_number(self):
+        self.assertEqual([threemf.number(v) for v in (0, -0.0000001, 1.5, 2.1234567)], ["0", "-0", "1.5", "2.123457"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests of the mesh operations, which split vendor meshes without OpenSCAD.
+"""
+import unittest
+import numpy as np
+from solid import cube, translate, union
+from lib import boxes, triangles
+from test_boxes import mesh
+
+
+def prism() -> np.ndarray:
+    """
+    Create the closed mesh of an L-shaped prism with a volume of 3x2x2 - 2x1x2.
+    """
+    return mesh(boxes.evaluate(union()(cube([3, 1, 2]), translate([0, 1, 0])(cube([1, 1, 2])))))
+
+
+def watertight(result: np.ndarray) -> bool:
+    """
+    Check whether each directed edge of the triangles is matched by its
+    reverse, after welding the vertices.
+    """
+    keys = [tuple(key) for key in np.round(result.reshape(-1, 3), triangles.DECIMALS).tolist()]
+    vertices = [keys[i : i + 3] for i in range(0, len(keys), 3)]
+    edges = [(a, b) for a, b, c in vertices for a, b in ((a, b), (b, c), (c, a)) if a != b]
+    return sorted(edges) == sorted((b, a) for a, b in edges)
+
+
+class SubtractTest(unittest.TestCase):
+    def test_fixture(self):
+        self.assertAlmostEqual(triangles.volume(prism()), 8)
+        self.assertTrue(watertight(prism()))
+
+    def test_slab_across_the_profile(self):
+        # The caps at both cuts are L-shaped, hence not convex.
+        result = triangles.subtract(prism(), (-1, -1, 0.5), (4, 4, 1.25))
+        self.assertAlmostEqual(triangles.volume(result), 4 * 1.25)
+        self.assertTrue(watertight(result))
+        self.assertEqual(triangles.bounds(result), ((0, 0, 0), (3, 2, 2)))
+
+    def test_slab_across_both_arms(self):
+        result = triangles.subtract(prism(), (0.5, -1, -1), (0.75, 4, 4))
+        self.assertAlmostEqual(triangles.volume(result), 8 - 0.25 * 4)
+        self.assertTrue(watertight(result))
+
+    def test_box_covering_the_mesh(self):
+        self.assertEqual(len(triangles.subtract(prism(), (-1, -1, -1), (4, 4, 4))), 0)
+
+    def test_box_must_span_all_but_one_axis(self):
+        with self.assertRaises(ValueError):
+            triangles.subtract(prism(), (0.5, 0.5, -1), (1, 1, 4))
+
+
+class ShortenTest(unittest.TestCase):
+    def test_slab_across_the_profile(self):
+        result = triangles.shorten(prism(), 2, 0.5, 1.25)
+        self.assertAlmostEqual(triangles.volume(result), 4 * 1.25)
+        self.assertTrue(watertight(result))
+        self.assertEqual(triangles.bounds(result), ((0, 0, 0), (3, 2, 1.25)))
+
+    def test_slab_across_both_arms(self):
+        result = triangles.shorten(prism(), 0, 0.5, 0.75)
+        self.assertAlmostEqual(triangles.volume(result), 8 - 0.25 * 4)
+        self.assertTrue(watertight(result))
+        # Unlike merging capped halves, no faces are left at the joint.
+        self.assertFalse(np.isclose(result[..., 0], 0.5).all(axis=1).any())
+
+    def test_slab_must_be_a_prism(self):
+        with self.assertRaises(ValueError):
+            triangles.shorten(prism(), 0, 0.5, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests of the incremental watch mode, using stub parts in a temporary
+source directory.
+"""
+import queue
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from lib import deps, watch
+
+GEOMETRY = '''
+def plate(width):
+    return width * 2
+
+
+def screw(length):
+    return length + 1
+'''
+
+PLATE = '''
+from lib.geometry import plate
+
+def obj():
+    return plate(4)
+'''
+
+SCREW = '''
+from lib.geometry import screw
+
+def obj():
+    return screw(4)
+'''
+
+
+class WatcherTest(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = Path(tmp.name).resolve()
+        (self.src / "lib").mkdir()
+        (self.src / "lib" / "__init__.py").write_text("")
+        self.write("lib/geometry", GEOMETRY)
+        self.write("watch_plate", PLATE)
+        self.write("watch_screw", SCREW)
+        patch = mock.patch.object(deps, "SRC_DIR", self.src)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(deps.bindings.cache_clear)
+        self.addCleanup(deps.module_files.cache_clear)
+        self.watcher = watch.Watcher({"watch_plate": ["stl"], "watch_screw": ["preview"]}, 1)
+
+    def write(self, name: str, code: str) -> Path:
+        path = self.src / f"{name}.py"
+        path.write_text(code)
+        return path
+
+    def test_changed_parts(self):
+        self.watcher.affected(set())
+        path = self.write("watch_plate", PLATE.replace("4", "5"))
+        self.assertEqual(self.watcher.affected({path}), {"watch_plate"})
+
+    def test_changed_symbols(self):
+        self.assertEqual(self.watcher.affected(set()), set())
+        path = self.write("lib/geometry", GEOMETRY.replace("length + 1", "length + 2"))
+        self.assertEqual(self.watcher.affected({path}), {"watch_screw"})
+        self.assertEqual(self.watcher.affected({path}), set())
+
+    def test_unchanged_symbols(self):
+        self.watcher.affected(set())
+        path = self.write("lib/geometry", "# Geometry helpers.\n" + GEOMETRY)
+        self.assertEqual(self.watcher.affected({path}), set())
+
+
+class EventsTest(unittest.TestCase):
+    def test_collects_bursts_of_sources(self):
+        events = queue.Queue()
+        for name in ("a.py", "b.py", "c.scad", ".#a.py", "__pycache__/a.py"):
+            events.put(Path("/src") / name)
+        with mock.patch.object(watch, "DEBOUNCE", 0.01):
+            self.assertEqual(watch.collect(events, 0.01), {Path("/src/a.py"), Path("/src/b.py")})
+            self.assertEqual(watch.collect(events, 0.01), set())
+
+    def test_commands(self):
+        self.assertEqual(watch.command("case", "preview"), [sys.executable, "-m", "lib.sdf", "-o", "build/preview/case.png", "case"])
+        self.assertEqual(
+            watch.command("case", "png"),
+            [sys.executable, "-m", "lib.openscad", "-o", "build/png/case.png", "build/scad/case.scad"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()